@@ -28,8 +28,12 @@ Copyright (c) 2017 __MoonsoInc__. All rights reserved.
 
 """
 import logging
+import threading
+from copy import deepcopy
 from datetime import datetime
 
+from pymongo.errors import BulkWriteError
+
 from .hgnc import GeneHandler
 from .case import CaseHandler
 from .institute import InstituteHandler
@@ -41,12 +45,27 @@ from .variant import VariantHandler
 from .user import UserHandler
 from .acmg import ACMGHandler
 from .index import IndexHandler
+from .stats import StatsHandler
+
+from scout.utils.cache import LRUCache
 
 log = logging.getLogger(__name__)
 
+GENE_CACHE_SIZE = 20000
+# One gene search index per genome build
+GENE_SEARCH_CACHE_SIZE = 2
+HPO_CACHE_SIZE = 100
+PANEL_CACHE_SIZE = 200
+# Genes and terms loaded by another process are picked up after this many seconds
+GENE_CACHE_TTL = 3600
+# Number of documents sent to the database in each bulk insert
+BULK_BATCH_SIZE = 5000
+# Error code for duplicate keys
+DUPLICATE_KEY_ERROR = 11000
+
 class MongoAdapter(GeneHandler, CaseHandler, InstituteHandler, EventHandler,
                    HpoHandler, PanelHandler, QueryHandler, VariantHandler,
-                   UserHandler, ACMGHandler, IndexHandler):
+                   UserHandler, ACMGHandler, IndexHandler, StatsHandler):
 
     """Adapter for cummunication with a mongo database."""
 
@@ -66,16 +85,116 @@ class MongoAdapter(GeneHandler, CaseHandler, InstituteHandler, EventHandler,
         """Setup connection to database."""
         self.db = database
         self.hgnc_collection = database.hgnc_gene
+        self.hgnc_alias_collection = database.hgnc_alias
         self.user_collection = database.user
         self.whitelist_collection = database.whitelist
         self.institute_collection = database.institute
         self.event_collection = database.event
         self.case_collection = database.case
         self.panel_collection = database.gene_panel
+        self.gene_to_panel_collection = database.gene_to_panel
         self.hpo_term_collection = database.hpo_term
         self.disease_term_collection = database.disease_term
         self.variant_collection = database.variant
         self.acmg_collection = database.acmg
+        self.variant_stats_collection = database.variant_stats
+
+        self.gene_cache = LRUCache(maxsize=GENE_CACHE_SIZE, ttl=GENE_CACHE_TTL)
+        self.gene_search_cache = LRUCache(maxsize=GENE_SEARCH_CACHE_SIZE, ttl=GENE_CACHE_TTL)
+        self.hpo_cache = LRUCache(maxsize=HPO_CACHE_SIZE, ttl=GENE_CACHE_TTL)
+        self.panel_cache = LRUCache(maxsize=PANEL_CACHE_SIZE)
+        # Builds that are known to have their aliases in the alias collection
+        self._alias_builds = set()
+        # Holds the request cache of the current thread
+        self._local = threading.local()
+
+    def start_request_cache(self):
+        """Start remembering single document reads
+
+        Until end_request_cache is called institutes, cases, users and panels
+        that are fetched by id in this thread are only read once from the
+        database. This is meant to be used for one web request that does not
+        change any data.
+        """
+        self._local.request_cache = {}
+
+    def end_request_cache(self):
+        """Stop remembering document reads and forget what was read"""
+        self._local.request_cache = None
+
+    def _request_cached(self, key, fetch):
+        """Return a document from the request cache or fetch it
+
+        A copy is returned so that changes made by the caller are not seen by
+        later reads.
+
+        Args:
+            key(tuple): (<collection>, <identifier>)
+            fetch(callable): Fetches the document from the database
+
+        Returns:
+            document(dict)
+        """
+        request_cache = getattr(self._local, 'request_cache', None)
+        if request_cache is None:
+            return fetch()
+        if key not in request_cache:
+            request_cache[key] = fetch()
+        return deepcopy(request_cache[key])
+
+    def _bulk_insert(self, collection, documents, batch_size=BULK_BATCH_SIZE):
+        """Insert documents in unordered batches
+
+        A document with a duplicate key does not stop the insert, the ids of
+        those documents are returned instead. Other write errors are raised.
+
+        Args:
+            collection(pymongo.Collection)
+            documents(iterable(dict))
+            batch_size(int)
+
+        Returns:
+            nr_inserted(int), duplicate_ids(list)
+        """
+        nr_inserted = 0
+        duplicate_ids = []
+        batch = []
+
+        def insert(batch):
+            try:
+                res = collection.insert_many(batch, ordered=False)
+                inserted = len(res.inserted_ids)
+            except BulkWriteError as err:
+                write_errors = err.details['writeErrors']
+                if any(error['code'] != DUPLICATE_KEY_ERROR for error in write_errors):
+                    raise
+                duplicate_ids.extend(error['op']['_id'] for error in write_errors)
+                inserted = err.details['nInserted']
+            log.info("Inserted %s documents into %s", nr_inserted + inserted, collection.name)
+            return inserted
+
+        for document in documents:
+            batch.append(document)
+            if len(batch) == batch_size:
+                nr_inserted += insert(batch)
+                batch = []
+        if batch:
+            nr_inserted += insert(batch)
+
+        return nr_inserted, duplicate_ids
+
+    def _bulk_write(self, collection, requests, batch_size=BULK_BATCH_SIZE):
+        """Send write requests in unordered batches
+
+        Args:
+            collection(pymongo.Collection)
+            requests(list): pymongo write operations, like InsertOne or DeleteMany
+            batch_size(int)
+        """
+        for start in range(0, len(requests), batch_size):
+            collection.bulk_write(requests[start:start + batch_size], ordered=False)
+            log.info("Written %s of %s changes to %s", min(start + batch_size, len(requests)),
+                     len(requests), collection.name)
 
     def __str__(self):
         return "MongoAdapter(db={0})".format(self.db)
\ No newline at end of file
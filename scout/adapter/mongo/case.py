@@ -72,6 +72,79 @@ class CaseHandler(object):
 
         return self.case_collection.find(query).sort('updated_at', -1)
 
+    def nr_cases_by_institute(self, institute_ids):
+        """Count the cases of many institutes with one aggregation.
+
+        Args:
+            institute_ids(iterable(str))
+
+        Returns:
+            nr_cases(dict): {<institute_id>: <nr cases>}, 0 for institutes
+                            without cases
+        """
+        institute_ids = list(institute_ids)
+        nr_cases = {institute_id: 0 for institute_id in institute_ids}
+        if not institute_ids:
+            return nr_cases
+
+        match = {'$match': {'collaborators': {'$in': institute_ids}}}
+        pipeline = [
+            match,
+            {'$unwind': '$collaborators'},
+            match,
+            {'$group': {'_id': '$collaborators', 'count': {'$sum': 1}}},
+        ]
+        for group in self.case_collection.aggregate(pipeline):
+            nr_cases[group['_id']] = group['count']
+        return nr_cases
+
+    def case_stats(self, institute_id=None):
+        """Collect statistics over the cases with one aggregation.
+
+        Args:
+            institute_id(str): Only count the cases of this institute
+
+        Returns:
+            stats(dict): {
+                'total': int,
+                'status': {<status>: <nr cases>},
+                'analysis_types': {<analysis type>: <nr individuals>},
+                'phenotype_terms': int,
+                'causatives': int,
+                'suspects': int,
+                'cohorts': int,
+            }
+        """
+        pipeline = []
+        if institute_id:
+            pipeline.append({'$match': {'collaborators': institute_id}})
+
+        facets = {
+            'total': [{'$count': 'count'}],
+            'status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}],
+            'analysis_types': [
+                {'$unwind': '$individuals'},
+                {'$group': {'_id': '$individuals.analysis_type', 'count': {'$sum': 1}}},
+            ],
+        }
+        # Cases with more than one of each
+        for key in ('phenotype_terms', 'causatives', 'suspects', 'cohorts'):
+            facets[key] = [
+                {'$match': {"{}.1".format(key): {'$exists': True}}},
+                {'$count': 'count'},
+            ]
+        pipeline.append({'$facet': facets})
+
+        result = next(self.case_collection.aggregate(pipeline))
+        stats = {
+            'status': {group['_id']: group['count'] for group in result['status']},
+            'analysis_types': {group['_id']: group['count'] for group in
+                               result['analysis_types']},
+        }
+        for key in ('total', 'phenotype_terms', 'causatives', 'suspects', 'cohorts'):
+            stats[key] = result[key][0]['count'] if result[key] else 0
+        return stats
+
     def update_dynamic_gene_list(self, case, hgnc_symbols=None, hgnc_ids=None,
                                  phenotype_ids=None, build='37'):
         """Update the dynamic gene list for a case
@@ -99,10 +172,8 @@ class CaseHandler(object):
             res = self.hgnc_collection.find({'hgnc_id': {'$in': hgnc_ids}, 'build': build})
         elif hgnc_symbols:
             logger.info("Fetching genes by hgnc symbols")
-            res = []
-            for symbol in hgnc_symbols:
-                for gene_obj in self.gene_by_alias(symbol=symbol, build=build):
-                    res.append(gene_obj)
+            genes = self.genes_by_identifiers(hgnc_symbols, build=build)
+            res = [gene_obj for symbol in hgnc_symbols for gene_obj in genes[symbol]]
 
         for gene_obj in res:
             dynamic_gene_list.append(
@@ -140,14 +211,33 @@ class CaseHandler(object):
         if case_id:
             query['_id'] = case_id
             logger.info("Fetching case %s", case_id)
+            key = ('case', case_id)
         else:
             if not (institute_id and display_name):
                 raise ValueError("Have to provide both institute_id and display_name")
             logger.info("Fetching case %s institute %s", display_name, institute_id)
             query['owner'] = institute_id
             query['display_name'] = display_name
+            key = ('case', institute_id, display_name)
+
+        return self._request_cached(key, lambda: self.case_collection.find_one(query))
 
-        return self.case_collection.find_one(query)
+    def cases_by_ids(self, case_ids):
+        """Fetch many cases with one query.
+
+        Args:
+            case_ids(iterable(str)): _id for cases
+
+        Returns:
+            case_objs(list(dict)): The cases in the same order as case_ids,
+                                   None if a case is missing
+        """
+        case_ids = list(case_ids)
+        if not case_ids:
+            return []
+        res = self.case_collection.find({'_id': {'$in': case_ids}})
+        case_objs = {case_obj['_id']: case_obj for case_obj in res}
+        return [case_objs.get(case_id) for case_id in case_ids]
 
     def case_ind(self, ind_id):
         """Fetch cases based on an individual id.
@@ -337,16 +427,17 @@ class CaseHandler(object):
         # update suspects and causatives
         for case_variants in ['suspects', 'causatives']:
             new_variantids = []
-            for variant_id in case_obj.get(case_variants, []):
-                case_variant = self.variant(variant_id)
+            for case_variant in self.variants_by_ids(case_obj.get(case_variants, [])):
                 new_variantid = get_variantid(case_variant, family_id)
                 new_variantids.append(new_variantid)
             new_case[case_variants] = new_variantids
 
         # update ACMG
-        for acmg_obj in self.acmg_collection.find({'case_id': case_obj['_id']}):
+        acmg_objs = list(self.acmg_collection.find({'case_id': case_obj['_id']}))
+        acmg_variants = self.variants_by_ids(acmg_obj['variant_specific'] for
+                                             acmg_obj in acmg_objs)
+        for acmg_obj, acmg_variant in zip(acmg_objs, acmg_variants):
             logger.info("update ACMG classification: %s", acmg_obj['classification'])
-            acmg_variant = self.variant(acmg_obj['variant_specific'])
             new_specific_id = get_variantid(acmg_variant, family_id)
             self.acmg_collection.find_one_and_update(
                 {'_id': acmg_obj['_id']},
@@ -362,6 +453,9 @@ class CaseHandler(object):
                 {'$set': {'case': family_id}},
             )
 
+        # update variant statistics
+        self.move_variant_stats(case_obj['_id'], family_id)
+
         # insert the updated case
         self.case_collection.insert_one(new_case)
         # delete the old case
@@ -102,6 +102,37 @@ class EventHandler(object):
 
         return self.event_collection.find(query).sort('created_at', pymongo.DESCENDING)
 
+    def variants_comments(self, institute, variant_ids):
+        """Fetch the comments for many variants in one query
+
+        This is used for the variant list views where comments are shown for
+        every variant on a page.
+
+          Args:
+            institute (dict): A institute
+            variant_ids (iterable(str)): global variant ids
+
+          Returns:
+              dict: {<variant_id>: [<comment>, ...]} with the newest comment
+                    first. Variants without comments are included with an
+                    empty list.
+        """
+        variant_ids = list(variant_ids)
+        comments = {variant_id: [] for variant_id in variant_ids}
+        if not variant_ids:
+            return comments
+
+        query = {
+            'institute': institute['_id'],
+            'category': 'variant',
+            'variant_id': {'$in': variant_ids},
+            'verb': 'comment',
+        }
+        res = self.event_collection.find(query).sort('created_at', pymongo.DESCENDING)
+        for event in res:
+            comments[event['variant_id']].append(event)
+        return comments
+
     def user_events(self, user_obj=None):
         """Fetch all events by a specific user."""
         query = dict(user_id=user_obj['_id']) if user_obj else dict()
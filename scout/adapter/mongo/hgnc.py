@@ -1,10 +1,139 @@
 import logging
+from pymongo import (InsertOne, ReplaceOne, DeleteMany, UpdateOne)
+
+from scout.exceptions import IntegrityError
+from scout.utils.prefix import PrefixIndex
 
 logger = logging.getLogger(__name__)
 
+# Marks a cache miss since None is a valid cached result
+MISSING = object()
+
+GENE_SEARCH_PROJECTION = {
+    '_id': 0,
+    'hgnc_id': 1,
+    'hgnc_symbol': 1,
+    'aliases': 1,
+    'description': 1,
+}
+
+ALIAS_PROJECTION = {
+    '_id': 0,
+    'hgnc_id': 1,
+    'hgnc_symbol': 1,
+    'aliases': 1,
+}
+
+
+def alias_entries(gene_objs):
+    """Group hgnc ids on the aliases of the genes
+
+    The aliases of a gene include its hgnc symbol. If an alias is the hgnc
+    symbol of a gene that hgnc id is the true id of the alias.
+
+    Args:
+        gene_objs(iterable(dict)): Genes with hgnc_id, hgnc_symbol and aliases
+
+    Returns:
+        alias_genes(dict): {<hgnc_alias>: {'true': <hgnc_id>, 'ids': {<hgnc_id_1>, ...}}}
+    """
+    alias_genes = {}
+    for gene in gene_objs:
+        hgnc_id = gene['hgnc_id']
+        hgnc_symbol = gene['hgnc_symbol']
+        for alias in gene.get('aliases', []):
+            if alias not in alias_genes:
+                alias_genes[alias] = {'true': None, 'ids': set()}
+            alias_genes[alias]['ids'].add(hgnc_id)
+            if alias == hgnc_symbol:
+                alias_genes[alias]['true'] = hgnc_id
+    return alias_genes
+
+
+def copy_genes(result):
+    """Return a copy of a cached result that the caller can change
+
+    Genes are copied one level deep, values like the transcripts are shared
+    with the cache and must not be changed.
+
+    Args:
+        result: A gene, a list or dictionary of genes or a plain value
+
+    Returns:
+        result
+    """
+    if isinstance(result, list):
+        return [copy_genes(value) for value in result]
+    if isinstance(result, dict):
+        if 'hgnc_id' in result:
+            return dict(result)
+        return {key: copy_genes(value) for key, value in result.items()}
+    return result
+
+
+def alias_key(alias, build):
+    """Return the _id of an alias in the alias collection"""
+    return "{0}_{1}".format(build, alias)
+
 
 class GeneHandler(object):
 
+    """Handle the hgnc genes
+
+    Lookups of single genes are kept in self.gene_cache, a bounded LRU cache
+    with keys (<method>, <build>, <identifier>). The search index of each
+    build is kept in self.gene_search_cache so that it is not pushed out by
+    gene lookups. Entries for a build are removed when genes of that build
+    are loaded or dropped.
+
+    What hgnc ids each alias points to is kept in its own collection,
+    self.hgnc_alias_collection, with one document per build and alias. It is
+    updated when genes are loaded so that aliases can be resolved without
+    reading the genes.
+    """
+
+    def _cached_genes(self, key, fetch):
+        """Return a cached lookup or fetch and cache it
+
+        A copy is returned so that callers can set fields of the genes
+        without changing the cache, see copy_genes.
+
+        Args:
+            key(tuple): (<method>, <build>, <identifier>)
+            fetch(callable): Fetches the result from the database
+
+        Returns:
+            result
+        """
+        result = self.gene_cache.get(key, MISSING)
+        if result is MISSING:
+            result = fetch()
+            self.gene_cache.set(key, result)
+        return copy_genes(result)
+
+    def invalidate_gene_cache(self, build=None):
+        """Remove cached genes
+
+        Args:
+            build(str): Only remove genes from this build
+        """
+        if build:
+            logger.debug("Clearing gene cache for build %s", build)
+            self.gene_cache.invalidate(lambda key: key[1] == build)
+            self.gene_search_cache.invalidate(lambda key: key[1] == build)
+        else:
+            logger.debug("Clearing gene cache")
+            self.gene_cache.invalidate()
+            self.gene_search_cache.invalidate()
+
+    def gene_cache_stats(self):
+        """Return hit and miss statistics for the gene cache
+
+        Returns:
+            stats(dict): {'hits': int, 'misses': int, 'size': int, 'maxsize': int}
+        """
+        return self.gene_cache.stats()
+
     def load_hgnc_gene(self, gene_obj):
         """Add a gene object with transcripts to the database
 
@@ -15,9 +144,83 @@ class GeneHandler(object):
         logger.debug("Loading gene %s, build %s into database" %
                      (gene_obj['hgnc_symbol'], gene_obj['build']))
         res = self.hgnc_collection.insert_one(gene_obj)
+        self._index_gene_aliases([gene_obj])
+        self.invalidate_gene_cache(gene_obj['build'])
         logger.debug("Gene saved")
         return res
 
+    def load_hgnc_bulk(self, gene_objs):
+        """Add many gene objects with transcripts to the database
+
+        The genes are inserted in large unordered batches.
+
+        Args:
+            gene_objs(iterable(dict))
+
+        Returns:
+            nr_inserted(int)
+        """
+        gene_objs = list(gene_objs)
+        logger.info("Loading %s genes into database", len(gene_objs))
+        nr_inserted, duplicate_ids = self._bulk_insert(self.hgnc_collection, gene_objs)
+        duplicate_ids = set(duplicate_ids)
+        self._index_gene_aliases(gene_obj for gene_obj in gene_objs
+                                 if gene_obj.get('_id') not in duplicate_ids)
+        self.invalidate_gene_cache()
+        if duplicate_ids:
+            raise IntegrityError("Genes {0} already exist in database".format(
+                ', '.join(str(gene_id) for gene_id in duplicate_ids)))
+        return nr_inserted
+
+    def update_genes(self, gene_objs, build='37', batch_size=5000):
+        """Bring the genes of a build up to date with a new set of genes
+
+        The genes are compared with the stored genes on hgnc id and only the
+        new, changed and removed genes are written, in unordered bulk
+        writes. Genes that do not change stay available during the update.
+
+        Args:
+            gene_objs(iterable(dict)): The complete new set of genes for the build
+            build(str)
+            batch_size(int): Number of writes sent to the database at a time
+
+        Returns:
+            result(dict): {'inserted': int, 'updated': int, 'deleted': int}
+        """
+        existing = {gene_obj['hgnc_id']: gene_obj for gene_obj in
+                    self.hgnc_collection.find({'build': build})}
+        result = {'inserted': 0, 'updated': 0, 'deleted': 0}
+
+        requests = []
+        new_ids = set()
+        for gene_obj in gene_objs:
+            hgnc_id = gene_obj['hgnc_id']
+            new_ids.add(hgnc_id)
+            old_obj = existing.get(hgnc_id)
+            if old_obj is None:
+                requests.append(InsertOne(gene_obj))
+                result['inserted'] += 1
+                continue
+            gene_id = old_obj.pop('_id')
+            if old_obj != gene_obj:
+                gene_obj['_id'] = gene_id
+                requests.append(ReplaceOne({'_id': gene_id}, gene_obj))
+                result['updated'] += 1
+
+        removed_ids = [hgnc_id for hgnc_id in existing if hgnc_id not in new_ids]
+        if removed_ids:
+            requests.append(DeleteMany({'build': build, 'hgnc_id': {'$in': removed_ids}}))
+            result['deleted'] = len(removed_ids)
+
+        self._bulk_write(self.hgnc_collection, requests, batch_size)
+
+        if requests:
+            self.build_alias_table(build)
+        self.invalidate_gene_cache(build)
+        logger.info("Genes in build %s: %s inserted, %s updated, %s deleted", build,
+                    result['inserted'], result['updated'], result['deleted'])
+        return result
+
     def hgnc_gene(self, hgnc_identifyer, build='37'):
         """Fetch a hgnc gene
 
@@ -38,8 +241,40 @@ class GeneHandler(object):
 
         query['build'] = build
         logger.debug("Fetching gene %s" % hgnc_identifyer)
-        gene_obj = self.hgnc_collection.find_one(query)
-        return gene_obj
+        key = ('hgnc_gene', build, hgnc_identifyer)
+        return self._cached_genes(key, lambda: self.hgnc_collection.find_one(query))
+
+    def hgnc_genes_by_ids(self, hgnc_ids, build='37'):
+        """Fetch many hgnc genes with at most one query
+
+        Genes that are already in the gene cache are not fetched again.
+
+        Args:
+            hgnc_ids(iterable(int))
+            build(str)
+
+        Returns:
+            gene_objs(dict): {<hgnc_id>: <gene_obj>}, None if a gene is missing
+        """
+        gene_objs = {}
+        missing = []
+        for hgnc_id in set(hgnc_ids):
+            gene_obj = self.gene_cache.get(('hgnc_gene', build, hgnc_id), MISSING)
+            if gene_obj is MISSING:
+                missing.append(hgnc_id)
+            else:
+                gene_objs[hgnc_id] = gene_obj
+
+        if missing:
+            logger.debug("Fetching %s genes", len(missing))
+            fetched = {gene_obj['hgnc_id']: gene_obj for gene_obj in
+                       self.hgnc_collection.find({'hgnc_id': {'$in': missing}, 'build': build})}
+            for hgnc_id in missing:
+                gene_obj = fetched.get(hgnc_id)
+                self.gene_cache.set(('hgnc_gene', build, hgnc_id), gene_obj)
+                gene_objs[hgnc_id] = gene_obj
+
+        return copy_genes(gene_objs)
 
     def hgnc_id(self, hgnc_symbol, build='37'):
         """Query the genes with a hgnc symbol and return the hgnc id
@@ -54,45 +289,95 @@ class GeneHandler(object):
         logger.debug("Fetching gene %s", hgnc_symbol)
         query = {'hgnc_symbol':hgnc_symbol, 'build':build}
         projection = {'hgnc_id':1, '_id':0}
-        res = self.hgnc_collection.find(query, projection)
 
-        if res.count() > 0:
-            return res[0]['hgnc_id']
-        else:
-            return None
+        def fetch():
+            gene_obj = self.hgnc_collection.find_one(query, projection)
+            return gene_obj['hgnc_id'] if gene_obj else None
+
+        return self._cached_genes(('hgnc_id', build, hgnc_symbol), fetch)
 
-    def hgnc_genes(self, hgnc_symbol, build='37', search=False):
+    def gene_search_index(self, build='37'):
+        """Return a prefix index over the hgnc ids and aliases of a build
+
+        The index is built from the gene collection on first use and kept in
+        the gene search cache, so it is rebuilt when genes of the build are
+        loaded.
+
+        Args:
+            build(str)
+
+        Returns:
+            prefix_index(PrefixIndex): Aliases and hgnc ids pointing to hgnc ids
+            genes(dict): {<hgnc_id>: <gene>} with hgnc_id, hgnc_symbol,
+                         aliases and description
+        """
+        key = ('gene_search_index', build, None)
+        search_index = self.gene_search_cache.get(key)
+        if search_index is None:
+            logger.info("Building gene search index for build %s", build)
+            genes = {}
+            entries = []
+            res = self.hgnc_collection.find({'build': build}, GENE_SEARCH_PROJECTION)
+            for gene_obj in res:
+                hgnc_id = gene_obj['hgnc_id']
+                genes[hgnc_id] = gene_obj
+                # The aliases include the symbol, which is ranked first
+                for alias in gene_obj.get('aliases', []):
+                    rank = 0 if alias == gene_obj['hgnc_symbol'] else 1
+                    entries.append((alias, rank, hgnc_id))
+                entries.append((hgnc_id, 2, hgnc_id))
+            search_index = (PrefixIndex(entries), genes)
+            self.gene_search_cache.set(key, search_index)
+        return search_index
+
+    def hgnc_genes(self, hgnc_symbol, build='37', search=False, limit=None):
         """Fetch all hgnc genes that match a hgnc symbol
 
             Check both hgnc_symbol and aliases
 
+            When searching, genes with an alias or hgnc id equal to the query
+            are returned if there are any. Otherwise all genes with an alias or
+            hgnc id that starts with the query are returned, matches on the
+            hgnc symbol first. Case is ignored. Only the fields in
+            GENE_SEARCH_PROJECTION are included in search results.
+
             Args:
                 hgnc_symbol(str)
                 build(str): The build in which to search
                 search(bool): if partial searching should be used
+                limit(int): Maximum number of genes to return when searching
 
             Returns:
-                result()
+                result(list(dict))
         """
         logger.debug("Fetching genes with symbol %s" % hgnc_symbol)
         if search:
-            # first search for a full match
-            full_query = self.hgnc_collection.find({
-                '$or': [
-                    {'aliases': hgnc_symbol},
-                    {'hgnc_id': int(hgnc_symbol) if hgnc_symbol.isdigit() else None},
-                ],
-                'build': build
-            })
-            if full_query.count() != 0:
-                return full_query
-
-            return self.hgnc_collection.find({
-                'aliases': {'$regex': hgnc_symbol, '$options': 'i'},
-                'build': build
-            })
-
-        return self.hgnc_collection.find({'aliases': hgnc_symbol, 'build': build})
+            prefix_index, genes = self.gene_search_index(build)
+            hgnc_ids = prefix_index.exact(hgnc_symbol)
+            if not hgnc_ids:
+                hgnc_ids = prefix_index.search(hgnc_symbol, limit=limit)
+            elif limit:
+                hgnc_ids = hgnc_ids[:limit]
+            return [copy_genes(genes[hgnc_id]) for hgnc_id in hgnc_ids]
+
+        query = {'aliases': hgnc_symbol, 'build': build}
+        return self._cached_genes(('hgnc_genes', build, hgnc_symbol),
+                                  lambda: list(self.hgnc_collection.find(query)))
+
+    def hgnc_symbols(self, hgnc_ids, build='37'):
+        """Return the hgnc symbols for many hgnc ids with one query
+
+        Args:
+            hgnc_ids(iterable(int))
+            build(str)
+
+        Returns:
+            hgnc_symbols(dict): {<hgnc_id>: <hgnc_symbol>} for the genes found
+        """
+        query = {'hgnc_id': {'$in': list(hgnc_ids)}, 'build': build}
+        projection = {'hgnc_id': 1, 'hgnc_symbol': 1, '_id': 0}
+        return {gene_obj['hgnc_id']: gene_obj['hgnc_symbol'] for gene_obj in
+                self.hgnc_collection.find(query, projection)}
 
     def all_genes(self, build='37'):
         """Fetch all hgnc genes
@@ -123,9 +408,14 @@ class GeneHandler(object):
         if build:
             logger.info("Dropping the hgnc_gene collection, build %s", build)
             self.hgnc_collection.delete_many({'build': build})
+            self.hgnc_alias_collection.delete_many({'build': build})
+            self._alias_builds.discard(build)
         else:
             logger.info("Dropping the hgnc_gene collection")
             self.hgnc_collection.drop()
+            self.hgnc_alias_collection.drop()
+            self._alias_builds.clear()
+        self.invalidate_gene_cache(build)
 
     def hgncid_to_gene(self, build='37'):
         """Return a dictionary with hgnc_id as key and gene_obj as value
@@ -179,13 +469,170 @@ class GeneHandler(object):
             build(str)
 
         Returns:
-            res(pymongo.Cursor(dict))
+            res(list(dict))
         """
-        res = self.hgnc_collection.find({'hgnc_symbol': symbol, 'build':build})
-        if res.count() == 0:
-            res = self.hgnc_collection.find({'aliases': symbol, 'build':build})
+        def fetch():
+            res = list(self.hgnc_collection.find({'hgnc_symbol': symbol, 'build':build}))
+            if not res:
+                res = list(self.hgnc_collection.find({'aliases': symbol, 'build':build}))
+            return res
 
-        return res
+        return self._cached_genes(('gene_by_alias', build, symbol), fetch)
+
+    def genes_by_identifiers(self, identifiers, build='37'):
+        """Resolve many hgnc ids, symbols and aliases to genes with one query
+
+        Integers are treated as hgnc ids and strings as symbols. As for
+        gene_by_alias a symbol that is a hgnc symbol only gives that gene,
+        otherwise all genes that have the symbol as an alias. Transcripts
+        are not included in the genes.
+
+        Args:
+            identifiers(iterable(int or str))
+            build(str)
+
+        Returns:
+            genes(dict): {<identifier>: list(dict)} with an empty list for
+                         identifiers that were not found
+        """
+        identifiers = list(identifiers)
+        hgnc_ids = [ident for ident in identifiers if isinstance(ident, int)]
+        symbols = [ident for ident in identifiers if not isinstance(ident, int)]
+        genes = {ident: [] for ident in identifiers}
+        if not identifiers:
+            return genes
+
+        query = {'build': build, '$or': [
+            {'hgnc_id': {'$in': hgnc_ids}},
+            {'hgnc_symbol': {'$in': symbols}},
+            {'aliases': {'$in': symbols}},
+        ]}
+        by_id = {}
+        by_symbol = {}
+        by_alias = {}
+        for gene_obj in self.hgnc_collection.find(query, {'transcripts': 0}):
+            by_id[gene_obj['hgnc_id']] = gene_obj
+            by_symbol[gene_obj['hgnc_symbol']] = gene_obj
+            for alias in gene_obj.get('aliases', []):
+                by_alias.setdefault(alias, []).append(gene_obj)
+
+        for hgnc_id in hgnc_ids:
+            if hgnc_id in by_id:
+                genes[hgnc_id] = [by_id[hgnc_id]]
+        for symbol in symbols:
+            if symbol in by_symbol:
+                genes[symbol] = [by_symbol[symbol]]
+            else:
+                genes[symbol] = by_alias.get(symbol, [])
+
+        return genes
+
+    def _index_gene_aliases(self, gene_objs, batch_size=5000):
+        """Add the aliases of genes to the alias collection
+
+        Args:
+            gene_objs(iterable(dict))
+            batch_size(int): Number of writes sent to the database at a time
+        """
+        builds = {}
+        for gene_obj in gene_objs:
+            builds.setdefault(gene_obj['build'], []).append(gene_obj)
+
+        requests = []
+        for build, build_genes in builds.items():
+            for alias, id_info in alias_entries(build_genes).items():
+                update = {
+                    '$setOnInsert': {'build': build, 'alias': alias},
+                    '$addToSet': {'ids': {'$each': sorted(id_info['ids'])}},
+                }
+                if id_info['true']:
+                    update['$set'] = {'true': id_info['true']}
+                requests.append(UpdateOne({'_id': alias_key(alias, build)}, update, upsert=True))
+
+        self._bulk_write(self.hgnc_alias_collection, requests, batch_size)
+        if requests:
+            logger.info("Indexed %s gene aliases", len(requests))
+        self._alias_builds.update(builds)
+
+    def build_alias_table(self, build='37', batch_size=5000):
+        """Bring the aliases of a build up to date with the genes
+
+        The aliases are compared with the stored ones and only new, changed
+        and removed aliases are written, so the aliases of the build can be
+        resolved during the update. The alias collection is kept up to date
+        when genes are loaded through the adapter, this is only needed after
+        genes are changed or for databases where the genes were loaded some
+        other way.
+
+        Args:
+            build(str)
+            batch_size(int): Number of writes sent to the database at a time
+
+        Returns:
+            nr_aliases(int)
+        """
+        logger.info("Building alias table for build %s", build)
+        existing = {alias_obj['_id']: alias_obj for alias_obj in
+                    self.hgnc_alias_collection.find({'build': build})}
+        genes = self.hgnc_collection.find({'build': build}, ALIAS_PROJECTION)
+        alias_genes = alias_entries(genes)
+
+        requests = []
+        new_keys = set()
+        for alias, id_info in alias_genes.items():
+            alias_obj = {
+                '_id': alias_key(alias, build),
+                'build': build,
+                'alias': alias,
+                'true': id_info['true'],
+                'ids': sorted(id_info['ids']),
+            }
+            new_keys.add(alias_obj['_id'])
+            if existing.get(alias_obj['_id']) != alias_obj:
+                requests.append(ReplaceOne({'_id': alias_obj['_id']}, alias_obj, upsert=True))
+        removed_keys = [key for key in existing if key not in new_keys]
+        if removed_keys:
+            requests.append(DeleteMany({'_id': {'$in': removed_keys}}))
+
+        self._bulk_write(self.hgnc_alias_collection, requests, batch_size)
+        logger.info("Aliases in build %s: %s written, %s removed", build,
+                    len(requests) - (1 if removed_keys else 0), len(removed_keys))
+        self._alias_builds.add(build)
+        return len(alias_genes)
+
+    def _ensure_alias_table(self, build):
+        """Build the alias table for a build that has genes but no aliases
+
+        The database is only checked until the aliases of the build are
+        found or built.
+        """
+        if build in self._alias_builds:
+            return
+        if self.hgnc_alias_collection.find_one({'build': build}, {'_id': 1}) is not None:
+            self._alias_builds.add(build)
+        elif self.hgnc_collection.find_one({'build': build}, {'_id': 1}) is not None:
+            self.build_alias_table(build)
+
+    def resolve_aliases(self, aliases, build='37'):
+        """Look up many aliases in the alias collection with one query
+
+        Args:
+            aliases(iterable(str))
+            build(str)
+
+        Returns:
+            alias_genes(dict): {<hgnc_alias>: {'true': <hgnc_id>, 'ids': {<hgnc_id_1>, ...}}}
+                               for the aliases that exist
+        """
+        self._ensure_alias_table(build)
+        keys = [alias_key(alias, build) for alias in set(aliases)]
+        alias_genes = {}
+        for alias_obj in self.hgnc_alias_collection.find({'_id': {'$in': keys}}):
+            alias_genes[alias_obj['alias']] = {
+                'true': alias_obj.get('true'),
+                'ids': set(alias_obj['ids']),
+            }
+        return alias_genes
 
     def genes_by_alias(self, build='37'):
         """Return a dictionary with hgnc symbols as keys and a list of hgnc ids
@@ -195,6 +642,9 @@ class GeneHandler(object):
         of that entry if not the gene can not be determined so the result is a list
         of hgnc_ids
 
+        The result is read from the alias collection. Use resolve_aliases
+        to look up only some aliases.
+
         Args:
             build(str)
 
@@ -202,24 +652,13 @@ class GeneHandler(object):
             alias_genes(dict): {<hgnc_alias>: {'true': <hgnc_id>, 'ids': {<hgnc_id_1>, <hgnc_id_2>, ...}}}
         """
         logger.info("Fetching all genes by alias")
+        self._ensure_alias_table(build)
         alias_genes = {}
-        for gene in self.hgnc_collection.find({'build':build}):
-            hgnc_id = gene['hgnc_id']
-            hgnc_symbol = gene['hgnc_symbol']
-            # Loop aver all aliases
-            for alias in gene['aliases']:
-                true_id = None
-                if alias == hgnc_symbol:
-                    true_id = hgnc_id
-                if alias in alias_genes:
-                    alias_genes[alias]['ids'].add(hgnc_id)
-                    if true_id:
-                        alias_genes[alias]['true'] = hgnc_id
-                else:
-                    alias_genes[alias] = {
-                        'true': true_id,
-                        'ids': set([hgnc_id])
-                    }
+        for alias_obj in self.hgnc_alias_collection.find({'build': build}):
+            alias_genes[alias_obj['alias']] = {
+                'true': alias_obj.get('true'),
+                'ids': set(alias_obj['ids']),
+            }
 
         return alias_genes
 
@@ -248,7 +687,7 @@ class GeneHandler(object):
             genes(list(dict)): A set of genes with hgnc symbols only
 
         """
-        genes_by_alias = self.genes_by_alias()
+        genes_by_alias = self.resolve_aliases(gene['hgnc_symbol'] for gene in genes)
 
         for gene in genes:
             id_info = genes_by_alias.get(gene['hgnc_symbol'])
@@ -1,17 +1,29 @@
 # -*- coding: utf-8 -*-
 import logging
+import math
+import re
 
 import operator
+from collections import Counter
 
 from pymongo.errors import DuplicateKeyError
 
 from scout.exceptions import IntegrityError
+from scout.utils.prefix import PrefixIndex
 
 log = logging.getLogger(__name__)
 
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
 
 class HpoHandler(object):
 
+    """Handle hpo and disease terms
+
+    Search indexes over the terms are kept in self.hpo_cache and are cleared
+    when terms are loaded.
+    """
+
     def load_hpo_term(self, hpo_obj):
         """Add a hpo object
 
@@ -24,8 +36,31 @@ class HpoHandler(object):
             self.hpo_term_collection.insert_one(hpo_obj)
         except DuplicateKeyError as err:
             raise IntegrityError("Hpo term %s already exists in database".format(hpo_obj['_id']))
+        self.hpo_cache.invalidate()
         log.debug("Hpo term saved")
 
+    def load_hpo_bulk(self, hpo_objs):
+        """Add many hpo terms to the database in unordered batches
+
+        Terms that are not already in the database are inserted even if
+        some are.
+
+        Args:
+            hpo_objs(iterable(dict))
+
+        Returns:
+            nr_inserted(int)
+
+        Raises:
+            IntegrityError: If any of the terms already exist
+        """
+        nr_inserted, duplicate_ids = self._bulk_insert(self.hpo_term_collection, hpo_objs)
+        self.hpo_cache.invalidate()
+        if duplicate_ids:
+            raise IntegrityError("Hpo terms {0} already exist in database".format(
+                ', '.join(duplicate_ids)))
+        return nr_inserted
+
     def hpo_term(self, hpo_id):
         """Fetch a hpo term
 
@@ -39,29 +74,71 @@ class HpoHandler(object):
 
         return self.hpo_term_collection.find_one({'_id': hpo_id})
 
-    def hpo_terms(self, query=None):
+    def hpo_search_index(self):
+        """Return a prefix index over the hpo terms
+
+        The keys are the hpo ids, the number part of the hpo ids, the
+        descriptions and each word of the descriptions.
+
+        Returns:
+            prefix_index(PrefixIndex): Keys pointing to hpo ids
+            terms(dict): {<hpo_id>: {'_id', 'hpo_id', 'description'}}
+        """
+        key = 'hpo_search_index'
+        search_index = self.hpo_cache.get(key)
+        if search_index is None:
+            log.info("Building hpo term search index")
+            terms = {}
+            entries = []
+            res = self.hpo_term_collection.find({}, {'hpo_id': 1, 'description': 1})
+            for term in res:
+                hpo_id = term['_id']
+                description = term.get('description') or ''
+                terms[hpo_id] = term
+                entries.append((hpo_id, 0, hpo_id))
+                entries.append((hpo_id.split(':')[-1].lstrip('HP'), 0, hpo_id))
+                entries.append((description, 1, hpo_id))
+                for token in set(TOKEN_PATTERN.findall(description.lower())):
+                    entries.append((token, 2, hpo_id))
+            search_index = (PrefixIndex(entries), terms)
+            self.hpo_cache.set(key, search_index)
+        return search_index
+
+    def hpo_terms(self, query=None, limit=None):
         """Return all HPO terms
 
-        If a query is sent hpo_terms will try to match with regex on term or
-        description.
+        If a query is sent the terms are searched for in an in memory index.
+        Terms where the id or description starts with the query come first,
+        then terms where every word of the query starts a word in the
+        description. Only _id, hpo_id and description are returned for
+        searches.
 
         Args:
             query(str): Part of a hpoterm or description
+            limit(int): Maximum number of terms to return
 
         Returns:
-            result(pymongo.Cursor): A cursor with hpo terms
+            result(list(dict)): All terms, or the matching terms if query
         """
-        if query:
-            query_dict = {'$or':
-                [
-                    {'_id': {'$regex': query, '$options':'i'}},
-                    {'description': {'$regex': query, '$options':'i'}},
-                ]
-            }
-        else:
-            query_dict = {}
-
-        return self.hpo_term_collection.find(query_dict)
+        if not query:
+            return list(self.hpo_term_collection.find({}).limit(limit or 0))
+
+        prefix_index, terms = self.hpo_search_index()
+        hpo_ids = prefix_index.search(query, limit=limit)
+        if limit is None or len(hpo_ids) < limit:
+            # Match each word of the query against the words in the descriptions
+            tokens = TOKEN_PATTERN.findall(query.lower())
+            if len(tokens) > 1:
+                matches = set(prefix_index.search(tokens[0]))
+                for token in tokens[1:]:
+                    matches.intersection_update(prefix_index.search(token))
+                matches.difference_update(hpo_ids)
+                hpo_ids.extend(sorted(matches, key=lambda hpo_id:
+                                      (len(terms[hpo_id].get('description') or ''), hpo_id)))
+
+        if limit:
+            hpo_ids = hpo_ids[:limit]
+        return [dict(terms[hpo_id]) for hpo_id in hpo_ids]
 
     def disease_term(self, disease_identifier):
         """Return a disease term
@@ -83,6 +160,23 @@ class HpoHandler(object):
 
         return self.disease_term_collection.find_one(query)
 
+    def disease_terms_by_ids(self, disease_ids):
+        """Fetch many disease terms with one query
+
+        Args:
+            disease_ids(iterable(str)): _id for disease terms, like OMIM:600233
+
+        Returns:
+            disease_objs(list(dict)): The terms in the same order as disease_ids,
+                                      None if a term is missing
+        """
+        disease_ids = list(disease_ids)
+        if not disease_ids:
+            return []
+        res = self.disease_term_collection.find({'_id': {'$in': disease_ids}})
+        disease_objs = {disease_obj['_id']: disease_obj for disease_obj in res}
+        return [disease_objs.get(disease_id) for disease_id in disease_ids]
+
     def disease_terms(self, hgnc_id=None):
         """Return all disease terms that overlaps a gene
 
@@ -103,6 +197,27 @@ class HpoHandler(object):
 
         return list(self.disease_term_collection.find(query))
 
+    def disease_terms_by_genes(self, hgnc_ids):
+        """Fetch the disease terms for many genes with one query
+
+        Args:
+            hgnc_ids(iterable(int))
+
+        Returns:
+            disease_terms(dict): {<hgnc_id>: list(dict)} with an empty list for
+                                 genes without diseases
+        """
+        hgnc_ids = set(hgnc_ids)
+        disease_terms = {hgnc_id: [] for hgnc_id in hgnc_ids}
+        if not hgnc_ids:
+            return disease_terms
+        query = {'genes': {'$in': list(hgnc_ids)}}
+        for disease_obj in self.disease_term_collection.find(query):
+            for hgnc_id in set(disease_obj.get('genes', [])):
+                if hgnc_id in disease_terms:
+                    disease_terms[hgnc_id].append(disease_obj)
+        return disease_terms
+
     def load_disease_term(self, disease_obj):
         """Load a disease term into the database
 
@@ -114,9 +229,129 @@ class HpoHandler(object):
             self.disease_term_collection.insert_one(disease_obj)
         except DuplicateKeyError as err:
             raise IntegrityError("Disease term %s already exists in database".format(disease_obj['_id']))
+        self.hpo_cache.invalidate()
 
         log.debug("Disease term saved")
 
+    def load_disease_bulk(self, disease_objs):
+        """Add many disease terms to the database in unordered batches
+
+        Terms that are not already in the database are inserted even if
+        some are.
+
+        Args:
+            disease_objs(iterable(dict))
+
+        Returns:
+            nr_inserted(int)
+
+        Raises:
+            IntegrityError: If any of the terms already exist
+        """
+        nr_inserted, duplicate_ids = self._bulk_insert(self.disease_term_collection, disease_objs)
+        self.hpo_cache.invalidate()
+        if duplicate_ids:
+            raise IntegrityError("Disease terms {0} already exist in database".format(
+                ', '.join(duplicate_ids)))
+        return nr_inserted
+
+    def disease_phenotype_index(self):
+        """Return a sparse disease by hpo term matrix
+
+        Terms are weighted by their information content, -log of the fraction
+        of diseases annotated with the term, so that rare phenotypes count
+        more than common ones. The index is built with one query on first use
+        and kept in self.hpo_cache.
+
+        Returns:
+            index(dict): {
+                'term_diseases': {<hpo_id>: [<disease_id>, ...]},
+                'weights': {<hpo_id>: <information content>(float)},
+                'norms': {<disease_id>: <length of the weighted term vector>(float)},
+            }
+        """
+        key = 'disease_phenotype_index'
+        index = self.hpo_cache.get(key)
+        if index is None:
+            log.info("Building disease phenotype index")
+            term_diseases = {}
+            disease_terms = {}
+            res = self.disease_term_collection.find({'hpo_terms.0': {'$exists': True}},
+                                                    {'hpo_terms': 1})
+            for disease_obj in res:
+                disease_terms[disease_obj['_id']] = set(disease_obj['hpo_terms'])
+                for hpo_id in disease_terms[disease_obj['_id']]:
+                    term_diseases.setdefault(hpo_id, []).append(disease_obj['_id'])
+
+            nr_diseases = len(disease_terms)
+            weights = {hpo_id: math.log(nr_diseases / len(disease_ids))
+                       for hpo_id, disease_ids in term_diseases.items()}
+            norms = {disease_id: math.sqrt(sum(weights[hpo_id] ** 2 for hpo_id in hpo_ids))
+                     for disease_id, hpo_ids in disease_terms.items()}
+            index = {
+                'term_diseases': term_diseases,
+                'weights': weights,
+                'norms': norms,
+            }
+            self.hpo_cache.set(key, index)
+        return index
+
+    def rank_diseases(self, hpo_ids, limit=None):
+        """Rank the disease terms on how well they match a set of hpo terms
+
+        The score is the cosine similarity between the weighted term vectors
+        of the query and each disease. Only diseases that share at least one
+        term with a weight above zero with the query are returned.
+
+        Args:
+            hpo_ids(iterable(str))
+            limit(int): Maximum number of diseases to return
+
+        Returns:
+            ranked_diseases(list(tuple)): [(<disease_id>, <score>(float)), ...]
+                                          with the best match first
+        """
+        index = self.disease_phenotype_index()
+        weights = index['weights']
+        hpo_ids = set(hpo_id for hpo_id in hpo_ids if hpo_id in weights)
+        query_norm = math.sqrt(sum(weights[hpo_id] ** 2 for hpo_id in hpo_ids))
+
+        scores = Counter()
+        for hpo_id in hpo_ids:
+            for disease_id in index['term_diseases'][hpo_id]:
+                scores[disease_id] += weights[hpo_id] ** 2
+
+        ranked_diseases = []
+        for disease_id, dot_product in scores.items():
+            norm = query_norm * index['norms'][disease_id]
+            # Terms annotated to every disease have zero weight and match nothing
+            if not (dot_product and norm):
+                continue
+            ranked_diseases.append((disease_id, dot_product / norm))
+
+        ranked_diseases.sort(key=lambda item: (-item[1], item[0]))
+        if limit:
+            ranked_diseases = ranked_diseases[:limit]
+        return ranked_diseases
+
+    def hpo_genes_index(self):
+        """Return the genes of all hpo terms
+
+        The index is built with one query on first use and kept in
+        self.hpo_cache.
+
+        Returns:
+            hpo_genes(dict): {<hpo_id>: <hgnc_ids>(list(int))}
+        """
+        key = 'hpo_genes_index'
+        hpo_genes = self.hpo_cache.get(key)
+        if hpo_genes is None:
+            log.info("Building hpo gene index")
+            res = self.hpo_term_collection.find({}, {'genes': 1})
+            hpo_genes = {term['_id']: term.get('genes', []) for term in res}
+            self.hpo_cache.set(key, hpo_genes)
+        return hpo_genes
+
     def generate_hpo_gene_list(self, *hpo_terms):
         """Generate a sorted list with namedtuples of hpogenes
 
@@ -128,15 +363,11 @@ class HpoHandler(object):
             Returns:
                 hpo_genes(list(HpoGene))
         """
-        genes = {}
+        hpo_genes = self.hpo_genes_index()
+        genes = Counter()
         for term in hpo_terms:
-            hpo_obj = self.hpo_term(term)
-            if hpo_obj:
-                for hgnc_id in hpo_obj['genes']:
-                    if hgnc_id in genes:
-                        genes[hgnc_id] += 1
-                    else:
-                        genes[hgnc_id] = 1
+            if term in hpo_genes:
+                genes.update(hpo_genes[term])
             else:
                 log.warning("Term %s could not be found", term)
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+from contextlib import contextmanager
 
 log = logging.getLogger(__name__)
 
@@ -7,6 +8,12 @@ from scout.constants import INDEXES
 
 class IndexHandler(object):
 
+    """Handle the indexes of the collections
+
+    The indexes are defined in scout.constants.INDEXES where the keys are the
+    names of the collection attributes of the adapter, e.g. 'hgnc_collection'.
+    """
+
     def indexes(self, collection=None):
         """Return a list with the current indexes
         
@@ -29,24 +36,67 @@ class IndexHandler(object):
                     indexes.append(index_name)
         return indexes
 
-    def load_indexes(self):
-        """Add a hpo object
+    def _index_collections(self, collections=None):
+        """Return the collections with indexes and their index definitions
 
-        Arguments:
-            hpo_obj(dict)
+        Args:
+            collections(iterable(str)): Keys of INDEXES, None for all
 
+        Returns:
+            index_collections(list(tuple)): [(<pymongo.Collection>, list(IndexModel))]
         """
-        for collection_name in INDEXES:
-            existing_indexes = self.indexes(collection_name)
-            indexes = INDEXES[collection_name]
+        return [(getattr(self, key), INDEXES[key]) for key in INDEXES
+                if collections is None or key in collections]
+
+    def load_indexes(self, collections=None):
+        """Create the indexes in INDEXES
+
+        Indexes that already exist are dropped and created again.
+
+        Args:
+            collections(iterable(str)): Keys of INDEXES, None for all
+        """
+        for collection, indexes in self._index_collections(collections):
+            existing_indexes = self.indexes(collection.name)
             for index in indexes:
                 index_name = index.document.get('name')
                 if index_name in existing_indexes:
                     log.info("Deleting old index: %s" % index_name)
-                    self.db[collection_name].drop_index(index_name)
+                    collection.drop_index(index_name)
             log.info("creating indexes: %s" % ', '.join([
                 index.document.get('name') for index in indexes
             ]))
-            self.db[collection_name].create_indexes(indexes)
-        
+            collection.create_indexes(indexes)
+
+    def drop_indexes(self, collections=None):
+        """Drop the indexes in INDEXES that exist
 
+        Args:
+            collections(iterable(str)): Keys of INDEXES, None for all
+        """
+        for collection, indexes in self._index_collections(collections):
+            existing_indexes = self.indexes(collection.name)
+            for index in indexes:
+                index_name = index.document.get('name')
+                if index_name in existing_indexes:
+                    log.info("Deleting index: %s" % index_name)
+                    collection.drop_index(index_name)
+
+    @contextmanager
+    def deferred_indexes(self, collections=None):
+        """Drop indexes while loading data and build them once afterwards
+
+        Building an index over loaded documents is much faster than keeping
+        it up to date during a large bulk load. Queries that need the indexes
+        are slow until the load is done.
+
+        Args:
+            collections(iterable(str)): Keys of INDEXES, None for all
+        """
+        log.info("Deferring indexes until the load is done")
+        self.drop_indexes(collections)
+        try:
+            yield
+        finally:
+            log.info("Building deferred indexes")
+            self.load_indexes(collections)
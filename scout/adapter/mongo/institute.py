@@ -74,16 +74,50 @@ class InstituteHandler(object):
                 Institute object
         """
         logger.debug("Fetch institute {}".format(institute_id))
-        institute_obj = self.institute_collection.find_one({
-            '_id': institute_id
-        })
+        institute_obj = self._request_cached(
+            ('institute', institute_id),
+            lambda: self.institute_collection.find_one({'_id': institute_id})
+        )
         if institute_obj is None:
             logger.debug("Could not find institute {0}".format(institute_id))
         
         return institute_obj
 
+    def institutes_by_ids(self, institute_ids, projection=None):
+        """Fetch many institutes with one query
+
+            Args:
+                institute_ids(iterable(str))
+                projection(list(str)): Only return these fields
+
+            Returns:
+                institute_objs(list(dict)): The institutes in the same order as
+                                            institute_ids, None if missing
+        """
+        institute_ids = list(institute_ids)
+        if not institute_ids:
+            return []
+        res = self.institute_collection.find({'_id': {'$in': institute_ids}}, projection)
+        institute_objs = {institute_obj['_id']: institute_obj for institute_obj in res}
+        return [institute_objs.get(institute_id) for institute_id in institute_ids]
+
     def institutes(self):
         """Fetch all institutes."""
         logger.info("Fetching all institutes")
         return self.institute_collection.find()
 
+    def institute_names(self, exclude_ids=None):
+        """Fetch the id and display name of all institutes
+
+            Args:
+                exclude_ids(iterable(str)): Institutes to leave out
+
+            Returns:
+                institute_names(list(tuple)): [(<institute_id>, <display_name>)]
+        """
+        query = {}
+        if exclude_ids:
+            query['_id'] = {'$nin': list(exclude_ids)}
+        res = self.institute_collection.find(query, ['display_name'])
+        return [(institute_obj['_id'], institute_obj['display_name']) for institute_obj in res]
+
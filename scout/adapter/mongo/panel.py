@@ -1,4 +1,6 @@
 import logging
+import re
+from collections import OrderedDict
 
 from pprint import pprint as pp
 from copy import deepcopy
@@ -6,6 +8,7 @@ import datetime as dt
 
 import pymongo
 from bson import ObjectId
+from pymongo import UpdateOne
 
 from scout.parse.panel import parse_gene_panel
 from scout.build import build_panel
@@ -14,9 +17,62 @@ from scout.exceptions import IntegrityError
 
 logger = logging.getLogger(__name__)
 
+# Matches the version of a transcript, like the '.2' in NM_000059.2
+TX_VERSION_PATTERN = re.compile(r'\.[0-9]')
+
+
+def genes_delta(genes, base_genes):
+    """Return the changes that turn the genes of one panel version into another
+
+    Args:
+        genes(list(dict)): The genes of the version to store
+        base_genes(list(dict)): The genes of the version the changes are based on
+
+    Returns:
+        delta(dict): {'removed': list(int), 'genes': list(dict)} where removed
+                     are the hgnc ids that are not in genes and genes are the
+                     genes that are new or different. None if a gene is
+                     listed twice in one of the versions.
+    """
+    genes_by_id = OrderedDict((gene['hgnc_id'], gene) for gene in genes)
+    base_by_id = OrderedDict((gene['hgnc_id'], gene) for gene in base_genes)
+    if len(genes_by_id) != len(genes) or len(base_by_id) != len(base_genes):
+        return None
+    return {
+        'removed': [hgnc_id for hgnc_id in base_by_id if hgnc_id not in genes_by_id],
+        'genes': [gene for hgnc_id, gene in genes_by_id.items() if base_by_id.get(hgnc_id) != gene],
+    }
+
+
+def apply_genes_delta(base_genes, delta):
+    """Rebuild the genes of a panel version from the version it is based on
+
+    Args:
+        base_genes(list(dict))
+        delta(dict): As returned by genes_delta
+
+    Returns:
+        genes(list(dict))
+    """
+    genes = OrderedDict((gene['hgnc_id'], gene) for gene in base_genes)
+    for hgnc_id in delta['removed']:
+        genes.pop(hgnc_id, None)
+    for gene in delta['genes']:
+        genes[gene['hgnc_id']] = gene
+    return list(genes.values())
+
 
 class PanelHandler(object):
 
+    """Handle gene panels
+
+    The latest version of a panel stores all of its genes. When a new version
+    is created with apply_pending the archived version only keeps the
+    differences to the new version in 'genes_delta'. Panels fetched with
+    panel and gene_panel always have their genes, use expand_panel for
+    panels read in other ways.
+    """
+
     def load_panel(self, path, institute, panel_id, date, panel_type='clinical', version=1.0, 
                    display_name=None):
         """Load a gene panel based on the info sent
@@ -70,9 +126,9 @@ class PanelHandler(object):
         if self.gene_panel(panel_name, panel_version):
             raise IntegrityError("Panel {0} with version {1} already"
                                  " exist in database".format(panel_name, panel_version))
-        logger.debug("Panel saved")
-
         self.panel_collection.insert_one(panel_obj)
+        self._index_panel_genes(panel_obj)
+        logger.debug("Panel saved")
 
     def panel(self, panel_id):
         """Fetch a gene panel by '_id'.
@@ -85,9 +141,60 @@ class PanelHandler(object):
         """
         if not isinstance(panel_id, ObjectId):
             panel_id = ObjectId(panel_id)
-        panel_obj = self.panel_collection.find_one({'_id': panel_id})
+        panel_obj = self._request_cached(
+            ('panel', panel_id),
+            lambda: self.expand_panel(self.panel_collection.find_one({'_id': panel_id}))
+        )
         return panel_obj
 
+    def panel_gene_index(self, panel_obj):
+        """Return the gene information of a panel grouped on hgnc id
+
+        The index is cached in self.panel_cache per panel version. Since a
+        panel can be replaced with the same version the date of the panel is
+        part of the key.
+
+        Args:
+            panel_obj(dict)
+
+        Returns:
+            gene_index(dict): {<hgnc_id>: {
+                                'disease_associated_transcripts': set(str),
+                                'disease_associated_no_version': set(str),
+                                'reduced_penetrance': bool,
+                                'mosaicism': bool,
+                                'inheritance_models': set(str),
+                              }}
+        """
+        key = (panel_obj.get('_id'), panel_obj.get('version'), panel_obj.get('date'))
+        gene_index = None
+        if key[0] is not None:
+            gene_index = self.panel_cache.get(key)
+        if gene_index is not None:
+            return gene_index
+
+        gene_index = {}
+        for gene_info in panel_obj.get('genes', []):
+            gene_entry = gene_index.setdefault(gene_info['hgnc_id'], {
+                'disease_associated_transcripts': set(),
+                'disease_associated_no_version': set(),
+                'reduced_penetrance': False,
+                'mosaicism': False,
+                'inheritance_models': set(),
+            })
+            for tx in gene_info.get('disease_associated_transcripts', []):
+                gene_entry['disease_associated_transcripts'].add(tx)
+                gene_entry['disease_associated_no_version'].add(TX_VERSION_PATTERN.sub('', tx))
+            if gene_info.get('reduced_penetrance'):
+                gene_entry['reduced_penetrance'] = True
+            if gene_info.get('mosaicism'):
+                gene_entry['mosaicism'] = True
+            gene_entry['inheritance_models'].update(gene_info.get('inheritance_models', []))
+
+        if key[0] is not None:
+            self.panel_cache.set(key, gene_index)
+        return gene_index
+
     def delete_panel(self, panel_obj):
         """Delete a panel by '_id'.
 
@@ -97,7 +204,12 @@ class PanelHandler(object):
         Returns:
             res(pymongo.DeleteResult)
         """
+        panel_obj = self.expand_panel(panel_obj)
+        # Versions that are stored as changes to this one need their genes back
+        self._materialise_dependents(panel_obj['_id'])
         res = self.panel_collection.delete_one({'_id': panel_obj['_id']})
+        self._unindex_panel_genes(panel_obj)
+        self.panel_cache.invalidate(lambda key: key[0] == panel_obj['_id'])
         logger.warning("Deleting panel %s, version %s" % (panel_obj['panel_name'], panel_obj['version']))
         return res
 
@@ -119,26 +231,29 @@ class PanelHandler(object):
                 panel_id, version
             ))
             query['version'] = version
-            return self.panel_collection.find_one(query)
+            return self.expand_panel(self.panel_collection.find_one(query))
         else:
             logger.info("Fething gene panels %s from database", panel_id)
-            res = self.panel_collection.find(query).sort('version', -1)
-            if res.count() > 0:
-                return res[0]
-            else:
+            panel_obj = self.panel_collection.find_one(query, sort=[('version', pymongo.DESCENDING)])
+            if panel_obj is None:
                 logger.info("No gene panel found")
-                return None
+            return self.expand_panel(panel_obj)
 
     def gene_panels(self, panel_id=None, institute_id=None, version=None):
         """Return all gene panels
 
-        If panel_id return all versions of that panel
+        If panel_id return all versions of that panel. The documents are not
+        expanded: archived versions may only have 'genes_delta', the changes
+        to the next version, and no 'genes'. Use expand_panel on the panels
+        when their genes are needed.
 
         Args:
             panel_id(str)
+            institute_id(str)
+            version(float)
 
         Returns:
-            cursor(pymongo.cursor)
+            cursor(pymongo.cursor): Unexpanded panel documents
         """
         query = {}
         if panel_id:
@@ -150,32 +265,141 @@ class PanelHandler(object):
 
         return self.panel_collection.find(query)
 
+    def expand_panel(self, panel_obj):
+        """Return a panel version with all of its genes
+
+        Versions that are stored as changes are rebuilt from the chain of
+        newer versions they are based on.
+
+        Args:
+            panel_obj(dict): A panel document from the database
+
+        Returns:
+            panel_obj(dict): The panel with genes and without genes_delta
+        """
+        if panel_obj is None or 'genes_delta' not in panel_obj:
+            return panel_obj
+
+        newer_versions = {version_obj['_id']: version_obj for version_obj in
+                          self.panel_collection.find({
+                              'panel_name': panel_obj['panel_name'],
+                              'version': {'$gt': panel_obj['version']},
+                          })}
+        chain = [panel_obj]
+        while 'genes_delta' in chain[-1]:
+            base_id = chain[-1]['genes_delta']['base_id']
+            base_obj = (newer_versions.get(base_id) or
+                        self.panel_collection.find_one({'_id': base_id}))
+            if base_obj is None:
+                raise IntegrityError("Panel {0} version {1} is based on a missing version".format(
+                    chain[-1]['panel_name'], chain[-1]['version']))
+            chain.append(base_obj)
+
+        genes = chain[-1]['genes']
+        for version_obj in reversed(chain[:-1]):
+            genes = apply_genes_delta(genes, version_obj['genes_delta'])
+
+        expanded_panel = dict(panel_obj)
+        expanded_panel.pop('genes_delta')
+        expanded_panel['genes'] = genes
+        return expanded_panel
+
+    def _materialise_dependents(self, panel_id):
+        """Store all genes for the versions that are changes to a panel version
+
+        Args:
+            panel_id(ObjectId): _id of the panel version
+        """
+        for version_obj in self.panel_collection.find({'genes_delta.base_id': panel_id}):
+            logger.info("Storing all genes for panel %s version %s",
+                        version_obj['panel_name'], version_obj['version'])
+            self.panel_collection.replace_one({'_id': version_obj['_id']},
+                                              self.expand_panel(version_obj))
+
+    @staticmethod
+    def _panel_entry(panel_obj):
+        """Return how a panel is referred to in the gene to panel index"""
+        return {'panel_name': panel_obj['panel_name'], 'version': panel_obj['version']}
+
+    def _index_panel_genes(self, panel_obj):
+        """Add a panel to the gene to panel index for all of its genes
+
+        Args:
+            panel_obj(dict)
+        """
+        entry = self._panel_entry(panel_obj)
+        requests = [UpdateOne({'_id': hgnc_id}, {'$addToSet': {'panels': entry}}, upsert=True)
+                    for hgnc_id in set(gene['hgnc_id'] for gene in panel_obj.get('genes', []))]
+        if requests:
+            self.gene_to_panel_collection.bulk_write(requests, ordered=False)
+
+    def _unindex_panel_genes(self, panel_obj):
+        """Remove a panel from the gene to panel index
+
+        Args:
+            panel_obj(dict)
+        """
+        hgnc_ids = list(set(gene['hgnc_id'] for gene in panel_obj.get('genes', [])))
+        if not hgnc_ids:
+            return
+        self.gene_to_panel_collection.update_many(
+            {'_id': {'$in': hgnc_ids}},
+            {'$pull': {'panels': self._panel_entry(panel_obj)}}
+        )
+        self.gene_to_panel_collection.delete_many({'_id': {'$in': hgnc_ids}, 'panels': []})
+
+    def build_gene_to_panels(self):
+        """Rebuild the gene to panel index from all gene panels
+
+        The index is kept up to date when panels are changed through the
+        adapter, this is only needed for databases where the panels were
+        loaded some other way.
+        """
+        logger.info("Building gene to panels index")
+        self.gene_to_panel_collection.delete_many({})
+        for panel_obj in self.panel_collection.find():
+            self._index_panel_genes(self.expand_panel(panel_obj))
+        logger.info("Gene to panels index done")
+
+    def panels_by_gene(self, hgnc_id):
+        """Return the panels that contain a gene
+
+        Args:
+            hgnc_id(int)
+
+        Returns:
+            panels(list(dict)): [{'panel_name': str, 'version': float}]
+        """
+        gene_obj = self.gene_to_panel_collection.find_one({'_id': hgnc_id})
+        if not gene_obj:
+            return []
+        return gene_obj['panels']
+
     def gene_to_panels(self):
-        """Fetch all gene panels and group them by gene
+        """Fetch the panel names for all genes in gene panels
+
+            The result is read from the gene to panel index, which is built
+            the first time if there are panels but no index.
 
-            Args:
-                adapter(MongoAdapter)
             Returns:
                 gene_dict(dict): A dictionary with gene as keys and a set of
                                  panel names as value
         """
-        logger.info("Building gene to panels")
+        if (self.gene_to_panel_collection.find_one() is None and
+                self.panel_collection.find_one() is not None):
+            self.build_gene_to_panels()
+
         gene_dict = {}
-        for panel in self.gene_panels():
-            for gene in panel['genes']:
-                hgnc_id = gene['hgnc_id']
-                if hgnc_id in gene_dict:
-                    gene_dict[hgnc_id].add(panel['panel_name'])
-                else:
-                    gene_dict[hgnc_id] = set([panel['panel_name']])
-        logger.info("Gene to panels done")
+        for gene_obj in self.gene_to_panel_collection.find():
+            gene_dict[gene_obj['_id']] = set(entry['panel_name'] for entry in gene_obj['panels'])
 
         return gene_dict
 
     def update_panel(self, panel_obj):
         """Replace a existing gene panel with a new one
 
-        Keeps the object id
+        Keeps the object id. Older versions that are stored as changes to
+        this one get all their genes back if the genes are changed.
 
         Args:
             panel_obj(dict)
@@ -184,47 +408,78 @@ class PanelHandler(object):
             updated_panel(dict)
         """
         logger.info("Updating panel %s", panel_obj['panel_name'])
+        old_panel = self.expand_panel(self.panel_collection.find_one({'_id': panel_obj['_id']}))
+        if old_panel is None:
+            return None
+        if 'genes' in panel_obj and panel_obj['genes'] != old_panel['genes']:
+            self._materialise_dependents(panel_obj['_id'])
+
         # update date of panel to "today"
         panel_obj['date'] = dt.datetime.now()
-        updated_panel = self.panel_collection.find_one_and_replace(
-            {'_id': panel_obj['_id']},
-            panel_obj,
-            return_document=pymongo.ReturnDocument.AFTER
-        )
+        self.panel_collection.replace_one({'_id': panel_obj['_id']}, panel_obj)
+        self._unindex_panel_genes(old_panel)
+        self._index_panel_genes(self.expand_panel(panel_obj))
+        updated_panel = panel_obj
 
         return updated_panel
 
-    def add_pending(self, panel_obj, hgnc_gene, action, info=None):
-        """Add a pending action to a gene panel
-
-        Store the pending actions in panel.pending
+    @staticmethod
+    def _pending_action(hgnc_gene, action, info=None):
+        """Build a pending action for a gene
 
         Args:
-            panel_obj(dict): The panel that is about to be updated
             hgnc_gene(dict)
             action(str): choices=['add','delete','edit']
+            info(dict)
 
         Returns:
-            updated_panel(dict):
-
+            pending_action(dict)
         """
         valid_actions = ['add', 'delete', 'edit']
         if action not in valid_actions:
             raise ValueError("Invalid action {0}".format(action))
 
-        info = info or {}
-        pending_action = {
+        return {
             'hgnc_id': hgnc_gene['hgnc_id'],
             'action': action,
-            'info': info,
+            'info': info or {},
             'symbol': hgnc_gene['hgnc_symbol'],
         }
 
+    def add_pending(self, panel_obj, hgnc_gene, action, info=None):
+        """Add a pending action to a gene panel
+
+        Store the pending actions in panel.pending
+
+        Args:
+            panel_obj(dict): The panel that is about to be updated
+            hgnc_gene(dict)
+            action(str): choices=['add','delete','edit']
+
+        Returns:
+            updated_panel(dict):
+
+        """
+        return self.add_pending_actions(panel_obj, [(hgnc_gene, action, info)])
+
+    def add_pending_actions(self, panel_obj, actions):
+        """Add many pending actions to a gene panel with one update
+
+        Args:
+            panel_obj(dict): The panel that is about to be updated
+            actions(iterable(tuple)): (<hgnc_gene>(dict), <action>(str), <info>(dict))
+
+        Returns:
+            updated_panel(dict):
+        """
+        pending_actions = [self._pending_action(hgnc_gene, action, info) for
+                           hgnc_gene, action, info in actions]
+
         updated_panel = self.panel_collection.find_one_and_update(
             {'_id': panel_obj['_id']},
             {
                 '$push': {
-                    'pending': pending_action
+                    'pending': {'$each': pending_actions}
                 }
             },
             return_document=pymongo.ReturnDocument.AFTER
@@ -235,6 +490,9 @@ class PanelHandler(object):
     def apply_pending(self, panel_obj):
         """Apply the pending changes to an existing gene panel
 
+        The new version stores all genes and the old version is archived with
+        only the changes to the new version.
+
         Args:
             panel_obj(dict): panel in database to update
 
@@ -274,7 +532,8 @@ class PanelHandler(object):
             else:
                 updates[hgnc_id] = update
 
-        for gene in panel_obj['genes']:
+        # Edit copies of the genes so that the old version is kept as it was
+        for gene in deepcopy(panel_obj['genes']):
             hgnc_id = gene['hgnc_id']
 
             if hgnc_id in updates:
@@ -304,25 +563,35 @@ class PanelHandler(object):
         new_panel['version'] = panel_obj['version'] + 1
 
         self.panel_collection.insert_one(new_panel)
+        self._index_panel_genes(new_panel)
 
         # archive the old panel
-        panel_obj['is_archived'] = True
-        self.update_panel(panel_obj)
+        archived_panel = dict(panel_obj)
+        archived_panel['is_archived'] = True
+        delta = genes_delta(panel_obj['genes'], new_genes)
+        if delta is not None:
+            archived_panel.pop('genes')
+            delta['base_id'] = new_panel['_id']
+            delta['base_version'] = new_panel['version']
+            archived_panel['genes_delta'] = delta
+        self.update_panel(archived_panel)
         return new_panel
 
     def latest_panels(self, institute_id):
         """Return the latest version of each panel."""
-        panel_names = self.gene_panels(institute_id=institute_id).distinct('panel_name')
-        for panel_name in panel_names:
-            panel_obj = self.gene_panel(panel_name)
-            yield panel_obj
+        res = self.panel_collection.aggregate([
+            {'$match': {'institute': institute_id}},
+            {'$sort': {'version': pymongo.DESCENDING}},
+            {'$group': {'_id': '$panel_name', 'panel': {'$first': '$$ROOT'}}},
+            {'$sort': {'_id': pymongo.ASCENDING}},
+        ])
+        for item in res:
+            yield self.expand_panel(item['panel'])
 
     def clinical_symbols(self, case_obj):
         """Return all the clinical gene symbols for a case."""
         panel_ids = [panel['panel_id'] for panel in case_obj['panels']]
-        query = self.panel_collection.aggregate([
-            {'$match': {'_id': {'$in': panel_ids}}},
-            {'$unwind': '$genes'},
-            {'$group': {'_id': '$genes.symbol'}}
-        ])
-        return set(item['_id'] for item in query)
+        symbols = set()
+        for panel_obj in self.panel_collection.find({'_id': {'$in': panel_ids}}):
+            symbols.update(gene['symbol'] for gene in self.expand_panel(panel_obj)['genes'])
+        return symbols
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+def stats_key(variant_type, category):
+    """Return the key that holds the statistics for a group of variants
+
+    Args:
+        variant_type(str): 'clinical' or 'research'
+        category(str): 'snv', 'sv' or 'cancer'
+
+    Returns:
+        key(str): e.g. 'clinical_snv'
+    """
+    return "{0}_{1}".format(variant_type, category)
+
+
+def new_variant_stats():
+    """Return an empty statistics entry for a group of variants
+
+    The keys in the nested dictionaries are strings since they will be
+    stored as field names in mongodb.
+
+    Returns:
+        stats(dict): {
+            'variants': <total number of variants>(int),
+            'clinsig': {<clnsig value>(str): <count>(int)},
+            'genes': {<hgnc_id>(str): <count>(int)},
+            'rank_scores': {<rank score rounded down>(str): <count>(int)},
+        }
+    """
+    return {
+        'variants': 0,
+        'clinsig': {},
+        'genes': {},
+        'rank_scores': {},
+    }
+
+
+def add_variant_stats(stats, variant_obj):
+    """Count a variant in a statistics entry
+
+    Args:
+        stats(dict): An entry from new_variant_stats
+        variant_obj(dict): A variant as it is stored in the database
+    """
+    stats['variants'] += 1
+
+    for clnsig_obj in variant_obj.get('clnsig', []):
+        clnsig = str(clnsig_obj['value'])
+        stats['clinsig'][clnsig] = stats['clinsig'].get(clnsig, 0) + 1
+
+    for hgnc_id in variant_obj.get('hgnc_ids', []):
+        hgnc_id = str(hgnc_id)
+        stats['genes'][hgnc_id] = stats['genes'].get(hgnc_id, 0) + 1
+
+    rank_score = variant_obj.get('rank_score')
+    if rank_score is not None:
+        rank_bin = str(int(rank_score // 1))
+        stats['rank_scores'][rank_bin] = stats['rank_scores'].get(rank_bin, 0) + 1
+
+
+def nr_variants_above(stats, rank_threshold):
+    """Count the variants with a rank score of at least rank_threshold
+
+    The rank scores are stored rounded down so the threshold is rounded
+    down in the same way.
+
+    Args:
+        stats(dict): A statistics entry for a group of variants
+        rank_threshold(float)
+
+    Returns:
+        nr_variants(int)
+    """
+    rank_threshold = int(rank_threshold // 1)
+    return sum(count for rank_bin, count in stats.get('rank_scores', {}).items()
+               if int(rank_bin) >= rank_threshold)
+
+
+class StatsHandler(object):
+
+    """Materialised per case statistics over the variant collection"""
+
+    def update_variant_stats(self, case_id, variant_type, category, stats):
+        """Add counts to the statistics of a case
+
+        The counts are incremented so that variants loaded in several passes,
+        e.g. the variants of a gene, are added to what is already there.
+
+        Args:
+            case_id(str)
+            variant_type(str): 'clinical' or 'research'
+            category(str): 'snv', 'sv' or 'cancer'
+            stats(dict): An entry from new_variant_stats
+
+        Returns:
+            result(pymongo.results.UpdateResult)
+        """
+        key = stats_key(variant_type, category)
+        increments = {"{0}.variants".format(key): stats['variants']}
+        for field in ('clinsig', 'genes', 'rank_scores'):
+            for value, count in stats[field].items():
+                increments["{0}.{1}.{2}".format(key, field, value)] = count
+
+        log.debug("Updating variant stats for case %s, %s", case_id, key)
+        return self.variant_stats_collection.update_one(
+            {'_id': case_id},
+            {
+                '$inc': increments,
+                '$set': {'updated_at': datetime.now()},
+            },
+            upsert=True
+        )
+
+    def delete_variant_stats(self, case_id, variant_type=None, category=None):
+        """Remove statistics for a case
+
+        If no variant_type is given all statistics for the case are removed.
+        If no category is given the statistics for all categories of the
+        variant type are removed.
+
+        Args:
+            case_id(str)
+            variant_type(str): 'clinical' or 'research'
+            category(str): 'snv', 'sv' or 'cancer'
+        """
+        if not variant_type:
+            log.debug("Deleting all variant stats for case %s", case_id)
+            self.variant_stats_collection.delete_one({'_id': case_id})
+            return
+
+        categories = [category] if category else ['snv', 'sv', 'cancer']
+        keys = {stats_key(variant_type, cat): '' for cat in categories}
+        log.debug("Deleting variant stats %s for case %s", ', '.join(keys), case_id)
+        self.variant_stats_collection.update_one(
+            {'_id': case_id},
+            {
+                '$unset': keys,
+                '$set': {'updated_at': datetime.now()},
+            }
+        )
+
+    def move_variant_stats(self, case_id, new_case_id):
+        """Store the statistics of a case under a new case id
+
+        Args:
+            case_id(str)
+            new_case_id(str)
+        """
+        stats_obj = self.variant_stats_collection.find_one({'_id': case_id})
+        if stats_obj is None:
+            return
+        log.debug("Moving variant stats from case %s to %s", case_id, new_case_id)
+        stats_obj['_id'] = new_case_id
+        self.variant_stats_collection.find_one_and_replace(
+            {'_id': new_case_id},
+            stats_obj,
+            upsert=True
+        )
+        self.variant_stats_collection.delete_one({'_id': case_id})
+
+    def compute_variant_stats(self, case_id):
+        """Rebuild the statistics of a case from its variants
+
+        This is used for cases loaded before the statistics were kept and if
+        the statistics for some reason is out of sync with the variants.
+
+        Args:
+            case_id(str)
+
+        Returns:
+            stats_obj(dict): The new statistics document
+        """
+        log.info("Computing variant stats for case %s", case_id)
+        stats_obj = {'_id': case_id}
+        variants = self.variant_collection.find(
+            {'case_id': case_id},
+            {'variant_type': 1, 'category': 1, 'clnsig': 1, 'hgnc_ids': 1, 'rank_score': 1}
+        )
+        for variant_obj in variants:
+            key = stats_key(variant_obj['variant_type'], variant_obj['category'])
+            if key not in stats_obj:
+                stats_obj[key] = new_variant_stats()
+            add_variant_stats(stats_obj[key], variant_obj)
+
+        stats_obj['updated_at'] = datetime.now()
+        self.variant_stats_collection.find_one_and_replace(
+            {'_id': case_id},
+            stats_obj,
+            upsert=True
+        )
+        return stats_obj
+
+    def variant_stats(self, case_id):
+        """Return the statistics document for a case
+
+        Args:
+            case_id(str)
+
+        Returns:
+            stats_obj(dict): {
+                '_id': <case_id>,
+                <variant_type>_<category>: <stats>(dict),
+                'updated_at': datetime,
+            }
+            or None if no statistics exists for the case
+        """
+        return self.variant_stats_collection.find_one({'_id': case_id})
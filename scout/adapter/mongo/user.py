@@ -80,10 +80,30 @@ class UserHandler(object):
                 user_obj(dict)
         """
         log.info("Fetching user %s", email)
-        user_obj = self.user_collection.find_one({'_id': email})
+        user_obj = self._request_cached(
+            ('user', email),
+            lambda: self.user_collection.find_one({'_id': email})
+        )
 
         return user_obj
     
+    def users_by_ids(self, emails):
+        """Fetch many users with one query.
+
+            Args:
+                emails(iterable(str))
+
+            Returns:
+                user_objs(list(dict)): The users in the same order as emails,
+                                       None if a user is missing
+        """
+        emails = list(emails)
+        if not emails:
+            return []
+        res = self.user_collection.find({'_id': {'$in': emails}})
+        user_objs = {user_obj['_id']: user_obj for user_obj in res}
+        return [user_objs.get(email) for email in emails]
+
     def delete_user(self, email):
         """Delete a user from the database
         
@@ -22,6 +22,9 @@ from scout.parse.variant import parse_variant
 from scout.build import build_variant
 
 from scout.utils.par import is_par
+from scout.utils.overlap import overlapping_pairs
+
+from .stats import (new_variant_stats, add_variant_stats)
 
 from pymongo.errors import DuplicateKeyError
 from scout.exceptions import IntegrityError
@@ -29,6 +32,52 @@ from scout.exceptions import IntegrityError
 logger = logging.getLogger(__name__)
 
 
+# The fields needed to render a row in the variant list views. The full
+# documents, with all transcripts and samples, are fetched with `variant()`
+LIST_PROJECTION = {
+    'variant_id': 1,
+    'display_name': 1,
+    'case_id': 1,
+    'institute': 1,
+    'category': 1,
+    'sub_category': 1,
+    'variant_type': 1,
+    'variant_rank': 1,
+    'rank_score': 1,
+    'manual_rank': 1,
+    'acmg_classification': 1,
+    'chromosome': 1,
+    'position': 1,
+    'end': 1,
+    'length': 1,
+    'reference': 1,
+    'alternative': 1,
+    'hgnc_ids': 1,
+    'hgnc_symbols': 1,
+    'genetic_models': 1,
+    'compounds': 1,
+    'cadd_score': 1,
+    'thousand_genomes_frequency': 1,
+    'max_thousand_genomes_frequency': 1,
+    'exac_frequency': 1,
+    'max_exac_frequency': 1,
+    'gnomad_frequency': 1,
+    'max_gnomad_frequency': 1,
+    'local_obs_old': 1,
+    'genes.hgnc_id': 1,
+    'genes.hgnc_symbol': 1,
+    'genes.region_annotation': 1,
+    'genes.functional_annotation': 1,
+    'genes.sift_prediction': 1,
+    'genes.polyphen_prediction': 1,
+}
+
+PROJECTIONS = {
+    'list': LIST_PROJECTION,
+    'detail': None,
+}
+
+
 class VariantHandler(object):
 
     """Methods to handle variants in the mongo adapter"""
@@ -36,6 +85,10 @@ class VariantHandler(object):
     def add_gene_info(self, variant_obj, gene_panels=None):
         """Add extra information about genes from gene panels
 
+        The panel information is read from a cached index per panel version and
+        the hgnc genes and disease terms of all genes in the variant are
+        fetched with one query each.
+
         Args:
             variant_obj(dict): A variant from the database
             gene_panels(list(dict)): List of panels from database
@@ -43,23 +96,18 @@ class VariantHandler(object):
         gene_panels = gene_panels or []
 
         # We need to check if there are any additional information in the gene panels
+        panel_indexes = [self.panel_gene_index(panel_obj) for panel_obj in gene_panels]
 
-        # extra_info will hold information from gene panels
-        extra_info = {}
-        for panel_obj in gene_panels:
-            for gene_info in panel_obj['genes']:
-                hgnc_id = gene_info['hgnc_id']
-                if hgnc_id in extra_info:
-                    extra_info[hgnc_id].append(gene_info)
-                else:
-                    extra_info[hgnc_id] = [gene_info]
+        variant_genes = variant_obj.get('genes', [])
+        hgnc_ids = [variant_gene['hgnc_id'] for variant_gene in variant_genes]
+        hgnc_genes = self.hgnc_genes_by_ids(hgnc_ids)
+        disease_terms = self.disease_terms_by_genes(hgnc_ids)
 
         # Loop over the genes in the variant object to add information
         # from hgnc_genes and panel genes
-        for variant_gene in variant_obj.get('genes', []):
+        for variant_gene in variant_genes:
             hgnc_id = variant_gene['hgnc_id']
-            # Get the hgnc_gene
-            hgnc_gene = self.hgnc_gene(hgnc_id)
+            hgnc_gene = hgnc_genes.get(hgnc_id)
 
             # Create a dictionary with transcripts information
             transcripts_dict = {}
@@ -75,32 +123,26 @@ class VariantHandler(object):
                 if hgnc_gene.get('incomplete_penetrance'):
                     variant_gene['omim_penetrance'] = True
 
-            # Get the panel specific information for the gene
-            panel_info = extra_info.get(hgnc_id, [])
-
             # Manually annotated disease associated transcripts
             disease_associated = set()
-            # We need to strip the version to compare against others
+            # Transcripts without version to compare against others
             disease_associated_no_version = set()
             manual_penetrance = False
             mosaicism = False
             manual_inheritance = set()
 
-            # We need to loop since there can be information from multiple
-            # panels
-            for gene_info in panel_info:
-                # Check if there are manually annotated disease transcripts
-                for tx in gene_info.get('disease_associated_transcripts', []):
-                    # We remove the version of transcript at this stage
-                    stripped = re.sub(r'\.[0-9]', '', tx)
-                    disease_associated_no_version.add(stripped)
-                    disease_associated.add(tx)
-                if gene_info.get('reduced_penetrance'):
+            # There can be information from multiple panels
+            for panel_index in panel_indexes:
+                gene_info = panel_index.get(hgnc_id)
+                if not gene_info:
+                    continue
+                disease_associated.update(gene_info['disease_associated_transcripts'])
+                disease_associated_no_version.update(gene_info['disease_associated_no_version'])
+                if gene_info['reduced_penetrance']:
                     manual_penetrance = True
-
-                if gene_info.get('mosaicism'):
+                if gene_info['mosaicism']:
                     mosaicism = True
-                manual_inheritance.update(gene_info.get('inheritance_models', []))
+                manual_inheritance.update(gene_info['inheritance_models'])
 
             variant_gene['disease_associated_transcripts'] = list(disease_associated)
             variant_gene['manual_penetrance'] = manual_penetrance
@@ -132,12 +174,13 @@ class VariantHandler(object):
             variant_gene['common'] = hgnc_gene
 
             # Add the associated disease terms
-            variant_gene['disease_terms'] = self.disease_terms(hgnc_id)
+            variant_gene['disease_terms'] = disease_terms.get(hgnc_id, [])
 
         return variant_obj
 
     def variants(self, case_id, query=None, variant_ids=None, category='snv',
-                 nr_of_variants=10, skip=0, sort_key='variant_rank'):
+                 nr_of_variants=10, skip=0, sort_key='variant_rank',
+                 projection='detail'):
         """Returns variants specified in question for a specific case.
 
         If skip not equal to 0 skip the first n variants.
@@ -150,12 +193,17 @@ class VariantHandler(object):
             nr_of_variants(int): if -1 return all variants
             skip(int): How many variants to skip
             sort_key: 'variant_rank' or 'rank_score'
+            projection(str): 'list' to only fetch the fields shown in the
+                             variant lists or 'detail' for complete documents
 
         Yields:
             result(Iterable[Variant])
         """
         logger.info("Fetching variants from {0}".format(case_id))
 
+        if projection not in PROJECTIONS:
+            raise ValueError("Invalid projection {0}".format(projection))
+
         if variant_ids:
             nr_of_variants = len(variant_ids)
 
@@ -177,6 +225,7 @@ class VariantHandler(object):
 
         result = self.variant_collection.find(
             mongo_query,
+            PROJECTIONS[projection],
             skip=skip,
             limit=nr_of_variants
         ).sort(sorting)
@@ -211,6 +260,27 @@ class VariantHandler(object):
                                                variant_obj['position'])
         return variant_obj
 
+    def variants_by_ids(self, document_ids, projection=None):
+        """Fetch many variants with one query.
+
+        Gene information is not added to the variants, use `variant()` for
+        that.
+
+        Args:
+            document_ids(iterable(str)): md5 keys that represents variants
+            projection(dict): Optional projection passed to mongodb
+
+        Returns:
+            variant_objs(list(dict)): The variants in the same order as
+                                      document_ids, None if a variant is missing
+        """
+        document_ids = list(document_ids)
+        if not document_ids:
+            return []
+        res = self.variant_collection.find({'_id': {'$in': document_ids}}, projection)
+        variant_objs = {variant_obj['_id']: variant_obj for variant_obj in res}
+        return [variant_objs.get(document_id) for document_id in document_ids]
+
     def get_causatives(self, institute_id):
         """Return all causative variants for an institute
 
@@ -276,6 +346,25 @@ class VariantHandler(object):
         )
         return new_variant
 
+    def update_variant_fields(self, variant_id, fields):
+        """Update some fields of a variant document in the database.
+
+        Use this when the variant was fetched with a projection, replacing
+        the document would otherwise drop the fields that were left out.
+
+        Args:
+            variant_id(str): The document id of the variant
+            fields(dict): Field names (dot notation is allowed) and new values
+
+        Returns:
+            result(pymongo.results.UpdateResult)
+        """
+        logger.debug("Updating fields %s for variant %s", ', '.join(fields), variant_id)
+        return self.variant_collection.update_one(
+            {'_id': variant_id},
+            {'$set': fields}
+        )
+
     def update_variants(self, case_obj, variant_type='clinical', category='snv'):
         """Adds extra information on variants.
 
@@ -362,17 +451,38 @@ class VariantHandler(object):
         logger.info("Updating variant_rank done")
 
     def other_causatives(self, case_obj, variant_obj):
-        """Find the same variant in other cases marked causative."""
+        """Find the same variant in other cases marked causative.
+
+        The causatives of the institute are joined with their variants in
+        one aggregation so only the matching variants are returned.
+
+        Args:
+            case_obj(dict)
+            variant_obj(dict)
+
+        Returns:
+            causatives(iterable(dict)): Variants from other cases
+        """
         # variant id without "*_[variant_type]"
         variant_id = variant_obj['display_name'].rsplit('_', 1)[0]
+        display_name_pattern = "^{}_".format(re.escape(variant_id))
 
-        causative_ids = self.get_causatives(variant_obj['institute'])
-        for causative_id in causative_ids:
-            other_variant = self.variant(causative_id)
-            not_same_case = other_variant['case_id'] != case_obj['_id']
-            same_variant = other_variant['display_name'].startswith(variant_id)
-            if (not_same_case and same_variant):
-                yield other_variant
+        return self.case_collection.aggregate([
+            {'$match': {'collaborators': variant_obj['institute'],
+                        'causatives': {'$exists': True}}},
+            {'$unwind': '$causatives'},
+            {'$group': {'_id': '$causatives'}},
+            {'$lookup': {
+                'from': self.variant_collection.name,
+                'localField': '_id',
+                'foreignField': '_id',
+                'as': 'variant',
+            }},
+            {'$unwind': '$variant'},
+            {'$match': {'variant.display_name': {'$regex': display_name_pattern},
+                        'variant.case_id': {'$ne': case_obj['_id']}}},
+            {'$replaceRoot': {'newRoot': '$variant'}},
+        ])
 
     def delete_variants(self, case_id, variant_type, category=None):
         """Delete variants of one type for a case
@@ -390,6 +500,7 @@ class VariantHandler(object):
             query['category'] = category
         result = self.variant_collection.delete_many(query)
         logger.info("{0} variants deleted".format(result.deleted_count))
+        self.delete_variant_stats(case_id, variant_type, category)
 
     def load_variant(self, variant_obj):
         """Load a variant object
@@ -499,6 +610,10 @@ class VariantHandler(object):
         nr_inserted = 0
         # This is to keep track of the inserted variants
         inserted = 1
+        # Counts for the materialised case statistics
+        stats = new_variant_stats()
+        # The variants loaded from a region, used to update the overlapping variants
+        inserted_ids = []
 
         try:
             for nr_variants, variant in enumerate(vcf_obj(region)):
@@ -527,6 +642,9 @@ class VariantHandler(object):
                     try:
                         self.load_variant(variant_obj)
                         nr_inserted += 1
+                        add_variant_stats(stats, variant_obj)
+                        if region:
+                            inserted_ids.append(variant_obj['_id'])
                     except IntegrityError as error:
                         pass
 
@@ -547,9 +665,136 @@ class VariantHandler(object):
             raise error
 
         self.update_variants(case_obj, variant_type, category=category)
+        self.update_variant_stats(case_obj['_id'], variant_type, category, stats)
+        if category in ('snv', 'sv'):
+            self.update_overlapping(
+                case_obj['_id'], variant_type, category=category,
+                variant_ids=inserted_ids if region else None,
+                build=case_obj.get('genome_build', '37'),
+            )
         logger.info("Nr variants inserted: %s", nr_inserted)
         return nr_inserted
 
+    def variant_region(self, variant_obj, gene_coordinates=None):
+        """Return the region of the genes that a variant overlaps
+
+        If the genes can not be found the coordinates of the variant are used.
+
+        Args:
+            variant_obj(dict)
+            gene_coordinates(dict): {<hgnc_id>: (<start>, <end>)}, if not
+                                    given the genes are fetched one by one
+
+        Returns:
+            region(tuple): (<start>(int), <end>(int))
+        """
+        starts = []
+        ends = []
+        for gene_id in variant_obj.get('hgnc_ids', []):
+            if gene_coordinates is None:
+                gene_obj = self.hgnc_gene(gene_id)
+                coordinates = (gene_obj['start'], gene_obj['end']) if gene_obj else None
+            else:
+                coordinates = gene_coordinates.get(gene_id)
+            if coordinates:
+                starts.append(coordinates[0])
+                ends.append(coordinates[1])
+
+        if not starts:
+            return (variant_obj['position'], variant_obj.get('end', variant_obj['position']))
+        return (min(starts), max(ends))
+
+    def update_overlapping(self, case_id, variant_type='clinical', category=None,
+                           variant_ids=None, build='37'):
+        """Store the overlapping SNVs on each SV of a case and the other way around
+
+        A SNV overlaps a SV if it lies in the region of the genes that the SV
+        overlaps, and a SV overlaps a SNV if it covers the region of the genes
+        of the SNV. The _ids of all overlapping variants are stored in
+        'overlapping' on each variant.
+
+        This is run after SNVs or SVs are loaded for a case. Only the loaded
+        variants get their overlapping variants set, they are added to the
+        variants of the other category that already have overlapping variants.
+
+        Args:
+            case_id(str)
+            variant_type(str): 'clinical' or 'research'
+            category(str): 'snv' or 'sv', the category that was loaded. None
+                           to update all SNVs and SVs of the case
+            variant_ids(list(str)): The loaded variants, None for all of the category
+            build(str): The genome build of the case
+
+        Returns:
+            nr_updated(int): Number of variants with overlapping variants
+        """
+        logger.info("Updating overlapping variants for case %s", case_id)
+        base_query = {'case_id': case_id, 'variant_type': variant_type}
+        loaded_query = dict(base_query, category=category or {'$in': ['snv', 'sv']})
+        if variant_ids is not None:
+            loaded_query['_id'] = {'$in': list(variant_ids)}
+        other_category = {'snv': 'sv', 'sv': 'snv'}.get(category)
+        other_query = dict(base_query, category=other_category or {'$in': ['snv', 'sv']})
+
+        projection = {'category': 1, 'chromosome': 1, 'position': 1, 'end': 1,
+                      'hgnc_ids': 1}
+        loaded = list(self.variant_collection.find(loaded_query, projection))
+        others = list(self.variant_collection.find(other_query, projection))
+
+        hgnc_ids = set()
+        for variant_obj in loaded + others:
+            hgnc_ids.update(variant_obj.get('hgnc_ids', []))
+        gene_coordinates = {
+            gene_obj['hgnc_id']: (gene_obj['start'], gene_obj['end']) for gene_obj in
+            self.hgnc_collection.find({'hgnc_id': {'$in': list(hgnc_ids)}, 'build': build},
+                                      {'hgnc_id': 1, 'start': 1, 'end': 1})
+        }
+
+        def group(variants):
+            """Group the gene regions and variant coordinates per chromosome and category"""
+            regions = {}
+            intervals = {}
+            for variant_obj in variants:
+                key = (variant_obj['chromosome'], variant_obj['category'])
+                start, end = self.variant_region(variant_obj, gene_coordinates)
+                regions.setdefault(key, []).append((start, end, variant_obj['_id']))
+                position = variant_obj['position']
+                intervals.setdefault(key, []).append(
+                    (position, variant_obj.get('end', position), variant_obj['_id']))
+            return regions, intervals
+
+        def overlapping_ids(regions, intervals):
+            """Return the ids in intervals of the other category that overlap each region"""
+            overlapping = {}
+            for (chromosome, region_category), chrom_regions in regions.items():
+                target_category = 'snv' if region_category == 'sv' else 'sv'
+                targets = intervals.get((chromosome, target_category), [])
+                for variant_id, other_id in overlapping_pairs(chrom_regions, targets):
+                    overlapping.setdefault(variant_id, set()).add(other_id)
+            return overlapping
+
+        loaded_regions, loaded_intervals = group(loaded)
+        other_regions, other_intervals = group(others)
+        loaded_overlapping = overlapping_ids(loaded_regions, other_intervals)
+        other_overlapping = overlapping_ids(other_regions, loaded_intervals)
+
+        self.variant_collection.update_many(loaded_query, {'$set': {'overlapping': []}})
+        requests = [pymongo.UpdateOne({'_id': variant_id},
+                                      {'$set': {'overlapping': sorted(other_ids)}})
+                    for variant_id, other_ids in loaded_overlapping.items()]
+        loaded_ids = set(variant_obj['_id'] for variant_obj in loaded)
+        # Variants loaded before overlaps were stored are left to the coordinate query
+        requests.extend(
+            pymongo.UpdateOne({'_id': variant_id, 'overlapping': {'$exists': True}},
+                              {'$addToSet': {'overlapping': {'$each': sorted(other_ids)}}})
+            for variant_id, other_ids in other_overlapping.items()
+            if variant_id not in loaded_ids
+        )
+        if requests:
+            self.variant_collection.bulk_write(requests, ordered=False)
+        logger.info("%s variants have overlapping variants", len(requests))
+        return len(requests)
+
     def overlapping(self, variant_obj):
         """Return ovelapping variants.
 
@@ -558,39 +803,30 @@ class VariantHandler(object):
 
         If variant_obj is sv it will return the overlapping snvs and oposite
 
+        The overlapping variants are stored on the variants when they are
+        loaded, see update_overlapping. Variants loaded before that are
+        looked up with a coordinate query.
+
         Args:
             variant_obj(dict)
 
         Returns:
             variants(iterable(dict))
         """
-        category = 'snv' if variant_obj['category'] == 'sv' else 'sv'
+        if 'overlapping' in variant_obj:
+            variants = [other_variant for other_variant in
+                        self.variants_by_ids(variant_obj['overlapping']) if other_variant]
+            variants.sort(key=lambda other_variant: -(other_variant.get('rank_score') or 0))
+            return variants
 
-        region_start = None
-        region_end = None
-        chromosome = variant_obj['chromosome']
-
-        for gene_id in variant_obj['hgnc_ids']:
-            gene_obj = self.hgnc_gene(gene_id)
-            if gene_obj:
-                gene_start = gene_obj['start']
-                gene_end = gene_obj['end']
-                if not region_start:
-                    region_start = gene_start
-                else:
-                    if gene_start < region_start:
-                        region_start = gene_start
-                if not region_end:
-                    region_end = gene_end
-                else:
-                    if gene_end > region_end:
-                        region_end = gene_end
+        category = 'snv' if variant_obj['category'] == 'sv' else 'sv'
+        region_start, region_end = self.variant_region(variant_obj)
 
         query = self.build_query(
             case_id=variant_obj['case_id'],
             query={
                 'variant_type': variant_obj['variant_type'],
-                'chrom': chromosome,
+                'chrom': variant_obj['chromosome'],
                 'start': region_start,
                 'end': region_end,
             },
@@ -1,6 +1,7 @@
 import logging
 
 import click
+import pymongo
 
 log = logging.getLogger(__name__)
 
@@ -18,10 +19,13 @@ def panel(context, panel_id, version):
     log.info("Running scout delete panel")
     adapter = context.obj['adapter']
 
-    panel_objs = adapter.gene_panels(panel_id=panel_id, version=version)
-    if panel_objs.count() == 0:
+    # Older versions are stored as changes to newer ones. Deleting the oldest
+    # version first means no version is rebuilt just to be deleted after.
+    panel_objs = list(adapter.gene_panels(panel_id=panel_id, version=version)
+                      .sort('version', pymongo.ASCENDING))
+    if not panel_objs:
         log.info("No panels found")
-        
+
     for panel_obj in panel_objs:
         adapter.delete_panel(panel_obj)
 
@@ -117,6 +121,7 @@ def case(context, institute, case_id, display_name):
     if case.deleted_count == 1:
         adapter.delete_variants(case_id=case_id, variant_type='clinical')
         adapter.delete_variants(case_id=case_id, variant_type='research')
+        adapter.delete_variant_stats(case_id)
     else:
         log.warning("Case does not exist in database")
         context.abort()
@@ -28,8 +28,8 @@ from scout.resources import (hgnc_path, exac_path, transcripts37_path,
                              hpogenes_path)
 
 
-from scout.utils.link import link_genes
-from scout.utils.handle import get_file_handle
+from scout.utils.link import link_genes_parallel
+from scout.utils.cache import default_cache_dir
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +44,13 @@ logger = logging.getLogger(__name__)
                 show_default=True,
                 help="What genome build should be used."
 )
+@click.option('--defer-indexes',
+                is_flag=True,
+                help="Drop the gene indexes during the load and build them afterwards. "\
+                     "Faster, but gene queries are slow until the load is done."
+)
 @click.pass_context
-def genes(ctx, update, build):
+def genes(ctx, update, build, defer_indexes):
     """
     Load the hgnc aliases to the mongo database.
     """
@@ -63,34 +68,21 @@ def genes(ctx, update, build):
             logger.info("If you wish to update genes use '--update'")
             ctx.abort()
 
-    logger.info("Loading hgnc file from {0}".format(hgnc_path))
-    hgnc_handle = get_file_handle(hgnc_path)
-
-    if build == '37':
-        logger.info("Loading ensembl transcript file from {0}".format(
-                    transcripts37_path))
-        ensembl_handle = get_file_handle(transcripts37_path)
+    gene_resources = {
+        'hgnc': hgnc_path,
+        'ensembl': transcripts37_path if build == '37' else transcripts38_path,
+        'exac': exac_path,
+        'mim2gene': mim2gene_path,
+        'genemap': genemap2_path,
+        'hpo': hpogenes_path,
+    }
+    for resource, path in gene_resources.items():
+        logger.info("Loading {0} information from {1}".format(resource, path))
+
+    genes = link_genes_parallel({build: gene_resources}, cache_dir=default_cache_dir())[build]
+
+    if defer_indexes:
+        with adapter.deferred_indexes(['hgnc_collection', 'hgnc_alias_collection']):
+            load_hgnc_genes(adapter=adapter, genes=genes, build=build)
     else:
-        ensembl_handle = get_file_handle(transcripts38_path)
-
-    logger.info("Loading exac gene file from {0}".format(
-                exac_path))
-    exac_handle = get_file_handle(exac_path)
-
-    logger.info("Loading mim information from files {0}, {1}".format(
-                mim2gene_path, genemap2_path))
-
-    mim2gene_handle = get_file_handle(mim2gene_path)
-    genemap_handle = get_file_handle(genemap2_path)
-    hpo_handle = get_file_handle(hpogenes_path)
-
-    genes = link_genes(
-        ensembl_lines=ensembl_handle,
-        hgnc_lines=hgnc_handle,
-        exac_lines=exac_handle,
-        mim2gene_lines=mim2gene_handle,
-        genemap_lines=genemap_handle,
-        hpo_lines=hpo_handle
-    )
-
-    load_hgnc_genes(adapter=adapter, genes=genes, build=build)
+        load_hgnc_genes(adapter=adapter, genes=genes, build=build)
@@ -38,7 +38,7 @@ def hgnc(ctx, hgnc_symbol, hgnc_id, build):
     
     result = adapter.hgnc_genes(hgnc_symbol, build=build)
     
-    if result.count() == 0:
+    if not result:
         log.info("No results found")
     
     else:
@@ -5,7 +5,6 @@ import logging
 import datetime
 import yaml
 
-import pymongo
 import click
 
 from pprint import pprint as pp
@@ -46,7 +45,8 @@ from scout.build import (build_institute, build_case, build_panel, build_variant
 from scout.load import (load_hgnc_genes, load_hpo, load_scout)
 
 from scout.utils.handle import get_file_handle
-from scout.utils.link import link_genes
+from scout.utils.link import link_genes_parallel
+from scout.utils.cache import default_cache_dir
 
 log = logging.getLogger(__name__)
 
@@ -94,61 +94,29 @@ def database(context, institute_name, user_name, user_mail):
 
     adapter.add_user(user_obj)
 
-    # Load the genes and transcripts
-    hgnc_handle = context.obj['hgnc']
-    transcripts37_handle = context.obj['transcripts37']
-    transcripts38_handle = context.obj['transcripts38']
-    exac_handle = context.obj['exac']
-    hpo_genes_handle = context.obj['hpogenes']
-
-    mim2gene_handle = context.obj['mim2gene']
-    genemap_handle = context.obj['genemap2']
-
-    genes37 = link_genes(
-        ensembl_lines=transcripts37_handle,
-        hgnc_lines=hgnc_handle,
-        exac_lines=exac_handle,
-        mim2gene_lines=mim2gene_handle,
-        genemap_lines=genemap_handle,
-        hpo_lines=hpo_genes_handle,
-    )
-
-    load_hgnc_genes(adapter, genes37, build='37')
-
-    genes38 = link_genes(
-        ensembl_lines=transcripts38_handle,
-        hgnc_lines=context.obj['hgnc38'],
-        exac_lines=context.obj['exac38'],
-        mim2gene_lines=context.obj['mim2gene38'],
-        genemap_lines=context.obj['genemap2_38'],
-        hpo_lines=context.obj['hpogenes_38'],
-    )
-
-    load_hgnc_genes(adapter, genes38, build='38')
+    # The indexes are built once, after the reference data is loaded
+    with adapter.deferred_indexes():
+        # Load the genes and transcripts, the resources of both builds are parsed in parallel
+        # The omim phenotypes are collected in the same pass as the omim genes
+        genes, mim_phenotypes = link_genes_parallel(
+            context.obj['gene_resources'], cache_dir=default_cache_dir(), with_phenotypes=True)
 
-    hpo_terms_handle = context.obj['hpo_terms']
-    disease_handle = context.obj['disease_terms']
-    hpo_disease_handle = context.obj['hpodiseases']
+        load_hgnc_genes(adapter, genes['37'], build='37')
 
-    load_hpo(
-        adapter=adapter,
-        hpo_lines=hpo_terms_handle,
-        disease_lines=disease_handle,
-        hpo_disease_lines=hpo_disease_handle
-    )
-
-    log.info("Creating indexes")
-
-    adapter.hgnc_collection.create_index([('build', pymongo.ASCENDING),
-                                          ('chromosome', pymongo.ASCENDING)])
+        load_hgnc_genes(adapter, genes['38'], build='38')
 
-    adapter.variant_collection.create_index([('case_id', pymongo.ASCENDING),
-                                          ('rank_score', pymongo.DESCENDING)])
+        hpo_terms_handle = context.obj['hpo_terms']
+        hpo_disease_handle = context.obj['hpodiseases']
 
-    adapter.variant_collection.create_index([('case_id', pymongo.ASCENDING),
-                                          ('variant_rank', pymongo.ASCENDING)])
+        load_hpo(
+            adapter=adapter,
+            hpo_lines=hpo_terms_handle,
+            disease_lines=None,
+            hpo_disease_lines=hpo_disease_handle,
+            mim_phenotypes=mim_phenotypes,
+        )
 
-    log.info("hgnc gene index created")
+    log.info("Indexes created")
 
     log.info("Scout instance setup successful")
 
@@ -193,36 +161,25 @@ def demo(context):
 
     adapter.add_user(user_obj)
 
-    # Load the genes and transcripts
-    hgnc_handle = context.obj['hgnc']
-    transcripts37_handle = context.obj['transcripts37']
-    # transcripts38_handle = context.obj['transcripts38']
-    exac_handle = context.obj['exac']
-    hpo_genes_handle = context.obj['hpogenes']
-    mim2gene_handle = context.obj['mim2gene']
-    genemap_handle = context.obj['genemap2']
-
-    genes37 = link_genes(
-        ensembl_lines=transcripts37_handle,
-        hgnc_lines=hgnc_handle,
-        exac_lines=exac_handle,
-        mim2gene_lines=mim2gene_handle,
-        genemap_lines=genemap_handle,
-        hpo_lines=hpo_genes_handle,
-    )
+    # The indexes are built once, after the reference data is loaded
+    with adapter.deferred_indexes():
+        # Load the genes and transcripts
+        genes, mim_phenotypes = link_genes_parallel(
+            {'37': context.obj['gene_resources']['37']}, cache_dir=default_cache_dir(),
+            with_phenotypes=True)
 
-    load_hgnc_genes(adapter, genes37, build='37')
+        load_hgnc_genes(adapter, genes['37'], build='37')
 
-    hpo_terms_handle = context.obj['hpo_terms']
-    disease_handle = context.obj['disease_terms']
-    hpo_disease_handle = context.obj['hpodiseases']
+        hpo_terms_handle = context.obj['hpo_terms']
+        hpo_disease_handle = context.obj['hpodiseases']
 
-    load_hpo(
-        adapter=adapter,
-        hpo_lines=hpo_terms_handle,
-        disease_lines=disease_handle,
-        hpo_disease_lines=hpo_disease_handle
-    )
+        load_hpo(
+            adapter=adapter,
+            hpo_lines=hpo_terms_handle,
+            disease_lines=None,
+            hpo_disease_lines=hpo_disease_handle,
+            mim_phenotypes=mim_phenotypes,
+        )
 
     adapter.load_panel(
         path=panel_path, 
@@ -239,19 +196,6 @@ def demo(context):
     
     adapter.load_case(case_data)
 
-    log.info("Creating indexes")
-
-    adapter.hgnc_collection.create_index([('build', pymongo.ASCENDING),
-                                          ('chromosome', pymongo.ASCENDING)])
-
-    adapter.variant_collection.create_index([('case_id', pymongo.ASCENDING),
-                                          ('rank_score', pymongo.DESCENDING)])
-
-    adapter.variant_collection.create_index([('case_id', pymongo.ASCENDING),
-                                          ('variant_rank', pymongo.ASCENDING)])
-    
-    log.info("hgnc gene index created")
-
     log.info("Scout demo instance setup successful")
 
 
@@ -267,77 +211,49 @@ def setup(context):
     context.obj['user_mail'] = 'clark.kent@mail.com'
 
     if context.invoked_subcommand == 'demo':
-        log.info("Loading hgnc genes from %s", hgnc_reduced_path)
-        hgnc = get_file_handle(hgnc_reduced_path)
-        hgnc38 = get_file_handle(hgnc_reduced_path)
-        log.info("Loading exac genes from %s", exac_reduced_path)
-        exac = get_file_handle(exac_reduced_path)
-        exac38 = get_file_handle(exac_reduced_path)
-        log.info("Loading mim2gene info from %s", mim2gene_reduced_path)
-        mim2gene = get_file_handle(mim2gene_reduced_path)
-        mim2gene38 = get_file_handle(mim2gene_reduced_path)
-        log.info("Loading genemap info from %s", genemap2_reduced_path)
-        genemap = get_file_handle(genemap2_reduced_path)
-        genemap38 = get_file_handle(genemap2_reduced_path)
-        log.info("Loading hpo gene info from %s", hpogenes_reduced_path)
-        hpogenes = get_file_handle(hpogenes_reduced_path)
-        hpogenes38 = get_file_handle(hpogenes_reduced_path)
+        gene_resources = {
+            'hgnc': hgnc_reduced_path,
+            'exac': exac_reduced_path,
+            'mim2gene': mim2gene_reduced_path,
+            'genemap': genemap2_reduced_path,
+            'hpo': hpogenes_reduced_path,
+        }
+        transcripts37 = transcripts37_reduced_path
+        transcripts38 = transcripts38_reduced_path
         log.info("Loading hpo disease info from %s", hpo_phenotype_to_terms_reduced_path)
         hpodiseases = get_file_handle(hpo_phenotype_to_terms_reduced_path)
         log.info("Loading hpo terms from %s", hpoterms_reduced_path)
         hpoterms = get_file_handle(hpoterms_reduced_path)
-        log.info("Loading omim disease info from %s", genemap2_reduced_path)
-        diseaseterms = get_file_handle(genemap2_reduced_path)
-        log.info("Loading transcripts build 37 info from %s", transcripts37_reduced_path)
-        transcripts37 = get_file_handle(transcripts37_reduced_path)
-        transcripts38 = get_file_handle(transcripts38_reduced_path)
         # Update context.obj settings here
         log.info("Change database name to scout-demo")
         context.obj['mongodb'] = 'scout-demo'
-        # log.info("Loading transcripts build 38 info from %s", transcripts38_path)
-        # context.obj['transcripts38'] = get_file_handle(transcripts38_path)
 
     else:
-        log.info("Loading hgnc genes from %s", hgnc_reduced_path)
-        hgnc = get_file_handle(hgnc_path)
-        hgnc38 = get_file_handle(hgnc_path)
-        log.info("Loading exac genes from %s", exac_reduced_path)
-        exac = get_file_handle(exac_path)
-        exac38 = get_file_handle(exac_path)
-        log.info("Loading mim2gene info from %s", mim2gene_reduced_path)
-        mim2gene = get_file_handle(mim2gene_path)
-        mim2gene38 = get_file_handle(mim2gene_path)
-        log.info("Loading genemap info from %s", genemap2_reduced_path)
-        genemap = get_file_handle(genemap2_path)
-        genemap38 = get_file_handle(genemap2_path)
-        log.info("Loading hpo gene info from %s", hpogenes_reduced_path)
-        hpogenes = get_file_handle(hpogenes_path)
-        hpogenes38 = get_file_handle(hpogenes_path)
-        log.info("Loading hpo disease info from %s", hpo_phenotype_to_terms_reduced_path)
+        gene_resources = {
+            'hgnc': hgnc_path,
+            'exac': exac_path,
+            'mim2gene': mim2gene_path,
+            'genemap': genemap2_path,
+            'hpo': hpogenes_path,
+        }
+        transcripts37 = transcripts37_path
+        transcripts38 = transcripts38_path
+        log.info("Loading hpo disease info from %s", hpo_phenotype_to_terms_path)
         hpodiseases = get_file_handle(hpo_phenotype_to_terms_path)
-        log.info("Loading hpo terms from %s", hpoterms_reduced_path)
+        log.info("Loading hpo terms from %s", hpoterms_path)
         hpoterms = get_file_handle(hpoterms_path)
-        log.info("Loading omim disease info from %s", genemap2_reduced_path)
-        diseaseterms = get_file_handle(genemap2_path)
-        log.info("Loading transcripts build 37 info from %s", transcripts37_reduced_path)
-        transcripts37 = get_file_handle(transcripts37_path)
-        transcripts38 = get_file_handle(transcripts38_path)
-
-    context.obj['hgnc'] = hgnc
-    context.obj['hgnc38'] = hgnc38
-    context.obj['exac'] = exac
-    context.obj['exac38'] = exac38
-    context.obj['mim2gene'] = mim2gene
-    context.obj['mim2gene38'] = mim2gene38
-    context.obj['genemap2'] = genemap
-    context.obj['genemap2_38'] = genemap38
-    context.obj['hpogenes'] = hpogenes
-    context.obj['hpogenes_38'] = hpogenes38
+
+    for resource, path in gene_resources.items():
+        log.info("Loading %s gene info from %s", resource, path)
+    log.info("Loading transcripts from %s and %s", transcripts37, transcripts38)
+
+    # The gene resources are parsed when the genes are linked
+    context.obj['gene_resources'] = {
+        '37': dict(gene_resources, ensembl=transcripts37),
+        '38': dict(gene_resources, ensembl=transcripts38),
+    }
     context.obj['hpodiseases'] = hpodiseases
     context.obj['hpo_terms'] = hpoterms
-    context.obj['disease_terms'] = diseaseterms
-    context.obj['transcripts37'] = transcripts37
-    context.obj['transcripts38'] = transcripts38
 
     log.info("Setting database name to %s", context.obj['mongodb'])
     log.debug("Setting host to %s", context.obj['host'])
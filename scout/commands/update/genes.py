@@ -0,0 +1,64 @@
+import logging
+
+import click
+
+from scout.load.hgnc_gene import update_hgnc_genes
+from scout.resources import (hgnc_path, exac_path, transcripts37_path,
+                             transcripts38_path, mim2gene_path, genemap2_path,
+                             hpogenes_path)
+from scout.utils.link import link_genes_parallel
+from scout.utils.cache import default_cache_dir
+
+log = logging.getLogger(__name__)
+
+@click.command('genes', short_help='Update all genes')
+@click.option('--build',
+                type=click.Choice(['37', '38']),
+                multiple=True,
+                help="What genome build should be updated, default is both."
+)
+@click.option('--hgnc', type=click.Path(exists=True), default=hgnc_path,
+                help="Path to hgnc_complete_set.txt, default is the bundled file")
+@click.option('--transcripts37', type=click.Path(exists=True), default=transcripts37_path,
+                help="Path to the ensembl transcripts for build 37, default is the bundled file")
+@click.option('--transcripts38', type=click.Path(exists=True), default=transcripts38_path,
+                help="Path to the ensembl transcripts for build 38, default is the bundled file")
+@click.option('--exac', type=click.Path(exists=True), default=exac_path,
+                help="Path to the exac gene constraint file, default is the bundled file")
+@click.option('--mim2gene', type=click.Path(exists=True), default=mim2gene_path,
+                help="Path to the omim mim2gene.txt, default is the bundled file")
+@click.option('--genemap', type=click.Path(exists=True), default=genemap2_path,
+                help="Path to the omim genemap2.txt, default is the bundled file")
+@click.option('--hpo-genes', type=click.Path(exists=True), default=hpogenes_path,
+                help="Path to the hpo genes file, default is the bundled file")
+@click.pass_context
+def genes(context, build, hgnc, transcripts37, transcripts38, exac, mim2gene, genemap,
+          hpo_genes):
+    """
+    Update the genes in the database from the gene resources.
+
+    Only genes that have changed are written, genes are available during the update.
+    Use the file options to update from newly downloaded resources.
+    """
+    adapter = context.obj['adapter']
+    builds = build or ('37', '38')
+
+    gene_resources = {}
+    for genome_build in builds:
+        gene_resources[genome_build] = {
+            'hgnc': hgnc,
+            'ensembl': transcripts37 if genome_build == '37' else transcripts38,
+            'exac': exac,
+            'mim2gene': mim2gene,
+            'genemap': genemap,
+            'hpo': hpo_genes,
+        }
+        for resource, path in gene_resources[genome_build].items():
+            log.info("Build %s: using %s information from %s", genome_build, resource, path)
+
+    linked_genes = link_genes_parallel(gene_resources, cache_dir=default_cache_dir())
+
+    for genome_build in builds:
+        result = update_hgnc_genes(adapter, linked_genes[genome_build], build=genome_build)
+        log.info("Build %s: %s genes inserted, %s updated, %s deleted", genome_build,
+                 result['inserted'], result['updated'], result['deleted'])
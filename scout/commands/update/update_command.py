@@ -3,6 +3,7 @@ import logging
 import click
 
 from .case import case as case_command
+from .genes import genes as genes_command
 
 log = logging.getLogger(__name__)
 
@@ -90,3 +91,4 @@ def update(context):
 
 update.add_command(user)
 update.add_command(case_command)
+update.add_command(genes_command)
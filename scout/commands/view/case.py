@@ -4,6 +4,8 @@ from pprint import pprint as pp
 
 import click
 
+from scout.adapter.mongo.stats import nr_variants_above
+
 LOG = logging.getLogger(__name__)
 
 @click.command('cases', short_help='Fetch cases')
@@ -58,3 +60,51 @@ def cases(context, case_id, institute, reruns, finished, causatives, research_re
     if i == 0:
         LOG.info("No cases could be found")
 
+
+
+@click.command('variant-stats', short_help='Display variant statistics for a case')
+@click.option('-c', '--case-id',
+              required=True,
+              help='Case id to show statistics for'
+)
+@click.option('-r', '--rank-threshold',
+              type=float,
+              help='Also count the variants with at least this rank score'
+)
+@click.option('--refresh',
+              is_flag=True,
+              help='Recompute the statistics from the variants'
+)
+@click.pass_context
+def variant_stats(context, case_id, rank_threshold, refresh):
+    """Show the number of variants per category, clinsig class and gene."""
+    adapter = context.obj['adapter']
+
+    if refresh:
+        stats_obj = adapter.compute_variant_stats(case_id)
+    else:
+        stats_obj = adapter.variant_stats(case_id)
+
+    if not stats_obj:
+        LOG.info("No variant statistics found for case %s", case_id)
+        context.abort()
+
+    header = ['#variants', 'nr_variants', 'clinsig', 'nr_genes']
+    if rank_threshold is not None:
+        header.append("above_{0}".format(rank_threshold))
+    click.echo('\t'.join(header))
+
+    for key in sorted(stats_obj):
+        if key in ('_id', 'updated_at'):
+            continue
+        stats = stats_obj[key]
+        row = [
+            key,
+            str(stats['variants']),
+            ', '.join("{0}:{1}".format(clnsig, count) for clnsig, count in
+                      sorted(stats.get('clinsig', {}).items())) or '-',
+            str(len(stats.get('genes', {}))),
+        ]
+        if rank_threshold is not None:
+            row.append(str(nr_variants_above(stats, rank_threshold)))
+        click.echo('\t'.join(row))
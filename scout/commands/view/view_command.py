@@ -6,7 +6,7 @@ from pprint import pprint as pp
 
 from scout.constants import (SEX_MAP, PHENOTYPE_MAP)
 
-from .case import cases
+from .case import (cases, variant_stats)
 
 log = logging.getLogger(__name__)
 
@@ -41,6 +41,7 @@ def panels(context):
     click.echo("#panel_name\tversion\tnr_genes")
 
     for panel_obj in panel_objs:
+        panel_obj = adapter.expand_panel(panel_obj)
         click.echo("{0}\t{1}\t{2}".format(
             panel_obj['panel_name'],
             str(panel_obj['version']),
@@ -248,3 +249,4 @@ view.add_command(whitelist)
 view.add_command(aliases)
 view.add_command(individuals)
 view.add_command(index)
+view.add_command(variant_stats)
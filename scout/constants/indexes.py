@@ -15,6 +15,11 @@ INDEXES = {
             ('aliases', ASCENDING)],
             name="build_aliases"),
     ],
+    'hgnc_alias_collection': [
+        IndexModel([
+            ('build', ASCENDING)],
+            name="build"),
+    ],
     'variant_collection': [
         IndexModel([
             ('case_id', ASCENDING),
@@ -42,4 +47,26 @@ INDEXES = {
             ('thousand_genomes_frequency', ASCENDING)],
             name="caseid_varianttype_variantrank_panels_thousandg")
     ],
+    'event_collection': [
+        IndexModel([
+            ('institute', ASCENDING),
+            ('category', ASCENDING),
+            ('variant_id', ASCENDING),
+            ('verb', ASCENDING),
+            ('created_at', DESCENDING)],
+            name="institute_category_variantid_verb_createdat"),
+        IndexModel([
+            ('case', ASCENDING),
+            ('created_at', DESCENDING)],
+            name="case_createdat"),
+    ],
+    'panel_collection': [
+        IndexModel([
+            ('panel_name', ASCENDING),
+            ('version', DESCENDING)],
+            name="panelname_version"),
+        IndexModel([
+            ('genes_delta.base_id', ASCENDING)],
+            name="genesdelta_baseid"),
+    ],
 }
@@ -8,27 +8,70 @@ from scout.build import build_hgnc_gene
 logger = logging.getLogger(__name__)
 
 
-def load_hgnc_genes(adapter, genes, build='37'):
-    """Load genes with transcripts into the database
+def build_hgnc_genes(genes, build='37'):
+    """Build the gene objects for all genes with coordinates
 
         Args:
-            adapter(MongoAdapter)
             genes(dict): Dictionary with gene symbols as keys and gene
                          info as values
+            build(str)
+
+        Returns:
+            gene_objs(list(dict)), nr_skipped(int)
     """
-    logger.info("Loading the genes and transcripts, build %s", build)
-    start_time = datetime.now()
     non_existing = 0
-    nr_genes = 0
-    for nr_genes, gene_data in enumerate(genes.values()):
+    gene_objs = []
+    for gene_data in genes.values():
         if not gene_data.get('chromosome'):
             logger.debug("skipping gene: %s", gene_data['hgnc_symbol'])
             non_existing += 1
         else:
-            gene_obj = build_hgnc_gene(gene_data, build=build)
-            adapter.load_hgnc_gene(gene_obj)
+            gene_objs.append(build_hgnc_gene(gene_data, build=build))
+    return gene_objs, non_existing
+
+
+def load_hgnc_genes(adapter, genes, build='37'):
+    """Load genes with transcripts into the database
+
+        Args:
+            adapter(MongoAdapter)
+            genes(dict): Dictionary with gene symbols as keys and gene
+                         info as values
+    """
+    logger.info("Loading the genes and transcripts, build %s", build)
+    start_time = datetime.now()
+    gene_objs, non_existing = build_hgnc_genes(genes, build=build)
+
+    nr_genes = adapter.load_hgnc_bulk(gene_objs)
 
-    logger.info("Loading done. {0} genes loaded".format(nr_genes - non_existing))
+    logger.info("Loading done. {0} genes loaded".format(nr_genes))
     logger.info("Time to load genes: {0}".format(datetime.now() - start_time))
     logger.info("Nr of genes without coordinates in build {0}: {1}".format(
                 build, non_existing))
+
+
+def update_hgnc_genes(adapter, genes, build='37'):
+    """Update the genes in the database to a new set of genes
+
+        Only the genes that differ from the ones in the database are written,
+        see MongoAdapter.update_genes.
+
+        Args:
+            adapter(MongoAdapter)
+            genes(dict): Dictionary with gene symbols as keys and gene
+                         info as values
+            build(str)
+
+        Returns:
+            result(dict): {'inserted': int, 'updated': int, 'deleted': int}
+    """
+    logger.info("Updating the genes and transcripts, build %s", build)
+    start_time = datetime.now()
+    gene_objs, non_existing = build_hgnc_genes(genes, build=build)
+
+    result = adapter.update_genes(gene_objs, build=build)
+
+    logger.info("Time to update genes: {0}".format(datetime.now() - start_time))
+    logger.info("Nr of genes without coordinates in build {0}: {1}".format(
+                build, non_existing))
+    return result
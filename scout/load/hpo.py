@@ -12,19 +12,22 @@ from pprint import pprint as pp
 logger = logging.getLogger(__name__)
 
 
-def load_hpo(adapter, hpo_lines, disease_lines, hpo_disease_lines):
+def load_hpo(adapter, hpo_lines, disease_lines, hpo_disease_lines, mim_phenotypes=None):
     """Load the hpo terms and hpo diseases into database
     
     Args:
         adapter(MongoAdapter)
         hpo_lines(iterable(str))
-        disease_lines(iterable(str))
+        disease_lines(iterable(str)): genemap2 lines, not used if mim_phenotypes are given
+        hpo_disease_lines(iterable(str))
+        mim_phenotypes(dict): Already parsed omim phenotypes
     """
     alias_genes = adapter.genes_by_alias()
     
     load_hpo_terms(adapter, hpo_lines, alias_genes)
     
-    load_disease_terms(adapter, disease_lines, alias_genes, hpo_disease_lines)
+    load_disease_terms(adapter, disease_lines, alias_genes, hpo_disease_lines,
+                       mim_phenotypes=mim_phenotypes)
 
 def load_hpo_terms(adapter, hpo_lines, genes):
     """Load the hpo terms into the database
@@ -40,17 +43,15 @@ def load_hpo_terms(adapter, hpo_lines, genes):
     start_time = datetime.now()
 
     logger.info("Loading the hpo terms...")
-    for nr_terms, hpo_id in enumerate(hpo_terms):
-        hpo_info = hpo_terms[hpo_id]
-        hpo_obj = build_hpo_term(hpo_info, genes)
-        
-        adapter.load_hpo_term(hpo_obj)
-    
+    hpo_objs = (build_hpo_term(hpo_terms[hpo_id], genes) for hpo_id in hpo_terms)
+    nr_terms = adapter.load_hpo_bulk(hpo_objs)
+
     logger.info("Loading done. Nr of terms loaded {0}".format(nr_terms))
     logger.info("Time to load terms: {0}".format(datetime.now() - start_time))
 
 
-def load_disease_terms(adapter, genemap_lines, genes, hpo_disease_lines):
+def load_disease_terms(adapter, genemap_lines, genes, hpo_disease_lines,
+                       mim_phenotypes=None):
     """Load the omim phenotypes into the database
     
     Parse the phenotypes from genemap2.txt and find the associated hpo terms
@@ -61,16 +62,22 @@ def load_disease_terms(adapter, genemap_lines, genes, hpo_disease_lines):
         genemap_lines(iterable(str))
         genes(dict): Dictionary with all genes found in database
         hpo_disease_lines(iterable(str))
+        mim_phenotypes(dict): The omim phenotypes as returned by
+                              get_mim_phenotypes. If given genemap_lines
+                              are not parsed again.
 
     """
 
-    disease_terms = get_mim_phenotypes(genemap_lines=genemap_lines)
+    disease_terms = mim_phenotypes
+    if disease_terms is None:
+        disease_terms = get_mim_phenotypes(genemap_lines=genemap_lines)
     hpo_diseases = parse_hpo_diseases(hpo_disease_lines)
 
     start_time = datetime.now()
 
     logger.info("Loading the hpo disease...")
-    for nr_diseases, disease_number in enumerate(disease_terms):
+    disease_objs = []
+    for disease_number in disease_terms:
         disease_info = disease_terms[disease_number]
         disease_id = "OMIM:{0}".format(disease_number)
         
@@ -78,10 +85,10 @@ def load_disease_terms(adapter, genemap_lines, genes, hpo_disease_lines):
             hpo_terms = hpo_diseases[disease_id]['hpo_terms']
             if hpo_terms:
                 disease_info['hpo_terms'] = hpo_terms
-        disease_obj = build_disease_term(disease_info, genes)
+        disease_objs.append(build_disease_term(disease_info, genes))
+
+    nr_diseases = adapter.load_disease_bulk(disease_objs)
 
-        adapter.load_disease_term(disease_obj)
-    
     logger.info("Loading done. Nr of diseases loaded {0}".format(nr_diseases))
     logger.info("Time to load diseases: {0}".format(datetime.now() - start_time))
     
\ No newline at end of file
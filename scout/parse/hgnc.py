@@ -1,4 +1,5 @@
 import logging
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
@@ -24,20 +25,20 @@ def parse_hgnc_line(line, header):
         hgnc_gene['description'] = raw_info['name']
         
         # We want to have the current symbol as an alias
-        aliases = set([hgnc_symbol, hgnc_symbol.upper()])
+        aliases = [hgnc_symbol, hgnc_symbol.upper()]
         # We then need to add both the previous symbols and
         # alias symbols
         previous_names = raw_info['prev_symbol']
         if previous_names:
-            for alias in previous_names.strip('"').split('|'):
-                aliases.add(alias)
+            aliases.extend(previous_names.strip('"').split('|'))
 
         alias_symbols = raw_info['alias_symbol']
         if alias_symbols:
-            for alias in alias_symbols.strip('"').split('|'):
-                aliases.add(alias)
+            aliases.extend(alias_symbols.strip('"').split('|'))
 
-        hgnc_gene['previous_symbols'] = list(aliases)
+        # Keep the aliases in file order so that the parsed genes are the
+        # same between runs
+        hgnc_gene['previous_symbols'] = list(OrderedDict.fromkeys(aliases))
 
         # We need the ensembl_gene_id to link the genes with ensembl
         hgnc_gene['ensembl_gene_id'] = raw_info.get('ensembl_gene_id')
@@ -4,7 +4,7 @@ import click
 import logging
 
 mimnr_pattern = re.compile("[0-9]{6,6}")
-entry_pattern = re.compile("\([1,2,3,4]\)")
+entry_pattern = re.compile(r"\([1-4]\)")
 
 mim_inheritance_terms = [
         'Autosomal recessive',
@@ -24,6 +24,11 @@ TERMS_MAPPER = {
      'Mitochondrial': 'MT'
    }
 
+# Characters removed from the ends of the description pieces
+DESCRIPTION_STRIP = '?\\{}'
+
+inheritance_pattern = re.compile('|'.join(re.escape(term) for term in mim_inheritance_terms))
+
 log = logging.getLogger(__name__)
 
 def parse_omim_line(line, header):
@@ -85,61 +90,86 @@ def parse_genemap2(lines):
             parsed_phenotypes = []
             # These information about the related phenotypes
             if parsed_entry.get('Phenotypes'):
-                # Each related phenotype is separated by ';'
-                for phenotype_info in parsed_entry['Phenotypes'].split(';'):
-                    phenotype_info = phenotype_info.lstrip()
-                    # print(phenotype_info)
-                    # Skip phenotype entries that are to uncertain
-                    if not phenotype_info.startswith('['):
-                        phenotype_status = 'established'
-                        # We will try to save the description
-                        description = ""
-                        if phenotype_info.startswith('{'):
-                            phenotype_status = 'susceptibility'
-                        if phenotype_info.startswith('?'):
-                            phenotype_status = 'provisional'
-                        
-                        splitted_info = phenotype_info.split(',')
-                        for i,text in enumerate(splitted_info):
-                            # Everything before ([1,2,3])
-                            # We check if we are in the part where the mim number exists
-                            match = entry_pattern.search(text)
-                            if not match:
-                                description += text.strip('?\{\}')
-                            else:
-                                # If we find the end of the entry
-                                mimnr_match = mimnr_pattern.search(phenotype_info)
-                                # Then if the entry have a mim number we choose that
-                                if mimnr_match:
-                                    phenotype_mim = int(mimnr_match.group())
-                                else:
-                                    phenotype_mim = parsed_entry['mim_number']
-                                    description += text[:-4]
-                                break
-                        # Find the inheritance
-                        inheritance = set()
-                        inheritance_text = ','.join(splitted_info[i:])
-                        for term in mim_inheritance_terms:
-                            if term in inheritance_text:
-                                
-                                inheritance.add(TERMS_MAPPER[term])
-                                gene_inheritance.add(TERMS_MAPPER[term])
-                        
-                        parsed_phenotypes.append(
-                                            {
-                                                'mim_number':phenotype_mim, 
-                                                'inheritance': inheritance,
-                                                'description': description,
-                                                'status': phenotype_status,
-                                            }
-                                        )
-            
+                parsed_phenotypes = parse_omim_phenotypes(
+                    parsed_entry['Phenotypes'], parsed_entry['mim_number'])
+                for phenotype in parsed_phenotypes:
+                    gene_inheritance.update(phenotype['inheritance'])
+
             parsed_entry['phenotypes'] = parsed_phenotypes
             parsed_entry['inheritance'] = gene_inheritance
                     
             yield parsed_entry
 
 
+def parse_omim_phenotypes(phenotypes_text, mim_number):
+    """Parse the Phenotypes field of a genemap2 entry
+
+    Each phenotype looks like '<description>, <mim number> (<key>), <inheritance>'
+    and they are separated by ';'. The description is everything before the
+    piece holding the mapping key, inheritance terms are searched for from
+    that piece and onwards.
+
+    Args:
+        phenotypes_text(str): The Phenotypes field, may be empty
+        mim_number(int): Mim number of the entry, used if a phenotype has none
+
+    Returns:
+        parsed_phenotypes(list(dict))
+    """
+    parsed_phenotypes = []
+    if not phenotypes_text:
+        return parsed_phenotypes
+
+    # Each related phenotype is separated by ';'
+    for phenotype_info in phenotypes_text.split(';'):
+        phenotype_info = phenotype_info.lstrip()
+        # Skip phenotype entries that are to uncertain
+        if phenotype_info.startswith('['):
+            continue
+        phenotype_status = 'established'
+        if phenotype_info.startswith('{'):
+            phenotype_status = 'susceptibility'
+        if phenotype_info.startswith('?'):
+            phenotype_status = 'provisional'
+
+        match = entry_pattern.search(phenotype_info)
+        if match:
+            # Start of the comma separated piece that holds the key
+            key_start = phenotype_info.rfind(',', 0, match.start()) + 1
+            description_pieces = phenotype_info[:key_start].split(',')[:-1]
+            # If the entry have a mim number we choose that
+            mimnr_match = mimnr_pattern.search(phenotype_info)
+        else:
+            key_start = phenotype_info.rfind(',') + 1
+            description_pieces = phenotype_info.split(',')
+            mimnr_match = None
+
+        description = ''.join([text.strip(DESCRIPTION_STRIP) for text in description_pieces])
+        if mimnr_match:
+            phenotype_mim = int(mimnr_match.group())
+        else:
+            phenotype_mim = mim_number
+            if match:
+                key_end = phenotype_info.find(',', match.end())
+                if key_end == -1:
+                    key_end = len(phenotype_info)
+                description += phenotype_info[key_start:key_end][:-4]
+
+        inheritance = set([TERMS_MAPPER[term] for term in
+                           inheritance_pattern.findall(phenotype_info, key_start)])
+
+        parsed_phenotypes.append(
+                            {
+                                'mim_number':phenotype_mim, 
+                                'inheritance': inheritance,
+                                'description': description,
+                                'status': phenotype_status,
+                            }
+                        )
+
+    return parsed_phenotypes
+
+
 def parse_mim2gene(lines):
     """Parse the file called mim2gene
     
@@ -241,46 +271,7 @@ def get_mim_genes(genemap_lines, mim2gene_lines):
         hgnc_genes(dict): A dictionary with hgnc_symbol as keys
     
     """
-    log.info("Get the mim genes")
-    
-    genes = {}
-    hgnc_genes = {}
-    
-    gene_nr = 0
-    no_hgnc = 0
-    
-    for entry in parse_mim2gene(mim2gene_lines):
-        if 'gene' in entry['entry_type']:
-            mim_nr = entry['mim_number']
-            gene_nr += 1
-            if not 'hgnc_symbol' in entry:
-                no_hgnc += 1
-            else:
-                genes[mim_nr] = entry
-    log.info("Numnber of genes without hgnc symbol %s", str(no_hgnc))
-    
-    for entry in parse_genemap2(genemap_lines):
-        mim_number = entry['mim_number']
-        inheritance = entry['inheritance']
-        phenotype_info = entry['phenotypes']
-        hgnc_symbol = entry['hgnc_symbol']
-        if mim_number in genes:
-            genes[mim_number]['inheritance'] = inheritance
-            genes[mim_number]['phenotypes'] = phenotype_info
-
-    for mim_nr in genes:
-        gene_info = genes[mim_nr]
-        hgnc_symbol = gene_info['hgnc_symbol']
-        
-        if hgnc_symbol in hgnc_genes:
-            existing_info = hgnc_genes[hgnc_symbol]
-            if not existing_info['phenotypes']:
-                hgnc_genes[hgnc_symbol] = gene_info
-            
-        else:
-            hgnc_genes[hgnc_symbol] = gene_info
-    
-    return hgnc_genes
+    return get_mim_info(genemap_lines, mim2gene_lines, phenotypes=False)[0]
     
 def get_mim_phenotypes(genemap_lines):
     """Get a dictionary with phenotypes
@@ -302,18 +293,56 @@ def get_mim_phenotypes(genemap_lines):
              'mim_number': int, # mim number of phenotype
         }
     """
-    # Set with all omim numbers that are phenotypes
-    # Parsed from mim2gene.txt
-    phenotype_mims = set()
+    return get_mim_info(genemap_lines, genes=False)[1]
+
+def get_mim_info(genemap_lines, mim2gene_lines=None, genes=True, phenotypes=True):
+    """Get the omim genes and the omim phenotypes from one pass over genemap2
+
+    genemap2 is large and its phenotype field is expensive to parse, so both
+    the gene view and the phenotype view are collected while streaming the
+    file once.
+
+    Args:
+        genemap_lines(iterable(str))
+        mim2gene_lines(iterable(str)): Needed for the genes
+        genes(bool): If the genes should be collected
+        phenotypes(bool): If the phenotypes should be collected
+
+    Returns:
+        hgnc_genes(dict): A dictionary with hgnc_symbol as keys, see get_mim_genes
+        phenotypes_found(dict): A dictionary with mim_numbers as keys, see
+                                get_mim_phenotypes
+    """
+    log.info("Get the mim genes and phenotypes")
     
+    mim_genes = {}
+    hgnc_genes = {}
     phenotypes_found = {}
-
+    
+    if genes:
+        no_hgnc = 0
+        for entry in parse_mim2gene(mim2gene_lines):
+            if 'gene' in entry['entry_type']:
+                if not 'hgnc_symbol' in entry:
+                    no_hgnc += 1
+                else:
+                    mim_genes[entry['mim_number']] = entry
+        log.info("Numnber of genes without hgnc symbol %s", str(no_hgnc))
+    
     # Genemap is a file with one entry per gene.
     # Each line hold a lot of information and in specific it
     # has information about the phenotypes that a gene is associated with
     # From this source we collect inheritane patterns and what hgnc symbols
     # a phenotype is associated with
     for entry in parse_genemap2(genemap_lines):
+        mim_number = entry['mim_number']
+        if mim_number in mim_genes:
+            mim_genes[mim_number]['inheritance'] = entry['inheritance']
+            mim_genes[mim_number]['phenotypes'] = entry['phenotypes']
+
+        if not phenotypes:
+            continue
+
         hgnc_symbol = entry['hgnc_symbol']
         for phenotype in entry['phenotypes']:
             mim_nr = phenotype['mim_number']
@@ -322,10 +351,24 @@ def get_mim_phenotypes(genemap_lines):
                 phenotype_entry['inheritance'] = phenotype_entry['inheritance'].union(phenotype['inheritance'])
                 phenotype_entry['hgnc_symbols'].add(hgnc_symbol)
             else:
-                phenotype['hgnc_symbols'] = set([hgnc_symbol])
-                phenotypes_found[mim_nr] = phenotype
+                # Copy so that the gene phenotypes are left untouched
+                phenotype_entry = dict(phenotype)
+                phenotype_entry['hgnc_symbols'] = set([hgnc_symbol])
+                phenotypes_found[mim_nr] = phenotype_entry
 
-    return phenotypes_found
+    for mim_nr in mim_genes:
+        gene_info = mim_genes[mim_nr]
+        hgnc_symbol = gene_info['hgnc_symbol']
+        
+        if hgnc_symbol in hgnc_genes:
+            existing_info = hgnc_genes[hgnc_symbol]
+            if not existing_info['phenotypes']:
+                hgnc_genes[hgnc_symbol] = gene_info
+            
+        else:
+            hgnc_genes[hgnc_symbol] = gene_info
+    
+    return hgnc_genes, phenotypes_found
     
 
 @click.command()
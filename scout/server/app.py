@@ -46,6 +46,16 @@ def create_app(config_file=None, config=None):
         # setup email logging of errors
         configure_email_logging(app)
 
+    @app.before_request
+    def start_request_cache():
+        # Reads are only remembered for requests that do not change data
+        if request.method in ('GET', 'HEAD'):
+            extensions.store.start_request_cache()
+
+    @app.teardown_request
+    def end_request_cache(exception=None):
+        extensions.store.end_request_cache()
+
     @app.before_request
     def check_user():
         if not app.config.get('LOGIN_DISABLED') and request.endpoint:
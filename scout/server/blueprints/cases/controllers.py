@@ -3,9 +3,8 @@ import itertools
 
 from flask import url_for
 from flask_mail import Message
-import query_phenomizer
 
-from scout.constants import (CASE_STATUSES, PHENOTYPE_GROUPS, COHORT_TAGS)
+from scout.constants import (CASE_STATUSES, PHENOTYPE_GROUPS, COHORT_TAGS, CLINSIG_MAP)
 from scout.models.event import VERBS_MAP
 from scout.server.utils import institute_and_case
 
@@ -18,10 +17,14 @@ def cases(store, case_query):
     """Preprocess case objects."""
     limit = 100
     case_groups = {status: [] for status in CASE_STATUSES}
-    for case_obj in case_query.limit(limit):
+    case_objs = list(case_query.limit(limit))
+    emails = set(itertools.chain.from_iterable(case_obj.get('assignees', []) for
+                                               case_obj in case_objs))
+    users = dict(zip(emails, store.users_by_ids(emails)))
+    for case_obj in case_objs:
         analysis_types = set(ind['analysis_type'] for ind in case_obj['individuals'])
         case_obj['analysis_types'] = list(analysis_types)
-        case_obj['assignees'] = [store.user(user_email) for user_email in
+        case_obj['assignees'] = [users[user_email] for user_email in
                                  case_obj.get('assignees', [])]
         case_groups[case_obj['status']].append(case_obj)
         case_obj['is_rerun'] = len(case_obj.get('analyses', [])) > 0
@@ -42,12 +45,13 @@ def case(store, institute_obj, case_obj):
         individual['phenotype_human'] = PHENOTYPE_MAP.get(individual['phenotype'])
         case_obj['individual_ids'].append(individual['individual_id'])
 
-    case_obj['assignees'] = [store.user(user_email) for user_email in
-                             case_obj.get('assignees', [])]
-    suspects = [store.variant(variant_id) or variant_id for variant_id in
-                case_obj.get('suspects', [])]
-    causatives = [store.variant(variant_id) or variant_id for variant_id in
-                  case_obj.get('causatives', [])]
+    case_obj['assignees'] = store.users_by_ids(case_obj.get('assignees', []))
+    suspect_ids = case_obj.get('suspects', [])
+    suspects = [variant_obj or variant_id for variant_id, variant_obj in
+                zip(suspect_ids, store.variants_by_ids(suspect_ids))]
+    causative_ids = case_obj.get('causatives', [])
+    causatives = [variant_obj or variant_id for variant_id, variant_obj in
+                  zip(causative_ids, store.variants_by_ids(causative_ids))]
 
     distinct_genes = set()
     case_obj['panel_names'] = []
@@ -65,15 +69,14 @@ def case(store, institute_obj, case_obj):
                                 .format(hpo_term['phenotype_id']))
 
     # other collaborators than the owner of the case
-    o_collaborators = [store.institute(collab_id) for collab_id in case_obj['collaborators'] if
-                       collab_id != case_obj['owner']]
+    o_collaborators = store.institutes_by_ids(
+        [collab_id for collab_id in case_obj['collaborators'] if collab_id != case_obj['owner']],
+        projection=['display_name'])
     case_obj['o_collaborators'] = [(collab_obj['_id'], collab_obj['display_name']) for
-                                   collab_obj in o_collaborators]
+                                   collab_obj in o_collaborators if collab_obj]
 
-    irrelevant_ids = ('cust000', institute_obj['_id'])
-    collab_ids = [(collab['_id'], collab['display_name']) for collab in store.institutes() if
-                  (collab['_id'] not in irrelevant_ids) and
-                  (collab['_id'] not in case_obj['collaborators'])]
+    irrelevant_ids = ['cust000', institute_obj['_id']] + list(case_obj['collaborators'])
+    collab_ids = store.institute_names(exclude_ids=irrelevant_ids)
 
     events = list(store.events(institute_obj, case=case_obj))
     for event in events:
@@ -89,10 +92,33 @@ def case(store, institute_obj, case_obj):
         'causatives': causatives,
         'collaborators': collab_ids,
         'cohort_tags': COHORT_TAGS,
+        'variant_stats': variant_stats(store.variant_stats(case_obj['_id'])),
     }
     return data
 
 
+def variant_stats(stats_obj):
+    """Prepare the materialised variant statistics of a case for display."""
+    if stats_obj is None:
+        return []
+    groups = []
+    for key in sorted(stats_obj):
+        if key in ('_id', 'updated_at'):
+            continue
+        stats = stats_obj[key]
+        variant_type, category = key.split('_', 1)
+        clinsig = [(CLINSIG_MAP.get(int(value), 'other'), count) for value, count in
+                   sorted(stats.get('clinsig', {}).items(), key=lambda item: -int(item[0]))]
+        groups.append({
+            'variant_type': variant_type,
+            'category': category,
+            'nr_variants': stats['variants'],
+            'nr_genes': len(stats.get('genes', {})),
+            'clinsig': clinsig,
+        })
+    return groups
+
+
 def update_synopsis(store, institute_obj, case_obj, user_obj, new_synopsis):
     """Update synopsis."""
     # create event only if synopsis was actually changed
@@ -103,17 +129,21 @@ def update_synopsis(store, institute_obj, case_obj, user_obj, new_synopsis):
                               content=new_synopsis)
 
 
-def hpo_diseases(username, password, hpo_ids, p_value_treshold=1):
-    """Return the list of HGNC symbols that match annotated HPO terms.
+def hpo_diseases(store, hpo_ids, limit=100):
+    """Return the OMIM diseases that best match a set of HPO terms.
+
+    The diseases are ranked locally from the HPO terms of the disease terms.
 
     Args:
-        username (str): username to use for phenomizer connection
-        password (str): password to use for phenomizer connection
+        store (MongoAdapter)
+        hpo_ids (list(str)): HPO terms of the case
+        limit (int): maximum number of diseases
 
     Returns:
-        query_result: a generator of dictionaries on the form
+        diseases: a list of dictionaries on the form
         {
-            'p_value': float,
+            'p_value': None,
+            'score': float,
             'disease_source': str,
             'disease_nr': int,
             'gene_symbols': list(str),
@@ -121,14 +151,30 @@ def hpo_diseases(username, password, hpo_ids, p_value_treshold=1):
             'raw_line': str
         }
     """
-    # skip querying Phenomizer unless at least one HPO terms exists
-    try:
-        results = query_phenomizer.query(username, password, *hpo_ids)
-        diseases = [result for result in results
-                    if result['p_value'] <= p_value_treshold]
-        return diseases
-    except SystemExit:
-        return None
+    ranked_diseases = store.rank_diseases(hpo_ids, limit=limit)
+    disease_objs = store.disease_terms_by_ids(disease_id for disease_id, _ in ranked_diseases)
+    hgnc_ids = set(itertools.chain.from_iterable(disease_obj.get('genes', []) for
+                                                 disease_obj in disease_objs if disease_obj))
+    hgnc_symbols = store.hgnc_symbols(hgnc_ids)
+
+    diseases = []
+    for (disease_id, score), disease_obj in zip(ranked_diseases, disease_objs):
+        if disease_obj is None:
+            continue
+        disease_source, disease_nr = disease_id.split(':', 1)
+        gene_symbols = [hgnc_symbols[hgnc_id] for hgnc_id in disease_obj.get('genes', [])
+                        if hgnc_id in hgnc_symbols]
+        diseases.append({
+            'p_value': None,
+            'score': round(score, 3),
+            'disease_source': disease_source,
+            'disease_nr': int(disease_nr),
+            'gene_symbols': gene_symbols,
+            'description': disease_obj['description'],
+            'raw_line': '\t'.join([disease_id, disease_obj['description'],
+                                   ', '.join(gene_symbols)]),
+        })
+    return diseases
 
 
 def rerun(store, mail, current_user, institute_id, case_name, sender, recipient):
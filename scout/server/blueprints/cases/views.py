@@ -18,9 +18,12 @@ cases_bp = Blueprint('cases', __name__, template_folder='templates',
 @templated('cases/index.html')
 def index():
     """Display a list of all user institutes."""
-    institute_objs = user_institutes(store, current_user)
-    institutes_count = ((institute_obj, store.cases(collaborator=institute_obj['_id']).count())
-                        for institute_obj in institute_objs if institute_obj)
+    institute_objs = [institute_obj for institute_obj in
+                      user_institutes(store, current_user) if institute_obj]
+    nr_cases = store.nr_cases_by_institute(institute_obj['_id'] for
+                                           institute_obj in institute_objs)
+    institutes_count = ((institute_obj, nr_cases[institute_obj['_id']])
+                        for institute_obj in institute_objs)
     return dict(institutes=institutes_count)
 
 
@@ -49,16 +52,12 @@ def case(institute_id, case_name):
 @templated('cases/causatives.html')
 def causatives(institute_id):
     institute_obj = institute_and_case(store, institute_id)
-    variants = store.check_causatives(institute_obj=institute_obj)
+    variants = list(store.check_causatives(institute_obj=institute_obj))
+    case_ids = set(variant_obj['case_id'] for variant_obj in variants)
+    all_cases = dict(zip(case_ids, store.cases_by_ids(case_ids)))
     all_variants = {}
-    all_cases = {}
     for variant_obj in variants:
-        if variant_obj['case_id'] not in all_cases:
-            case_obj = store.case(variant_obj['case_id'])
-            all_cases[variant_obj['case_id']] = case_obj
-        else:
-            case_obj = all_cases[variant_obj['case_id']]
-
+        case_obj = all_cases[variant_obj['case_id']]
         if variant_obj['variant_id'] not in all_variants:
             all_variants[variant_obj['variant_id']] = []
         all_variants[variant_obj['variant_id']].append((case_obj, variant_obj))
@@ -134,13 +133,11 @@ def phenotypes_actions(institute_id, case_name):
         for hpo_id in hpo_ids:
             # DELETE a phenotype from the list
             store.remove_phenotype(institute_obj, case_obj, user_obj, case_url, hpo_id)
-    elif action == 'PHENOMIZER':
+    elif action == 'DISEASES':
         if len(hpo_ids) == 0:
             hpo_ids = [term['phenotype_id'] for term in case_obj.get('phenotype_terms', [])]
 
-        username = current_app.config['PHENOMIZER_USERNAME']
-        password = current_app.config['PHENOMIZER_PASSWORD']
-        diseases = controllers.hpo_diseases(username, password, hpo_ids)
+        diseases = controllers.hpo_diseases(store, hpo_ids)
         return render_template('cases/diseases.html', diseases=diseases,
                                institute=institute_obj, case=case_obj)
 
@@ -231,7 +228,7 @@ def hpoterms():
     query = request.args.get('query')
     if query is None:
         return abort(500)
-    terms = store.hpo_terms(query=query).limit(8)
+    terms = store.hpo_terms(query=query, limit=8)
     json_terms = [{'name': '{} | {}'.format(term['_id'], term['description']),
                    'id': term['_id']} for term in terms]
     return jsonify(json_terms)
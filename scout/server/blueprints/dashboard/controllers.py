@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# {(<database name>, <institute_id>): (<computed at>, <dashboard info>)}
+CACHE = {}
+REFRESHING = set()
+LOCK = threading.Lock()
+
+
+def get_dashboard_info(store, institute_id=None):
+    """Format the case statistics for the dashboard."""
+    stats = store.case_stats(institute_id=institute_id)
+    total_cases = stats['total']
+    if total_cases == 0:
+        return None
+
+    cases = [{'status': 'all', 'count': total_cases, 'percent': 1}]
+    for status, count in stats['status'].items():
+        cases.append({'status': status, 'count': count, 'percent': count / total_cases})
+
+    analysis_types = [{'name': name, 'count': count} for name, count in
+                      stats['analysis_types'].items()]
+
+    overview = []
+    for title, key in [('Phenotype terms', 'phenotype_terms'),
+                       ('Causative variants', 'causatives'),
+                       ('Pinned variants', 'suspects'),
+                       ('Cohort tag', 'cohorts')]:
+        overview.append({
+            'title': title,
+            'count': stats[key],
+            'percent': stats[key] / total_cases,
+        })
+
+    return {
+        'cases': cases,
+        'analysis_types': analysis_types,
+        'overview': overview,
+    }
+
+
+def _refresh(store, key, institute_id):
+    """Recompute the dashboard info for a cache entry."""
+    try:
+        data = get_dashboard_info(store, institute_id=institute_id)
+        with LOCK:
+            CACHE[key] = (time.time(), data)
+    except Exception as error:
+        log.warning("Could not refresh dashboard: %s", error)
+    finally:
+        with LOCK:
+            REFRESHING.discard(key)
+
+
+def dashboard_info(store, institute_id=None, ttl=300):
+    """Return the dashboard info, cached for ttl seconds.
+
+    When the cached info is older than ttl it is still returned while new
+    info is computed in a background thread. Only the first request, when
+    nothing is cached, waits for the statistics.
+
+    Args:
+        store(MongoAdapter)
+        institute_id(str): Only count the cases of this institute
+        ttl(int): Seconds to keep the info, 0 to always recompute
+
+    Returns:
+        data(dict): see get_dashboard_info, None if there are no cases
+    """
+    if not ttl:
+        return get_dashboard_info(store, institute_id=institute_id)
+
+    key = (store.db.name, institute_id)
+    with LOCK:
+        entry = CACHE.get(key)
+        if entry is None:
+            start_refresh = False
+        else:
+            start_refresh = (time.time() - entry[0] > ttl) and key not in REFRESHING
+            if start_refresh:
+                REFRESHING.add(key)
+
+    if entry is None:
+        data = get_dashboard_info(store, institute_id=institute_id)
+        # Do not keep people waiting for the first cases to show up
+        if data is not None:
+            with LOCK:
+                CACHE[key] = (time.time(), data)
+        return data
+
+    if start_refresh:
+        log.debug("Refreshing dashboard info in the background")
+        thread = threading.Thread(target=_refresh, args=(store, key, institute_id))
+        thread.daemon = True
+        thread.start()
+    return entry[1]
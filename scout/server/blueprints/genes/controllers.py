@@ -14,9 +14,12 @@ def gene(store, hgnc_id):
             res['description'] = record['description']
             res['ensembl_id'] = record['ensembl_id']
             
-            for transcript in record['transcripts']:
-                transcript['position'] = ("{chrom}:{this[start]}-{this[end]}"
-                                          .format(chrom=record['chromosome'], this=transcript))
+            # The transcripts are shared with the gene cache so new ones are made
+            record['transcripts'] = [
+                dict(transcript, position="{chrom}:{this[start]}-{this[end]}"
+                     .format(chrom=record['chromosome'], this=transcript))
+                for transcript in record['transcripts']
+            ]
     
     # If none of the genes where found
     if not any(res.values()):
@@ -26,9 +29,9 @@ def gene(store, hgnc_id):
 
 
 
-def genes_to_json(store, query):
+def genes_to_json(store, query, limit=20):
     """Fetch matching genes and convert to JSON."""
-    gene_query = store.hgnc_genes(query, search=True)
+    gene_query = store.hgnc_genes(query, search=True, limit=limit)
     json_terms = [{'name': "{} | {} ({})".format(gene['hgnc_id'], gene['hgnc_symbol'],
                                                  ', '.join(gene['aliases'])),
                    'id': gene['hgnc_id']} for gene in gene_query]
@@ -27,8 +27,8 @@ def gene(hgnc_id=None, hgnc_symbol=None):
     """Render information about a gene."""
     if hgnc_symbol:
         query = store.hgnc_genes(hgnc_symbol)
-        if query.count() == 1:
-            hgnc_id = query.first()['hgnc_id']
+        if len(query) == 1:
+            hgnc_id = query[0]['hgnc_id']
         else:
             return redirect(url_for('.genes', query=hgnc_symbol))
     try:
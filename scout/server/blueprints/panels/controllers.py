@@ -39,17 +39,21 @@ def update_panel(store, panel_name, csv_lines):
         flash(error.args[0], 'danger')
         return None
 
+    hgnc_ids = [new_gene['hgnc_id'] for new_gene in new_genes if new_gene['hgnc_id']]
+    hgnc_genes = store.genes_by_identifiers(hgnc_ids)
+    actions = []
     for new_gene in new_genes:
         if not new_gene['hgnc_id']:
             flash("gene missing hgnc id: {}".format(new_gene['hgnc_symbol']),
                   'danger')
             continue
 
-        gene_obj = store.hgnc_gene(new_gene['hgnc_id'])
-        if gene_obj is None:
+        gene_objs = hgnc_genes.get(new_gene['hgnc_id'])
+        if not gene_objs:
             flash("gene not found: {} - {}".format(new_gene['hgnc_id'], new_gene['hgnc_symbol']),
                   'danger')
             continue
+        gene_obj = gene_objs[0]
         if new_gene['hgnc_symbol'] and gene_obj['hgnc_symbol'] != new_gene['hgnc_symbol']:
             flash("symbol mis-match: {} | {}".format(gene_obj['hgnc_symbol'],
                   new_gene['hgnc_symbol']), 'warning')
@@ -61,7 +65,9 @@ def update_panel(store, panel_name, csv_lines):
             'inheritance_models': new_gene['inheritance_models'],
             'database_entry_version': new_gene['database_entry_version'],
         }
-        store.add_pending(panel_obj, gene_obj, action=action, info=info_data)
+        actions.append((gene_obj, action, info_data))
+    if actions:
+        store.add_pending_actions(panel_obj, actions)
     return panel_obj
 
 
@@ -25,9 +25,14 @@ def variants(store, institute_obj, case_obj, variants_query, page=1, per_page=50
     skip_count = per_page * max(page - 1, 0)
     more_variants = True if variant_count > (skip_count + per_page) else False
 
+    variant_objs = list(variants_query.skip(skip_count).limit(per_page))
+    comments = store.variants_comments(institute_obj, (variant_obj['variant_id'] for
+                                                       variant_obj in variant_objs))
+
     return {
-        'variants': (parse_variant(store, institute_obj, case_obj, variant_obj, update=True) for
-                     variant_obj in variants_query.skip(skip_count).limit(per_page)),
+        'variants': (parse_variant(store, institute_obj, case_obj, variant_obj, update=True,
+                                   comments=comments[variant_obj['variant_id']]) for
+                     variant_obj in variant_objs),
         'more_variants': more_variants,
     }
 
@@ -37,9 +42,14 @@ def sv_variants(store, institute_obj, case_obj, variants_query, page=1, per_page
     skip_count = (per_page * max(page - 1, 0))
     more_variants = True if variants_query.count() > (skip_count + per_page) else False
 
+    variant_objs = list(variants_query.skip(skip_count).limit(per_page))
+    comments = store.variants_comments(institute_obj, (variant_obj['variant_id'] for
+                                                       variant_obj in variant_objs))
+
     return {
-        'variants': (parse_variant(store, institute_obj, case_obj, variant) for variant in
-                     variants_query.skip(skip_count).limit(per_page)),
+        'variants': (parse_variant(store, institute_obj, case_obj, variant,
+                                   comments=comments[variant['variant_id']]) for
+                     variant in variant_objs),
         'more_variants': more_variants,
     }
 
@@ -79,16 +89,20 @@ def sv_variant(store, institute_id, case_name, variant_id):
     }
 
 
-def parse_variant(store, institute_obj, case_obj, variant_obj, update=False):
-    """Parse information about variants."""
-    has_changed = False
+def parse_variant(store, institute_obj, case_obj, variant_obj, update=False, comments=None):
+    """Parse information about variants.
+
+    The variant might be fetched with the 'list' projection so changes are
+    written back field by field instead of replacing the whole document.
+    """
+    updates = {}
     compounds = variant_obj.get('compounds', [])
     if compounds:
         # Check if we need to add compound information
         if 'not_loaded' not in compounds[0]:
             new_compounds = store.update_compounds(variant_obj)
             variant_obj['compounds'] = new_compounds
-            has_changed = True
+            updates['compounds'] = new_compounds
 
         # sort compounds on combined rank score
         variant_obj['compounds'] = sorted(variant_obj['compounds'],
@@ -96,18 +110,20 @@ def parse_variant(store, institute_obj, case_obj, variant_obj, update=False):
 
     variant_genes = variant_obj.get('genes')
     if variant_genes is not None:
-        for gene_obj in variant_genes:
+        for index, gene_obj in enumerate(variant_genes):
             if gene_obj.get('hgnc_symbol') is None:
                 hgnc_gene = store.hgnc_gene(gene_obj['hgnc_id'])
                 if hgnc_gene:
-                    has_changed = True
                     gene_obj['hgnc_symbol'] = hgnc_gene['hgnc_symbol']
+                    updates["genes.{}.hgnc_symbol".format(index)] = hgnc_gene['hgnc_symbol']
 
-    if update and has_changed:
-        variant_obj = store.update_variant(variant_obj)
+    if update and updates:
+        store.update_variant_fields(variant_obj['_id'], updates)
 
-    variant_obj['comments'] = store.events(institute_obj, case=case_obj,
-                                           variant_id=variant_obj['variant_id'], comments=True)
+    if comments is None:
+        comments = store.events(institute_obj, case=case_obj,
+                                variant_id=variant_obj['variant_id'], comments=True)
+    variant_obj['comments'] = comments
 
     if variant_genes:
         variant_obj.update(get_predictions(variant_genes))
@@ -249,10 +265,7 @@ def variant(store, institute_obj, case_obj, variant_id):
         variant_models = set(model.split('_', 1)[0] for model in variant_obj['genetic_models'])
         variant_obj['is_matching_inheritance'] = variant_models & gene_models
 
-    evaluations = []
-    for evaluation_obj in store.get_evaluations(variant_obj):
-        evaluation(store, evaluation_obj)
-        evaluations.append(evaluation_obj)
+    evaluations = fill_evaluations(store, list(store.get_evaluations(variant_obj)))
     return {
         'variant': variant_obj,
         'causatives': other_causatives,
@@ -540,11 +553,15 @@ def cancer_variants(store, request_args, institute_id, case_name):
     institute_obj, case_obj = institute_and_case(store, institute_id, case_name)
     form = CancerFiltersForm(request_args)
     variants_query = store.variants(case_obj['_id'], category='cancer', query=form.data).limit(50)
+    variant_objs = list(variants_query)
+    comments = store.variants_comments(institute_obj, (variant_obj['variant_id'] for
+                                                       variant_obj in variant_objs))
     data = dict(
         institute=institute_obj,
         case=case_obj,
-        variants=(parse_variant(store, institute_obj, case_obj, variant, update=True) for
-                  variant in variants_query),
+        variants=(parse_variant(store, institute_obj, case_obj, variant, update=True,
+                                comments=comments[variant['variant_id']]) for
+                  variant in variant_objs),
         form=form,
         variant_type=request_args.get('variant_type', 'clinical'),
     )
@@ -579,13 +596,30 @@ def variant_acmg_post(store, institute_id, case_name, variant_id, user_email, cr
 
 def evaluation(store, evaluation_obj):
     """Fetch and fill-in evaluation object."""
-    evaluation_obj['institute'] = store.institute(evaluation_obj['institute_id'])
-    evaluation_obj['case'] = store.case(evaluation_obj['case_id'])
-    evaluation_obj['variant'] = store.variant(evaluation_obj['variant_specific'])
-    evaluation_obj['criteria'] = {criterion['term']: criterion for criterion in
-                                  evaluation_obj['criteria']}
-    evaluation_obj['classification'] = ACMG_COMPLETE_MAP[evaluation_obj['classification']]
-    return evaluation_obj
+    return fill_evaluations(store, [evaluation_obj])[0]
+
+
+def fill_evaluations(store, evaluation_objs):
+    """Fetch and fill-in evaluation objects.
+
+    The institutes, cases and variants are fetched with one query each no
+    matter how many evaluations there are.
+    """
+    institute_ids = set(evaluation_obj['institute_id'] for evaluation_obj in evaluation_objs)
+    case_ids = set(evaluation_obj['case_id'] for evaluation_obj in evaluation_objs)
+    variant_ids = set(evaluation_obj['variant_specific'] for evaluation_obj in evaluation_objs)
+    institutes = dict(zip(institute_ids, store.institutes_by_ids(institute_ids)))
+    cases = dict(zip(case_ids, store.cases_by_ids(case_ids)))
+    variants = dict(zip(variant_ids, store.variants_by_ids(variant_ids)))
+
+    for evaluation_obj in evaluation_objs:
+        evaluation_obj['institute'] = institutes[evaluation_obj['institute_id']]
+        evaluation_obj['case'] = cases[evaluation_obj['case_id']]
+        evaluation_obj['variant'] = variants[evaluation_obj['variant_specific']]
+        evaluation_obj['criteria'] = {criterion['term']: criterion for criterion in
+                                      evaluation_obj['criteria']}
+        evaluation_obj['classification'] = ACMG_COMPLETE_MAP[evaluation_obj['classification']]
+    return evaluation_objs
 
 
 def upload_panel(store, institute_id, case_name, stream):
@@ -594,9 +628,10 @@ def upload_panel(store, institute_id, case_name, stream):
     raw_symbols = [line.strip().split('\t')[0] for line in stream if
                    line and not line.startswith('#')]
     # check if supplied gene symbols exist
+    hgnc_genes = store.genes_by_identifiers(raw_symbols)
     hgnc_symbols = []
     for raw_symbol in raw_symbols:
-        if store.hgnc_genes(raw_symbol).count() == 0:
+        if not hgnc_genes[raw_symbol]:
             flash("HGNC symbol not found: {}".format(raw_symbol), 'warning')
         else:
             hgnc_symbols.append(raw_symbol)
@@ -50,7 +50,7 @@ def variants(institute_id, case_name):
                     flash("HGNC id not found: {}".format(hgnc_symbol), 'warning')
                 else:
                     hgnc_symbols.append(hgnc_gene['hgnc_symbol'])
-            elif store.hgnc_genes(hgnc_symbol).count() == 0:
+            elif not store.hgnc_genes(hgnc_symbol):
                 flash("HGNC symbol not found: {}".format(hgnc_symbol), 'warning')
             elif is_clinical and (hgnc_symbol not in clinical_symbols):
                 flash("Gene not included in clinical list: {}".format(hgnc_symbol), 'warning')
@@ -64,7 +64,7 @@ def variants(institute_id, case_name):
                                case_obj['dynamic_gene_list']))
         form.hgnc_symbols.data = hpo_symbols
 
-    variants_query = store.variants(case_obj['_id'], query=form.data)
+    variants_query = store.variants(case_obj['_id'], query=form.data, projection='list')
     data = controllers.variants(store, institute_obj, case_obj, variants_query, page)
 
     return dict(institute=institute_obj, case=case_obj, form=form,
@@ -100,7 +100,8 @@ def sv_variants(institute_id, case_name):
     form.gene_panels.choices = panel_choices
     query = form.data
     query['variant_type'] = variant_type
-    variants_query = store.variants(case_obj['_id'], category='sv', query=form.data)
+    variants_query = store.variants(case_obj['_id'], category='sv', query=form.data,
+                                    projection='list')
     data = controllers.sv_variants(store, institute_obj, case_obj, variants_query, page)
     return dict(institute=institute_obj, case=case_obj, variant_type=variant_type,
                 form=form, severe_so_terms=SEVERE_SO_TERMS, page=page, **data)
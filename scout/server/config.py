@@ -22,3 +22,6 @@ ACCEPT_LANGUAGES = ['en', 'sv']
 
 # FEATURE FLAGS
 SHOW_CAUSATIVES = False
+
+# Seconds to keep the dashboard statistics before they are refreshed
+DASHBOARD_CACHE_TTL = 300
@@ -0,0 +1,245 @@
+import gzip
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    """A bounded, thread safe least recently used cache
+
+    Entries can optionally expire after ttl seconds. This is used to keep
+    reference data, that rarely changes, in memory between requests.
+
+    Args:
+        maxsize(int): The maximum number of entries to keep
+        ttl(int): Number of seconds before an entry expires, None for never
+    """
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value for key or default if not cached
+
+        Args:
+            key(hashable)
+            default
+
+        Returns:
+            value
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Add a value to the cache, removing the oldest entry if full
+
+        Args:
+            key(hashable)
+            value
+        """
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Remove entries from the cache
+
+        Args:
+            predicate(callable): Remove the keys where predicate(key) is true.
+                                 If None all entries are removed.
+
+        Returns:
+            nr_removed(int)
+        """
+        with self._lock:
+            if predicate is None:
+                nr_removed = len(self._data)
+                self._data.clear()
+            else:
+                keys = [key for key in self._data if predicate(key)]
+                for key in keys:
+                    del self._data[key]
+                nr_removed = len(keys)
+        log.debug("Removed %s entries from cache", nr_removed)
+        return nr_removed
+
+    def stats(self):
+        """Return statistics about the cache usage
+
+        Returns:
+            stats(dict): {'hits': int, 'misses': int, 'size': int, 'maxsize': int}
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def default_cache_dir():
+    """Return the directory for cached resources
+
+    Set the environment variable SCOUT_RESOURCE_CACHE to change the
+    directory, or to an empty string to not use a cache.
+
+    Returns:
+        cache_dir(str): None if caching is turned off
+    """
+    default = os.path.join(os.path.expanduser('~'), '.cache', 'scout')
+    return os.environ.get('SCOUT_RESOURCE_CACHE', default) or None
+
+
+def file_digest(path):
+    """Return the sha256 hex digest of the content of a file
+
+    Args:
+        path(str)
+
+    Returns:
+        digest(str)
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file_handle:
+        for chunk in iter(lambda: file_handle.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DiskCache(object):
+    """Stores python objects on disk under a content key
+
+    The objects are pickled and gzipped, one file per key. A key is built
+    from the digests of the input files so a changed input gives a new key.
+    Entries that are not used for max_age seconds, and the least recently
+    used entries above max_entries, are deleted when a new entry is written.
+
+    Args:
+        directory(str): Where the cached files are stored
+        max_entries(int): The maximum number of entries to keep
+        max_age(int): Number of seconds an unused entry is kept
+    """
+
+    def __init__(self, directory, max_entries=20, max_age=30 * 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+    @staticmethod
+    def key(*parts):
+        """Return a key for the parts, like a name and some file digests"""
+        return hashlib.sha256('\t'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, "{0}.pkl.gz".format(key))
+
+    def get(self, key, default=None):
+        """Return the cached object for key or default if there is none
+
+        Args:
+            key(str)
+            default
+
+        Returns:
+            value
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return default
+        try:
+            with gzip.open(path, 'rb') as file_handle:
+                value = pickle.load(file_handle)
+            # Mark the entry as used so that it is not pruned
+            os.utime(path)
+            return value
+        except (OSError, EOFError, pickle.UnpicklingError) as err:
+            log.warning("Could not read cached file %s: %s", path, err)
+            return default
+
+    def set(self, key, value):
+        """Store an object on disk
+
+        The file is written to a temporary name and then moved so that a
+        partly written file is never read.
+
+        Args:
+            key(str)
+            value
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as raw_handle:
+                with gzip.GzipFile(fileobj=raw_handle, mode='wb', compresslevel=1) as file_handle:
+                    pickle.dump(value, file_handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        log.debug("Cached %s", self._path(key))
+        self.prune()
+
+    def prune(self):
+        """Delete the entries that are too old or too many
+
+        Returns:
+            nr_removed(int)
+        """
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(('.pkl.gz', '.tmp')):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+
+        oldest = time.time() - self.max_age
+        nr_removed = 0
+        nr_kept = 0
+        for modified, path in entries:
+            if modified >= oldest:
+                # Temporary files that are not old may still be written to
+                if path.endswith('.tmp'):
+                    continue
+                if nr_kept < self.max_entries:
+                    nr_kept += 1
+                    continue
+            try:
+                os.remove(path)
+                nr_removed += 1
+            except OSError as err:
+                log.warning("Could not remove cached file %s: %s", path, err)
+        if nr_removed:
+            log.info("Removed %s old files from the cache in %s", nr_removed, self.directory)
+        return nr_removed
@@ -23,7 +23,7 @@ def get_hgnc_id(gene_info, adapter):
         true_id = int(hgnc_id)
     else:
         gene_result = adapter.hgnc_genes(hgnc_symbol)
-        if gene_result.count() == 0:
+        if not gene_result:
             raise Exception("No gene could be found for {}".format(hgnc_symbol))
         for gene in gene_result:
             if hgnc_symbol.upper() == gene.hgnc_symbol.upper():
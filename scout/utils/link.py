@@ -1,5 +1,7 @@
 import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 
 from pprint import pprint as pp
 
@@ -7,10 +9,25 @@ from scout.parse.hgnc import parse_hgnc_genes
 from scout.parse.ensembl import parse_ensembl_transcripts
 from scout.parse.exac import parse_exac_genes
 from scout.parse.hpo import get_incomplete_penetrance_genes
-from scout.parse.omim import get_mim_genes
+from scout.parse.omim import (get_mim_genes, get_mim_info)
+from scout.utils.handle import get_file_handle
+from scout.utils.cache import (DiskCache, file_digest)
 
 log = logging.getLogger(__name__)
 
+# The files needed for each parsed resource, keys of the resource paths
+RESOURCE_FILES = {
+    'hgnc': ('hgnc',),
+    'ensembl': ('ensembl',),
+    'exac': ('exac',),
+    'omim': ('genemap', 'mim2gene'),
+    'hpo': ('hpo',),
+}
+
+# Change this when the parsed or linked genes change so that old cached
+# results are not used
+CACHE_VERSION = 5
+
 
 def genes_by_alias(hgnc_genes):
     """Return a dictionary with hgnc symbols as keys
@@ -41,12 +58,13 @@ def genes_by_alias(hgnc_genes):
             true_id = None
             if alias == hgnc_symbol:
                 true_id = hgnc_id
+            alias = alias.upper()
             if alias in alias_genes:
-                alias_genes[alias.upper()]['ids'].add(hgnc_id)
+                alias_genes[alias]['ids'].add(hgnc_id)
                 if true_id:
-                    alias_genes[alias.upper()]['true_id'] = hgnc_id
+                    alias_genes[alias]['true_id'] = hgnc_id
             else:
-                alias_genes[alias.upper()] = {
+                alias_genes[alias] = {
                     'true_id': true_id,
                     'ids': set([hgnc_id])
                 }
@@ -113,11 +131,149 @@ def add_ensembl_info(gene_info, ensembl_transcripts):
 
     for transcript_id in transcripts_dict:
         transcript_info = transcripts_dict[transcript_id]
-        transcript_info['refseq'] = list(transcript_info['refseq'])
+        transcript_info['refseq'] = sorted(transcript_info['refseq'])
         gene_info['transcripts'].append(transcripts_dict[transcript_id])
 
 
 
+def parse_resource(resource, paths):
+    """Parse one gene resource from files
+
+    This is run in the worker processes of link_genes_parallel so the parsed
+    resource is returned as a list, dict or set. The omim resource is a tuple
+    with the omim genes and the omim phenotypes since both are collected in
+    the same pass over genemap2.
+
+    Args:
+        resource(str): One of RESOURCE_FILES
+        paths(tuple(str)): The files of the resource, in the order of RESOURCE_FILES
+
+    Returns:
+        parsed resource
+    """
+    handles = [get_file_handle(path) for path in paths]
+    try:
+        if resource == 'hgnc':
+            return list(parse_hgnc_genes(handles[0]))
+        if resource == 'ensembl':
+            return list(parse_ensembl_transcripts(handles[0]))
+        if resource == 'exac':
+            return list(parse_exac_genes(handles[0]))
+        if resource == 'omim':
+            return get_mim_info(genemap_lines=handles[0], mim2gene_lines=handles[1])
+        if resource == 'hpo':
+            return get_incomplete_penetrance_genes(handles[0])
+    finally:
+        for handle in handles:
+            handle.close()
+    raise ValueError("Unknown gene resource {0}".format(resource))
+
+
+def link_genes_parallel(resource_paths, processes=None, cache_dir=None,
+                        with_phenotypes=False):
+    """Parse the gene resources of one or more builds in parallel and link them
+
+    Every resource file is parsed in its own worker process. Files that are
+    used for several builds, like the hgnc file, are only parsed once.
+
+    With a cache directory the parsed resources and the linked genes are
+    stored on disk, keyed by the content of the files, and reused as long as
+    the files are unchanged.
+
+        Args:
+            resource_paths(dict): {<build>: {'hgnc': str, 'ensembl': str,
+                                  'exac': str, 'mim2gene': str, 'genemap': str,
+                                  'hpo': str}}
+            processes(int): Number of worker processes, default is the number
+                            of cpus. With 1 the files are parsed in this process.
+            cache_dir(str): Directory for cached results
+            with_phenotypes(bool): Also return the omim phenotypes, that are
+                                   parsed together with the omim genes
+
+        Returns:
+            genes(dict): {<build>: <genes as returned by link_genes>}
+            mim_phenotypes(dict): Only with with_phenotypes, the omim phenotypes
+                                  as returned by get_mim_phenotypes
+    """
+    cache = DiskCache(cache_dir) if cache_dir else None
+    digests = {}
+
+    def task_key(task):
+        resource, paths = task
+        for path in paths:
+            if path not in digests:
+                digests[path] = file_digest(path)
+        return DiskCache.key(CACHE_VERSION, resource, *(digests[path] for path in paths))
+
+    def build_tasks(paths):
+        return [(resource, tuple(paths[key] for key in file_keys))
+                for resource, file_keys in sorted(RESOURCE_FILES.items())]
+
+    genes = {}
+    build_keys = {}
+    tasks = set()
+    for build, paths in resource_paths.items():
+        if cache:
+            build_keys[build] = DiskCache.key(
+                'linked', *(task_key(task) for task in build_tasks(paths)))
+            cached_genes = cache.get(build_keys[build])
+            if cached_genes is not None:
+                log.info("Using cached genes for build %s", build)
+                genes[build] = cached_genes
+                continue
+        tasks.update(build_tasks(paths))
+
+    if with_phenotypes:
+        # The phenotypes are taken from the genemap file of the first build
+        phenotypes_build = sorted(resource_paths)[0]
+        phenotypes_task = [task for task in build_tasks(resource_paths[phenotypes_build])
+                           if task[0] == 'omim'][0]
+        tasks.add(phenotypes_task)
+
+    parsed = {}
+    if cache:
+        for task in tasks:
+            cached_resource = cache.get(task_key(task))
+            if cached_resource is not None:
+                log.info("Using cached %s resource", task[0])
+                parsed[task] = cached_resource
+    tasks = [task for task in tasks if task not in parsed]
+
+    if tasks:
+        log.info("Parsing %s gene resources", len(tasks))
+    if processes == 1:
+        for task in tasks:
+            parsed[task] = parse_resource(*task)
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {task: executor.submit(parse_resource, *task) for task in tasks}
+            for task, future in futures.items():
+                parsed[task] = future.result()
+    if cache:
+        for task in tasks:
+            cache.set(task_key(task), parsed[task])
+
+    for build, paths in resource_paths.items():
+        if build in genes:
+            continue
+        log.info("Linking genes for build %s", build)
+        build_resources = {task[0]: parsed[task] for task in build_tasks(paths)}
+        genes[build] = link_parsed_genes(
+            # The hgnc genes are updated when linking so each build needs a copy
+            hgnc_genes=deepcopy(build_resources['hgnc']),
+            transcripts=build_resources['ensembl'],
+            exac_genes=build_resources['exac'],
+            omim_genes=build_resources['omim'][0],
+            incomplete_penetrance_genes=build_resources['hpo'],
+        )
+        if cache:
+            cache.set(build_keys[build], genes[build])
+
+    if with_phenotypes:
+        return genes, parsed[phenotypes_task][1]
+    return genes
+
+
 def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
                genemap_lines, hpo_lines):
     """Gather information from different sources and return a gene dict
@@ -134,6 +290,7 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
     From exac the gene intolerance scores are collected, genes are linked to hgnc
     via hgnc symbol. This is a unstable symbol since they often change.
 
+    Use link_genes_parallel to parse the files in parallel.
 
         Args:
             ensembl_lines(iterable(str))
@@ -143,11 +300,34 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
         Yields:
             gene(dict): A dictionary with gene information
     """
+    return link_parsed_genes(
+        hgnc_genes=parse_hgnc_genes(hgnc_lines),
+        transcripts=parse_ensembl_transcripts(ensembl_lines),
+        exac_genes=parse_exac_genes(exac_lines),
+        omim_genes=get_mim_genes(genemap_lines, mim2gene_lines),
+        incomplete_penetrance_genes=get_incomplete_penetrance_genes(hpo_lines),
+    )
+
+
+def link_parsed_genes(hgnc_genes, transcripts, exac_genes, omim_genes,
+                      incomplete_penetrance_genes):
+    """Link parsed gene resources into a gene dict
+
+        Args:
+            hgnc_genes(iterable(dict)): Genes from parse_hgnc_genes
+            transcripts(iterable(dict)): Transcripts from parse_ensembl_transcripts
+            exac_genes(iterable(dict)): Genes from parse_exac_genes
+            omim_genes(dict): Genes from get_mim_genes
+            incomplete_penetrance_genes(set): Symbols from get_incomplete_penetrance_genes
+
+        Returns:
+            genes(dict): A dictionary with hgnc_id as key and gene information as value
+    """
     genes = {}
     log.info("Linking genes and transcripts")
     # HGNC genes are the main source, these define the gene dataset to use
     # Try to use as much information as possible from hgnc
-    for hgnc_gene in parse_hgnc_genes(hgnc_lines):
+    for hgnc_gene in hgnc_genes:
         hgnc_id = hgnc_gene['hgnc_id']
         hgnc_gene['transcripts'] = []
         genes[hgnc_id] = hgnc_gene
@@ -155,7 +335,7 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
     symbol_to_id = genes_by_alias(genes)
     # Parse and add the ensembl gene info
     all_genes = {'ensembl': {}, 'symbol': {}}
-    for transcript in parse_ensembl_transcripts(ensembl_lines):
+    for transcript in transcripts:
         ensg_symbol = transcript['hgnc_symbol']
         ensgid = transcript['ensembl_gene_id']
         for id_type, gene_id in [('symbol', ensg_symbol), ('ensembl', ensgid)]:
@@ -178,7 +358,7 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
                     break
 
     log.info("Add exac pli scores")
-    for exac_gene in parse_exac_genes(exac_lines):
+    for exac_gene in exac_genes:
         hgnc_symbol = exac_gene['hgnc_symbol'].upper()
         pli_score = exac_gene['pli_score']
 
@@ -199,7 +379,6 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
                         gene_info['pli_score'] = pli_score
 
     log.info("Add omim info")
-    omim_genes = get_mim_genes(genemap_lines, mim2gene_lines)
     for hgnc_symbol in omim_genes:
         omim_info = omim_genes[hgnc_symbol]
         inheritance = omim_info.get('inheritance', set())
@@ -214,7 +393,7 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
                 # Update the omim id to the one found in omim
                 gene_info['omim_id'] = omim_info['mim_number']
 
-                gene_info['inheritance_models'] = list(inheritance)
+                gene_info['inheritance_models'] = sorted(inheritance)
                 gene_info['phenotypes'] = omim_info.get('phenotypes', [])
             else:
                 for hgnc_id in hgnc_id_info['ids']:
@@ -222,12 +401,12 @@ def link_genes(ensembl_lines, hgnc_lines, exac_lines, mim2gene_lines,
                     if not gene_info.get('omim_id'):
                         gene_info['omim_id'] = omim_info['mim_number']
                     if not gene_info.get('inheritance_models'):
-                        gene_info['inheritance_models'] = list(inheritance)
+                        gene_info['inheritance_models'] = sorted(inheritance)
                     if not gene_info.get('phenotypes'):
                         gene_info['phenotypes'] = omim_info.get('phenotypes', [])
 
     log.info("Add incomplete penetrance info")
-    for hgnc_symbol in get_incomplete_penetrance_genes(hpo_lines):
+    for hgnc_symbol in incomplete_penetrance_genes:
         if hgnc_symbol in symbol_to_id:
             hgnc_id_info = symbol_to_id[hgnc_symbol]
 
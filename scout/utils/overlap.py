@@ -0,0 +1,34 @@
+import heapq
+
+
+def overlapping_pairs(queries, targets):
+    """Find all pairs of overlapping intervals with a sweep over the start positions
+
+    Two intervals overlap if one of them starts within the other. The
+    intervals are visited in start order while the intervals that are still
+    open are kept in a heap on their end position.
+
+    Args:
+        queries(iterable(tuple)): (<start>(int), <end>(int), <query_id>)
+        targets(iterable(tuple)): (<start>(int), <end>(int), <target_id>)
+
+    Yields:
+        pair(tuple): (<query_id>, <target_id>)
+    """
+    # 0 marks queries and 1 targets so that both kinds can be sorted together
+    intervals = [(start, end, 0, item_id) for start, end, item_id in queries]
+    intervals.extend((start, end, 1, item_id) for start, end, item_id in targets)
+    intervals.sort(key=lambda interval: (interval[0], interval[2]))
+
+    # One heap of open intervals per kind, with (<end>, <counter>, <item_id>)
+    open_intervals = ([], [])
+    for counter, (start, end, kind, item_id) in enumerate(intervals):
+        other = open_intervals[1 - kind]
+        while other and other[0][0] < start:
+            heapq.heappop(other)
+        for _, _, other_id in other:
+            if kind == 0:
+                yield (item_id, other_id)
+            else:
+                yield (other_id, item_id)
+        heapq.heappush(open_intervals[kind], (end, counter, item_id))
@@ -0,0 +1,93 @@
+import heapq
+import logging
+from bisect import bisect_left
+
+log = logging.getLogger(__name__)
+
+
+def match_order(entry):
+    """Sort key for search results: rank, then how much of the key was matched"""
+    return (entry[1], len(entry[0]), entry[0])
+
+
+class PrefixIndex(object):
+    """A sorted array of search keys for fast prefix lookups
+
+    Keys are matched case insensitive. Each key points to an item id and has a
+    rank, lower ranks are better matches, e.g. a gene symbol ranks above an
+    alias.
+
+    Args:
+        entries(iterable(tuple)): (<key>(str), <rank>(int), <item_id>)
+    """
+
+    def __init__(self, entries=()):
+        entries = sorted(((str(key).lower(), rank, item_id) for key, rank, item_id in entries),
+                         key=lambda entry: (entry[0], entry[1]))
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+
+    def _range(self, query):
+        """Return the positions of the keys that start with query"""
+        query = query.lower()
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + '\uffff', lo=start)
+        return start, end
+
+    def exact(self, query):
+        """Return the item ids with a key equal to query, best rank first
+
+        Args:
+            query(str)
+
+        Returns:
+            item_ids(list)
+        """
+        query = query.lower()
+        start = bisect_left(self.keys, query)
+        end = start
+        while end < len(self.keys) and self.keys[end] == query:
+            end += 1
+        return self._unique(sorted(self.entries[start:end], key=lambda entry: entry[1]))
+
+    def search(self, query, limit=None):
+        """Return the item ids with a key that starts with query
+
+        Results are sorted on rank, then on how much of the key was matched.
+
+        Args:
+            query(str)
+            limit(int): Maximum number of item ids to return
+
+        Returns:
+            item_ids(list)
+        """
+        start, end = self._range(query)
+        if not limit:
+            return self._unique(sorted(self.entries[start:end], key=match_order))
+
+        # Only sort the best matches, take more if some point to the same item
+        nr_matches = limit
+        while True:
+            matches = heapq.nsmallest(nr_matches, (self.entries[index] for index in
+                                                   range(start, end)), key=match_order)
+            item_ids = self._unique(matches, limit)
+            if len(item_ids) == limit or nr_matches >= end - start:
+                return item_ids
+            nr_matches *= 2
+
+    @staticmethod
+    def _unique(entries, limit=None):
+        item_ids = []
+        seen = set()
+        for _, _, item_id in entries:
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            item_ids.append(item_id)
+            if limit and len(item_ids) == limit:
+                break
+        return item_ids
+
+    def __len__(self):
+        return len(self.keys)
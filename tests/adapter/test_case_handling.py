@@ -127,6 +127,46 @@ def test_get_cases_non_existing_individual(real_panel_database, case_obj):
     ## THEN we should get the correct case
     assert result.count() == 0
 
+def test_cases_by_ids(panel_database, case_obj):
+    adapter = panel_database
+    ## GIVEN a database with one case
+    adapter._add_case(case_obj)
+
+    ## WHEN fetching the case together with a missing case
+    result = adapter.cases_by_ids(['missing', case_obj['_id']])
+
+    ## THEN the result should follow the input order
+    assert result[0] is None
+    assert result[1]['_id'] == case_obj['_id']
+
+def test_case_stats(panel_database, case_obj):
+    adapter = panel_database
+    ## GIVEN a database with one case
+    adapter._add_case(case_obj)
+
+    ## WHEN collecting the case statistics
+    stats = adapter.case_stats()
+
+    ## THEN the case should be counted
+    assert stats['total'] == 1
+    assert stats['status'] == {case_obj['status']: 1}
+    assert sum(stats['analysis_types'].values()) == len(case_obj['individuals'])
+    assert stats['causatives'] == 0
+
+    ## THEN no cases should be counted for another institute
+    assert adapter.case_stats(institute_id='missing')['total'] == 0
+
+def test_nr_cases_by_institute(panel_database, case_obj):
+    adapter = panel_database
+    ## GIVEN a database with one case
+    adapter._add_case(case_obj)
+
+    ## WHEN counting the cases for the owner and a institute without cases
+    nr_cases = adapter.nr_cases_by_institute([case_obj['owner'], 'missing'])
+
+    ## THEN the case should only be counted for the owner
+    assert nr_cases == {case_obj['owner']: 1, 'missing': 0}
+
 def test_get_non_existing_case(panel_database, case_obj):
     adapter = panel_database
     # GIVEN an empty database (no cases)
@@ -607,3 +607,32 @@ def test_update_default_panels(case_database, institute_obj, case_obj, user_obj)
     # # THEN a unassign event should be created
     # event = adapter.event_collection.find_one({'verb': 'unassign'})
     # assert event['link'] == 'unassignlink'
+
+def test_variants_comments(variant_database, institute_obj, case_obj, user_obj):
+    adapter = variant_database
+    # GIVEN a populated database with variants and no comments
+    variants = list(adapter.variant_collection.find().limit(2))
+    assert len(variants) == 2
+    assert adapter.event_collection.find().count() == 0
+
+    # WHEN commenting twice on the first variant
+    for content in ('first', 'second'):
+        adapter.comment(
+            institute=institute_obj,
+            case=case_obj,
+            user=user_obj,
+            link='commentlink',
+            variant=variants[0],
+            content=content,
+            comment_level='specific'
+        )
+    adapter.event_collection.update_one(
+        {'content': 'first'}, {'$set': {'created_at': datetime.datetime(2017, 1, 1)}})
+
+    # THEN the comments should be grouped per variant
+    variant_ids = [variant['variant_id'] for variant in variants]
+    comments = adapter.variants_comments(institute_obj, variant_ids)
+    assert len(comments[variant_ids[0]]) == 2
+    assert comments[variant_ids[1]] == []
+    # THEN the newest comment should be first
+    assert comments[variant_ids[0]][0]['content'] == 'second'
@@ -105,8 +105,7 @@ def test_get_genes_alias(adapter):
     for result in res:
         assert result['hgnc_id'] == 1
 
-def test_get_genes_regex(real_adapter):
-    adapter = real_adapter
+def test_get_genes_regex(adapter):
     ##GIVEN a empty adapter
     assert adapter.all_genes().count() == 0
 
@@ -138,24 +137,23 @@ def test_get_genes_regex(real_adapter):
 
     ##THEN assert that only the correct gene was fetched for a full match
     res = adapter.hgnc_genes(hgnc_symbol='AA', search=True)
-    assert res.count() == 1
+    assert len(res) == 1
 
     ##THEN assert that the correct gene was fetched
     res = adapter.hgnc_genes(hgnc_symbol='AB', search=True)
-    assert res.count() == 1
+    assert len(res) == 1
 
     ##THEN assert that the correct gene was fetched
     res = adapter.hgnc_genes(hgnc_symbol='K', search=True)
-    assert res.count() == 0
+    assert len(res) == 0
 
     ##THEN assert that the correct gene was fetched
     res = adapter.hgnc_genes(hgnc_symbol='A', search=True)
-    assert res.count() == 3
+    assert len(res) == 3
 
-    #This will only work with a real pymongo adapter
     ##THEN assert that the correct gene was fetched
     res = adapter.hgnc_genes(hgnc_symbol='a', search=True)
-    assert res.count() == 3
+    assert len(res) == 3
 
 def test_get_all_genes(adapter):
     # adapter = real_adapter
@@ -283,3 +281,189 @@ def test_hgnc_symbol_to_gene(adapter):
     assert gene_obj['hgnc_symbol'] in res
     assert gene_obj2['hgnc_symbol'] in res
 
+
+def test_gene_cache(adapter):
+    ##GIVEN a adapter with a gene
+    gene_obj = {
+        'hgnc_id': 1,
+        'hgnc_symbol': 'AAA',
+        'build': '37',
+        'aliases': ['AAA', 'AAB'],
+    }
+    adapter.load_hgnc_gene(gene_obj)
+
+    ##WHEN fetching the gene twice
+    adapter.hgnc_gene(1)
+    res = adapter.hgnc_gene(1)
+    ##THEN assert that the second lookup was a cache hit
+    assert res['hgnc_symbol'] == 'AAA'
+    assert adapter.gene_cache_stats()['hits'] == 1
+
+    ##WHEN modifying the result
+    res['hgnc_symbol'] = 'BBB'
+    ##THEN assert that the cache is not changed
+    assert adapter.hgnc_gene(1)['hgnc_symbol'] == 'AAA'
+
+    ##WHEN looking up more genes than fit in the gene cache
+    adapter.gene_cache.maxsize = 5
+    search_index = adapter.gene_search_index()
+    for hgnc_id in range(100, 110):
+        adapter.hgnc_gene(hgnc_id)
+    ##THEN assert that the search index is kept
+    assert adapter.gene_search_index() is search_index
+
+    ##WHEN fetching a missing gene and then loading it
+    assert adapter.gene_by_alias('CCC') == []
+    adapter.load_hgnc_gene({
+        'hgnc_id': 2,
+        'hgnc_symbol': 'CCC',
+        'build': '37',
+        'aliases': ['CCC'],
+    })
+    ##THEN assert that the cache was invalidated for the build
+    assert adapter.gene_by_alias('CCC')[0]['hgnc_id'] == 2
+    assert adapter.hgnc_id('CCC') == 2
+
+    ##WHEN dropping the genes
+    adapter.drop_genes(build='37')
+    ##THEN assert that no genes are returned
+    assert adapter.hgnc_gene(1) is None
+    assert adapter.hgnc_genes('AAB') == []
+
+def test_search_genes_ranked(adapter):
+    ##GIVEN a adapter with genes where one has the query as start of an alias
+    adapter.load_hgnc_gene({
+        'hgnc_id': 1,
+        'hgnc_symbol': 'BRCAX',
+        'build': '37',
+        'aliases': ['BRCAX', 'BRCA'],
+    })
+    adapter.load_hgnc_gene({
+        'hgnc_id': 2,
+        'hgnc_symbol': 'BRCA1',
+        'build': '37',
+        'aliases': ['BRCA1'],
+    })
+
+    ##WHEN searching for a prefix
+    res = adapter.hgnc_genes(hgnc_symbol='brc', search=True)
+    ##THEN assert that matches on the hgnc symbol come first
+    assert [gene['hgnc_id'] for gene in res] == [2, 1]
+
+    ##WHEN a new gene is loaded
+    adapter.load_hgnc_gene({
+        'hgnc_id': 3,
+        'hgnc_symbol': 'BRC',
+        'build': '37',
+        'aliases': ['BRC'],
+    })
+    ##THEN assert that the search index is refreshed
+    res = adapter.hgnc_genes(hgnc_symbol='brc', search=True)
+    assert [gene['hgnc_id'] for gene in res] == [3]
+
+def test_genes_by_identifiers(adapter):
+    ##GIVEN a adapter with two genes where a symbol is also an alias
+    adapter.hgnc_collection.insert_many([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'BBB']},
+        {'hgnc_id': 2, 'hgnc_symbol': 'BBB', 'build': '37', 'aliases': ['BBB', 'CCC']},
+    ])
+
+    ##WHEN resolving ids, symbols and aliases
+    res = adapter.genes_by_identifiers([1, 'BBB', 'CCC', 'DDD', 3])
+
+    ##THEN a hgnc symbol should only give that gene
+    assert [gene['hgnc_id'] for gene in res['BBB']] == [2]
+    ##THEN ids and aliases should be resolved
+    assert [gene['hgnc_id'] for gene in res[1]] == [1]
+    assert [gene['hgnc_id'] for gene in res['CCC']] == [2]
+    ##THEN missing identifiers should give empty lists
+    assert res['DDD'] == []
+    assert res[3] == []
+
+def test_alias_table(adapter):
+    ##GIVEN a adapter with two genes where a symbol is also an alias
+    adapter.load_hgnc_bulk([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'BBB']},
+        {'hgnc_id': 2, 'hgnc_symbol': 'BBB', 'build': '37', 'aliases': ['BBB', 'CCC']},
+    ])
+
+    ##WHEN resolving some aliases
+    res = adapter.resolve_aliases(['BBB', 'CCC', 'DDD'])
+
+    ##THEN the aliases should be read from the alias collection
+    assert res['BBB'] == {'true': 2, 'ids': set([1, 2])}
+    assert res['CCC'] == {'true': None, 'ids': set([2])}
+    assert 'DDD' not in res
+    assert adapter.genes_by_alias()['AAA'] == {'true': 1, 'ids': set([1])}
+
+    ##WHEN genes are added without the adapter
+    adapter.hgnc_collection.insert_one(
+        {'hgnc_id': 3, 'hgnc_symbol': 'EEE', 'build': '38', 'aliases': ['EEE']})
+    ##THEN the aliases of the build should be built when needed
+    assert adapter.genes_by_alias(build='38') == {'EEE': {'true': 3, 'ids': set([3])}}
+
+    ##WHEN dropping the genes of a build
+    adapter.drop_genes(build='37')
+    ##THEN the aliases of that build should be removed
+    assert adapter.resolve_aliases(['BBB']) == {}
+    assert adapter.resolve_aliases(['EEE'], build='38')
+
+def test_update_alias_table(adapter, monkeypatch):
+    ##GIVEN a adapter with two genes and their aliases
+    adapter.load_hgnc_bulk([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'BBB']},
+        {'hgnc_id': 2, 'hgnc_symbol': 'BBB', 'build': '37', 'aliases': ['BBB', 'CCC']},
+    ])
+    ##GIVEN that the aliases of the build can not be removed all at once
+    collection_delete_many = adapter.hgnc_alias_collection.delete_many
+    def delete_many(query, *args, **kwargs):
+        assert query != {'build': '37'}, "The aliases of the build were emptied"
+        return collection_delete_many(query, *args, **kwargs)
+    monkeypatch.setattr(adapter.hgnc_alias_collection, 'delete_many', delete_many)
+
+    ##WHEN updating a gene so that an alias is removed and another added
+    adapter.update_genes([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'BBB']},
+        {'hgnc_id': 2, 'hgnc_symbol': 'BBB', 'build': '37', 'aliases': ['BBB', 'DDD']},
+    ])
+
+    ##THEN the changed aliases should be updated and the others kept
+    res = adapter.resolve_aliases(['AAA', 'BBB', 'CCC', 'DDD'])
+    assert set(res) == set(['AAA', 'BBB', 'DDD'])
+    assert res['BBB'] == {'true': 2, 'ids': set([1, 2])}
+    assert res['DDD'] == {'true': None, 'ids': set([2])}
+
+def test_alias_table_checked_once(adapter, monkeypatch):
+    ##GIVEN a adapter with genes added without the adapter
+    adapter.hgnc_collection.insert_one(
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'BBB']})
+    checks = []
+    collection_find_one = adapter.hgnc_alias_collection.find_one
+    def find_one(*args, **kwargs):
+        checks.append(args)
+        return collection_find_one(*args, **kwargs)
+    monkeypatch.setattr(adapter.hgnc_alias_collection, 'find_one', find_one)
+
+    ##WHEN resolving aliases many times
+    for _ in range(3):
+        assert adapter.resolve_aliases(['BBB']) == {'BBB': {'true': None, 'ids': set([1])}}
+    adapter.genes_by_alias()
+
+    ##THEN the alias table should only be looked for the first time
+    assert len(checks) == 1
+
+def test_add_hgnc_id(adapter):
+    ##GIVEN a adapter with two genes that share an alias
+    adapter.load_hgnc_bulk([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'aliases': ['AAA', 'CCC']},
+        {'hgnc_id': 2, 'hgnc_symbol': 'BBB', 'build': '37', 'aliases': ['BBB', 'CCC']},
+    ])
+    genes = [{'hgnc_symbol': 'BBB'}, {'hgnc_symbol': 'CCC'}, {'hgnc_symbol': 'DDD'}]
+
+    ##WHEN adding hgnc ids to genes with symbols
+    adapter.add_hgnc_id(genes)
+
+    ##THEN a hgnc symbol should get its id and an ambiguous alias all ids
+    assert genes[0]['hgnc_id'] == 2
+    assert genes[1]['hgnc_id'] == '1,2'
+    assert 'hgnc_id' not in genes[2]
@@ -22,6 +22,22 @@ def test_add_hpo_term(adapter):
     ## THEN assert that the term have been loaded
     assert len([term for term in adapter.hpo_terms()]) == 1
 
+def test_load_hpo_bulk(adapter):
+    ## GIVEN a adapter with one hpo term
+    adapter.load_hpo_term(dict(_id='HP1', hpo_id='HP1', description='First term', genes=[1]))
+    assert adapter.hpo_terms(query='first') != []
+
+    ## WHEN loading many terms where one already exists
+    hpo_terms = [dict(_id=hpo_id, hpo_id=hpo_id, description='Term', genes=[])
+                 for hpo_id in ['HP1', 'HP2', 'HP3']]
+    with pytest.raises(IntegrityError):
+        adapter.load_hpo_bulk(hpo_terms)
+
+    ## THEN the new terms should be inserted anyway
+    assert len([term for term in adapter.hpo_terms()]) == 3
+    ## THEN the cached hpo search index should be updated
+    assert [term['_id'] for term in adapter.hpo_terms(query='HP3')] == ['HP3']
+
 def test_add_hpo_term_twice(adapter):
     ## GIVEN a empty adapter
     assert len([term for term in adapter.hpo_terms()]) == 0
@@ -91,9 +107,11 @@ def test_fetch_all_hpo_terms(adapter):
     
     ## THEN assert the term was fetched
     assert len(res) == 1
+    ## THEN assert a list is returned with and without a query
+    assert isinstance(adapter.hpo_terms(), list)
+    assert isinstance(adapter.hpo_terms(query='first'), list)
 
-def test_fetch_all_hpo_terms_query(real_adapter):
-    adapter = real_adapter
+def test_fetch_all_hpo_terms_query(adapter):
     ## GIVEN a adapter with one hpo term
     assert len([term for term in adapter.hpo_terms()]) == 0
     
@@ -119,8 +137,7 @@ def test_fetch_all_hpo_terms_query(real_adapter):
     ## THEN assert only one term was matched
     assert len(res) == 1
 
-def test_fetch_all_hpo_terms_query_description(real_adapter):
-    adapter = real_adapter
+def test_fetch_all_hpo_terms_query_description(adapter):
     ## GIVEN a adapter with one hpo term
     assert len([term for term in adapter.hpo_terms()]) == 0
     
@@ -148,8 +165,7 @@ def test_fetch_all_hpo_terms_query_description(real_adapter):
     for term in res:
         assert term['_id'] == 'HP2'
 
-def test_fetch_all_hpo_terms_query_description_term(real_adapter):
-    adapter = real_adapter
+def test_fetch_all_hpo_terms_query_description_term(adapter):
     ## GIVEN a adapter with one hpo term
     assert len([term for term in adapter.hpo_terms()]) == 0
     
@@ -176,6 +192,31 @@ def test_fetch_all_hpo_terms_query_description_term(real_adapter):
     assert len([term for term in res]) == 2
 
 
+def test_fetch_hpo_terms_ranked(adapter):
+    ## GIVEN a adapter with hpo terms
+    for hpo_id, description in [('HP:0000001', 'Abnormal heart morphology'),
+                                ('HP:0000002', 'Heart murmur'),
+                                ('HP:0000003', 'Abnormality of the heart valves')]:
+        adapter.load_hpo_term(dict(_id=hpo_id, hpo_id=hpo_id, description=description,
+                                   genes=[1]))
+
+    ## WHEN searching with a description prefix
+    res = adapter.hpo_terms(query='heart', limit=8)
+    ## THEN assert that the term starting with the query comes first
+    assert [term['_id'] for term in res] == ['HP:0000002', 'HP:0000001', 'HP:0000003']
+
+    ## WHEN searching with several words
+    res = adapter.hpo_terms(query='abn hear valv')
+    ## THEN assert that all words have to match
+    assert [term['_id'] for term in res] == ['HP:0000003']
+
+    ## WHEN searching with a hpo id and a limit
+    res = adapter.hpo_terms(query='HP:000000', limit=2)
+    ## THEN assert that the limit is used
+    assert len(res) == 2
+    assert adapter.hpo_terms(query='0000002')[0]['_id'] == 'HP:0000002'
+
+
 #########################################################
 ################### Disease tests #######################
 #########################################################
@@ -307,3 +348,51 @@ def test_fetch_disease_term_by_hgnc_id_again(adapter):
     
     ## THEN assert the correct term was fetched
     assert len([term for term in res]) == 1
+
+def test_generate_hpo_gene_list(adapter):
+    ## GIVEN a adapter with two hpo terms that share a gene
+    adapter.load_hpo_term(dict(_id='HP1', hpo_id='HP1', description='First term',
+                               genes=[1, 2]))
+    adapter.load_hpo_term(dict(_id='HP2', hpo_id='HP2', description='Second term',
+                               genes=[2, 3]))
+
+    ## WHEN generating a gene list for the terms and a missing term
+    res = adapter.generate_hpo_gene_list('HP1', 'HP2', 'HP3')
+
+    ## THEN assert the shared gene comes first
+    assert res[0] == (2, 2)
+    assert set(res[1:]) == set([(1, 1), (3, 1)])
+
+    ## WHEN a new term is loaded
+    adapter.load_hpo_term(dict(_id='HP3', hpo_id='HP3', description='Third term',
+                               genes=[3]))
+    ## THEN assert that it is used
+    assert adapter.generate_hpo_gene_list('HP3') == [(3, 1)]
+
+def test_rank_diseases(adapter):
+    ## GIVEN a adapter with disease terms annotated with hpo terms
+    for disease_nr, hpo_terms in [(1, ['HP1', 'HP2']), (2, ['HP1', 'HP3']), (3, ['HP1'])]:
+        adapter.load_disease_term(dict(
+            _id='OMIM:{}'.format(disease_nr),
+            disease_id='OMIM:{}'.format(disease_nr),
+            disease_nr=disease_nr,
+            source='OMIM',
+            description='Disease {}'.format(disease_nr),
+            genes=[disease_nr],
+            hpo_terms=hpo_terms,
+        ))
+
+    ## WHEN ranking the diseases for a set of terms
+    res = adapter.rank_diseases(['HP1', 'HP2', 'HP4'])
+
+    ## THEN assert the disease with all terms comes first
+    assert res[0] == ('OMIM:1', 1.0)
+    ## THEN assert diseases that only share a term found in all diseases are left out
+    assert 'OMIM:3' not in dict(res)
+    assert adapter.rank_diseases(['HP3'], limit=1) == [('OMIM:2', 1.0)]
+
+    ## WHEN ranking the diseases for a term found in all diseases
+    res = adapter.rank_diseases(['HP1'], limit=2)
+
+    ## THEN assert no diseases are returned
+    assert res == []
@@ -0,0 +1,25 @@
+def test_load_indexes(adapter):
+    ## GIVEN a adapter without indexes
+    assert 'build_chromosome' not in adapter.indexes('hgnc_gene')
+
+    ## WHEN loading the indexes
+    adapter.load_indexes()
+
+    ## THEN the indexes should be created on the collections of the adapter
+    assert 'build_chromosome' in adapter.indexes('hgnc_gene')
+    assert 'caseid_rankscore' in adapter.indexes('variant')
+
+def test_deferred_indexes(adapter):
+    ## GIVEN a adapter with indexes
+    adapter.load_indexes()
+
+    ## WHEN loading genes with deferred gene indexes
+    with adapter.deferred_indexes(['hgnc_collection']):
+        ## THEN the gene indexes should be dropped during the load
+        assert 'build_chromosome' not in adapter.indexes('hgnc_gene')
+        assert 'caseid_rankscore' in adapter.indexes('variant')
+        adapter.load_hgnc_bulk([{'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37'}])
+
+    ## THEN the gene indexes should be built after the load
+    assert 'build_chromosome' in adapter.indexes('hgnc_gene')
+    assert adapter.nr_genes(build='37') == 1
@@ -171,3 +171,46 @@ def test_updating_non_existing_institute(adapter, institute_obj):
 
     assert adapter.institutes().count() == 1
 
+
+def test_request_cache(adapter, institute_obj):
+    ## GIVEN an adapter with a institute and an active request cache
+    adapter.add_institute(institute_obj)
+    institute_id = institute_obj['internal_id']
+    adapter.start_request_cache()
+
+    ## WHEN fetching the institute and changing the result
+    res = adapter.institute(institute_id)
+    res['display_name'] = 'changed'
+    adapter.institute_collection.delete_one({'_id': institute_id})
+
+    ## THEN assert the institute is served from memory without the change
+    assert adapter.institute(institute_id)['display_name'] == institute_obj['display_name']
+
+    ## WHEN the request cache is ended
+    adapter.end_request_cache()
+
+    ## THEN assert the institute is read from the database
+    assert adapter.institute(institute_id) is None
+
+
+def test_institute_names(adapter, institute_obj):
+    ## GIVEN an adapter with two institutes
+    adapter.add_institute(institute_obj)
+    other_institute = dict(institute_obj, _id='cust111', internal_id='cust111',
+                           display_name='other')
+    adapter.add_institute(other_institute)
+
+    ## WHEN fetching the names of the institutes except the first
+    res = adapter.institute_names(exclude_ids=[institute_obj['internal_id']])
+
+    ## THEN assert only the id and display name of the other is returned
+    assert res == [('cust111', 'other')]
+
+    ## WHEN fetching the display name of both by id
+    res = adapter.institutes_by_ids(['cust111', institute_obj['internal_id']],
+                                    projection=['display_name'])
+
+    ## THEN assert the fields outside the projection are left out
+    assert [institute['display_name'] for institute in res] == [
+        'other', institute_obj['display_name']]
+    assert 'coverage_cutoff' not in res[0]
@@ -236,3 +236,85 @@ def test_apply_pending_add_two_genes(real_panel_database):
     assert len(updated_panel['genes']) == 2
     for gene in updated_panel['genes']:
         assert gene['hgnc_id'] in hgnc_ids
+
+def test_gene_to_panels_index(panel_database):
+    adapter = panel_database
+    panel_obj = adapter.panel_collection.find_one()
+    hgnc_id = panel_obj['genes'][0]['hgnc_id']
+    ## GIVEN an adapter with a gene panel
+    assert adapter.gene_to_panels()[hgnc_id] == set([panel_obj['panel_name']])
+
+    ## WHEN applying a pending delete of a gene
+    panel_obj['pending'] = [{'hgnc_id': hgnc_id, 'action': 'delete',
+                             'symbol': panel_obj['genes'][0]['symbol'], 'info': {}}]
+    new_panel = adapter.apply_pending(panel_obj)
+
+    ## THEN the gene should only be indexed for the old version
+    assert adapter.panels_by_gene(hgnc_id) == [
+        {'panel_name': panel_obj['panel_name'], 'version': panel_obj['version']}]
+
+    ## WHEN deleting both versions
+    adapter.delete_panel(panel_obj)
+    adapter.delete_panel(new_panel)
+
+    ## THEN no genes should be indexed
+    assert adapter.gene_to_panels() == {}
+
+def test_apply_pending_stores_changes(panel_database):
+    adapter = panel_database
+    panel_obj = adapter.panel_collection.find_one()
+    old_genes = panel_obj['genes']
+    gene = old_genes[0]
+    ## GIVEN an adapter with a gene panel
+    ## WHEN applying a pending edit of a gene
+    panel_obj['pending'] = [{'hgnc_id': gene['hgnc_id'], 'action': 'edit',
+                             'symbol': gene['symbol'], 'info': {'mosaicism': True}}]
+    new_panel = adapter.apply_pending(panel_obj)
+
+    ## THEN the old version should only store the changed gene
+    archived = adapter.panel_collection.find_one({'_id': panel_obj['_id']})
+    assert 'genes' not in archived
+    assert archived['genes_delta']['removed'] == []
+    assert [gene['hgnc_id'] for gene in archived['genes_delta']['genes']] == [gene['hgnc_id']]
+    ## THEN the old version should be rebuilt with the unchanged genes
+    old_panel = adapter.gene_panel(panel_obj['panel_name'], panel_obj['version'])
+    assert old_panel['genes'] == old_genes
+    assert old_panel['is_archived'] is True
+    ## THEN the latest version should have the edit
+    latest = adapter.gene_panel(panel_obj['panel_name'])
+    assert latest['version'] == new_panel['version']
+    assert latest['genes'][0]['mosaicism'] is True
+
+    ## WHEN deleting the latest version
+    adapter.delete_panel(latest)
+
+    ## THEN the old version should store all of its genes again
+    archived = adapter.panel_collection.find_one({'_id': panel_obj['_id']})
+    assert archived['genes'] == old_genes
+
+def test_latest_panels(panel_database):
+    adapter = panel_database
+    panel_obj = adapter.panel_collection.find_one()
+    ## GIVEN a panel with two versions
+    panel_obj['pending'] = []
+    new_panel = adapter.apply_pending(panel_obj)
+    ## WHEN fetching the latest panels of the institute
+    res = list(adapter.latest_panels(panel_obj['institute']))
+    ## THEN only the latest version should be returned, with all genes
+    assert len(res) == 1
+    assert res[0]['_id'] == new_panel['_id']
+    assert len(res[0]['genes']) == len(panel_obj['genes'])
+
+def test_add_pending_actions(panel_database):
+    adapter = panel_database
+    panel_obj = adapter.panel_collection.find_one()
+    hgnc_objs = list(adapter.hgnc_collection.find().limit(2))
+    ## GIVEN an adapter with a gene panel
+    ## WHEN adding two pending actions at once
+    res = adapter.add_pending_actions(panel_obj, [
+        (hgnc_objs[0], 'add', None),
+        (hgnc_objs[1], 'delete', None),
+    ])
+    ## THEN assert that both actions are pending
+    assert [action['action'] for action in res['pending']] == ['add', 'delete']
+    assert res['pending'][0]['hgnc_id'] == hgnc_objs[0]['hgnc_id']
@@ -0,0 +1,74 @@
+from scout.adapter.mongo.stats import (new_variant_stats, add_variant_stats,
+                                      nr_variants_above)
+
+
+def test_add_variant_stats():
+    ## GIVEN an empty statistics entry
+    stats = new_variant_stats()
+    variant_obj = {
+        'rank_score': 12.5,
+        'hgnc_ids': [1, 2],
+        'clnsig': [{'value': 5}],
+    }
+    ## WHEN counting a variant twice
+    add_variant_stats(stats, variant_obj)
+    add_variant_stats(stats, variant_obj)
+
+    ## THEN the counts should be updated
+    assert stats['variants'] == 2
+    assert stats['clinsig'] == {'5': 2}
+    assert stats['genes'] == {'1': 2, '2': 2}
+    assert stats['rank_scores'] == {'12': 2}
+    assert nr_variants_above(stats, 12) == 2
+    assert nr_variants_above(stats, 13) == 0
+
+
+def test_load_variants_stats(populated_database, case_obj):
+    adapter = populated_database
+    case_id = case_obj['_id']
+    ## GIVEN a database without variant statistics
+    assert adapter.variant_stats(case_id) is None
+
+    ## WHEN loading the variants of a case
+    nr_loaded = adapter.load_variants(case_obj=case_obj, variant_type='clinical',
+                                      category='snv', rank_threshold=None)
+
+    ## THEN the statistics should be updated
+    stats_obj = adapter.variant_stats(case_id)
+    assert stats_obj['clinical_snv']['variants'] == nr_loaded
+
+    ## THEN a recomputed document should be the same
+    computed = adapter.compute_variant_stats(case_id)
+    assert computed['clinical_snv']['variants'] == nr_loaded
+    assert computed['clinical_snv']['genes'] == stats_obj['clinical_snv']['genes']
+
+
+def test_delete_variants_stats(populated_database, case_obj):
+    adapter = populated_database
+    case_id = case_obj['_id']
+    ## GIVEN a database with variant statistics
+    adapter.load_variants(case_obj=case_obj, variant_type='clinical',
+                          category='snv', rank_threshold=None)
+    assert 'clinical_snv' in adapter.variant_stats(case_id)
+
+    ## WHEN deleting the variants
+    adapter.delete_variants(case_id, 'clinical', 'snv')
+
+    ## THEN the statistics should be removed
+    assert 'clinical_snv' not in adapter.variant_stats(case_id)
+
+
+def test_update_caseid_variant_stats(populated_database, case_obj):
+    adapter = populated_database
+    case_id = case_obj['_id']
+    ## GIVEN a case with variant statistics
+    nr_loaded = adapter.load_variants(case_obj=case_obj, variant_type='clinical',
+                                      category='snv', rank_threshold=None)
+    case_obj = adapter.case(case_id)
+
+    ## WHEN changing the id of the case
+    adapter.update_caseid(case_obj, 'new_case_id')
+
+    ## THEN the statistics should be found under the new id only
+    assert adapter.variant_stats(case_id) is None
+    assert adapter.variant_stats('new_case_id')['clinical_snv']['variants'] == nr_loaded
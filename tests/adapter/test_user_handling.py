@@ -24,4 +24,19 @@ def test_get_nonexisting_user(adapter):
     """docstring for test_get_nonexisting_user"""
     user_obj = adapter.user(email='john.doe@mail.com')
     assert user_obj == None
-    
\ No newline at end of file
+    
+
+def test_users_by_ids(adapter):
+    ## GIVEN a adapter with one user
+    adapter.add_user({
+        'email': 'clark.kent@mail.com',
+        'name': 'Clark Kent',
+        'institutes': ['test-1'],
+    })
+
+    ## WHEN fetching the user together with a missing user
+    user_objs = adapter.users_by_ids(['john.doe@mail.com', 'clark.kent@mail.com'])
+
+    ## THEN the result should follow the input order
+    assert user_objs[0] is None
+    assert user_objs[1]['name'] == 'Clark Kent'
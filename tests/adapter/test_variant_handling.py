@@ -78,6 +78,74 @@ def test_load_all_variants(populated_database, variant_objs, case_obj):
 
     assert nr_loaded == result.count()
 
+def test_variants_list_projection(populated_database, variant_objs, case_obj):
+    adapter = populated_database
+    case_id = case_obj['_id']
+
+    ## GIVEN a populated database with variants
+    for variant_obj in variant_objs:
+        adapter.load_variant(variant_obj)
+
+    ## WHEN fetching the variants with the list projection
+    result = adapter.variants(case_id=case_id, nr_of_variants=-1, projection='list')
+
+    ## THEN the heavy fields should be left out
+    for variant_obj in result:
+        assert 'rank_score' in variant_obj
+        assert 'samples' not in variant_obj
+        for gene_obj in variant_obj.get('genes', []):
+            assert 'hgnc_id' in gene_obj
+            assert 'transcripts' not in gene_obj
+
+def test_variants_unknown_projection(populated_database, case_obj):
+    adapter = populated_database
+    ## WHEN asking for a projection that does not exist
+    ## THEN a ValueError should be raised
+    with pytest.raises(ValueError):
+        adapter.variants(case_id=case_obj['_id'], projection='compact')
+
+def test_variants_by_ids(populated_database, variant_objs):
+    adapter = populated_database
+    ## GIVEN a populated database with variants
+    variant_ids = []
+    for variant_obj in variant_objs:
+        adapter.load_variant(variant_obj)
+        variant_ids.append(variant_obj['_id'])
+
+    ## WHEN fetching the variants in reversed order with a missing id
+    document_ids = list(reversed(variant_ids)) + ['missing']
+    result = adapter.variants_by_ids(document_ids)
+
+    ## THEN the variants should be returned in the same order
+    assert [variant_obj['_id'] for variant_obj in result[:-1]] == document_ids[:-1]
+    assert result[-1] is None
+
+def test_other_causatives(populated_database, case_obj, variant_objs):
+    adapter = populated_database
+    ## GIVEN a variant in one case that is marked causative in another case
+    variant_obj = next(variant_objs)
+    variant_obj['institute'] = case_obj['owner']
+    adapter.load_variant(variant_obj)
+
+    other_variant = dict(variant_obj)
+    other_variant['_id'] = 'other_variant'
+    other_variant['case_id'] = 'other_case'
+    adapter.load_variant(other_variant)
+
+    other_case = dict(case_obj)
+    other_case['_id'] = 'other_case'
+    other_case['causatives'] = ['other_variant']
+    adapter._add_case(other_case)
+
+    ## WHEN looking for other causatives
+    result = list(adapter.other_causatives(case_obj, variant_obj))
+
+    ## THEN the variant from the other case should be returned
+    assert [causative['_id'] for causative in result] == ['other_variant']
+
+    ## THEN the other case should not find its own causative
+    assert list(adapter.other_causatives(other_case, other_variant)) == []
+
 def test_load_whole_gene(populated_database, variant_objs, case_obj):
     adapter = populated_database
     case_id = case_obj['_id']
@@ -149,3 +217,88 @@ def test_get_region_vcf(populated_database, case_obj):
     os.remove(file_name)
 
     assert nr_variants > 0
+
+
+def test_update_overlapping(adapter):
+    ## GIVEN a case with a SV and two SNVs where one is inside the SV
+    base = {'case_id': 'case', 'variant_type': 'clinical', 'chromosome': '1',
+            'hgnc_ids': []}
+    variants = [
+        dict(base, _id='sv', category='sv', position=100, end=1000, rank_score=1),
+        dict(base, _id='snv_inside', category='snv', position=500, end=500, rank_score=5),
+        dict(base, _id='snv_outside', category='snv', position=2000, end=2000, rank_score=10),
+    ]
+    adapter.variant_collection.insert_many(variants)
+
+    ## WHEN updating the overlapping variants
+    nr_updated = adapter.update_overlapping('case', 'clinical')
+
+    ## THEN the SV and the SNV inside should point to each other
+    assert nr_updated == 2
+    sv_obj = adapter.variant_collection.find_one({'_id': 'sv'})
+    assert sv_obj['overlapping'] == ['snv_inside']
+    assert [variant['_id'] for variant in adapter.overlapping(sv_obj)] == ['snv_inside']
+    snv_obj = adapter.variant_collection.find_one({'_id': 'snv_outside'})
+    assert adapter.overlapping(snv_obj) == []
+
+
+def test_update_overlapping_loaded(adapter):
+    ## GIVEN a build 38 case with a SV in a gene that has its overlaps stored
+    ## and a SV loaded before overlaps were stored
+    adapter.hgnc_collection.insert_many([
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '37', 'start': 1, 'end': 10},
+        {'hgnc_id': 1, 'hgnc_symbol': 'AAA', 'build': '38', 'start': 100, 'end': 1000},
+    ])
+    base = {'case_id': 'case', 'variant_type': 'clinical', 'chromosome': '1'}
+    adapter.variant_collection.insert_many([
+        dict(base, _id='sv', category='sv', position=200, end=300, hgnc_ids=[1],
+             overlapping=[]),
+        dict(base, _id='old_sv', category='sv', position=100, end=1000, hgnc_ids=[]),
+    ])
+
+    ## WHEN loading more SNVs in the gene than were stored before
+    snvs = [dict(base, _id='snv_{0}'.format(position), category='snv', position=position,
+                 end=position, hgnc_ids=[], rank_score=position)
+            for position in range(500, 650)]
+    adapter.variant_collection.insert_many(snvs)
+    adapter.update_overlapping('case', 'clinical', category='snv',
+                               variant_ids=[snv['_id'] for snv in snvs], build='38')
+
+    ## THEN the SV should overlap all SNVs in the build 38 gene region, best ranked first
+    sv_obj = adapter.variant_collection.find_one({'_id': 'sv'})
+    assert len(sv_obj['overlapping']) == 150
+    assert adapter.overlapping(sv_obj)[0]['_id'] == 'snv_649'
+    ## THEN the SNVs should overlap the SV that covers them
+    snv_obj = adapter.variant_collection.find_one({'_id': 'snv_500'})
+    assert snv_obj['overlapping'] == ['old_sv']
+    ## THEN the SV loaded before overlaps were stored should be left untouched
+    assert 'overlapping' not in adapter.variant_collection.find_one({'_id': 'old_sv'})
+
+
+def test_add_gene_info(adapter):
+    ## GIVEN a gene, a disease for that gene and a panel with the gene
+    adapter.hgnc_collection.insert_one({
+        'hgnc_id': 1, 'hgnc_symbol': 'A', 'build': '37',
+        'transcripts': [{'ensembl_transcript_id': 'ENST1', 'refseq_ids': ['NM_1']}],
+    })
+    adapter.disease_term_collection.insert_one({'_id': 'OMIM:1', 'genes': [1]})
+    panel_obj = {
+        '_id': 'panel1', 'panel_name': 'panel1', 'version': 1.0, 'date': 'today',
+        'genes': [{'hgnc_id': 1, 'disease_associated_transcripts': ['NM_1.2'],
+                   'reduced_penetrance': True, 'inheritance_models': ['AD']}],
+    }
+    variant_obj = {'genes': [{'hgnc_id': 1, 'transcripts': [{'transcript_id': 'ENST1'}]}]}
+
+    ## WHEN adding the gene information
+    adapter.add_gene_info(variant_obj, [panel_obj])
+
+    ## THEN the panel, gene and disease information should be added
+    variant_gene = variant_obj['genes'][0]
+    assert variant_gene['disease_associated_transcripts'] == ['NM_1.2']
+    assert variant_gene['manual_penetrance'] is True
+    assert variant_gene['manual_inheritance'] == ['AD']
+    assert variant_gene['transcripts'][0]['is_disease_associated'] is True
+    assert variant_gene['common']['hgnc_symbol'] == 'A'
+    assert [term['_id'] for term in variant_gene['disease_terms']] == ['OMIM:1']
+    ## THEN the panel index should be cached for the panel version
+    assert len(adapter.panel_cache) == 1
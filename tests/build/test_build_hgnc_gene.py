@@ -1,4 +1,4 @@
-from scout.build.hgnc_gene import build_hgnc_gene
+from scout.build.hgnc_gene import (build_hgnc_gene, build_phenotype)
 import pytest
 
 def test_build_hgnc_genes(genes):
@@ -51,3 +51,16 @@ def test_build_hgnc_gene_wrong_id():
     }
     with pytest.raises(ValueError):
         gene_obj = build_hgnc_gene(gene_info)
+
+def test_build_phenotype_inheritance_order():
+    # GIVEN phenotype information where the inheritance models are a set
+    phenotype_info = {
+        'mim_number': 1,
+        'description': 'A phenotype',
+        'inheritance': set(['XR', 'AR', 'AD', 'XD']),
+        'status': 'established',
+    }
+    # WHEN building the phenotype
+    phenotype_obj = build_phenotype(phenotype_info)
+    # THEN the models should be sorted so that the order does not depend on the hash seed
+    assert phenotype_obj['inheritance_models'] == ['AD', 'AR', 'XD', 'XR']
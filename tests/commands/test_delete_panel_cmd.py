@@ -0,0 +1,31 @@
+from click.testing import CliRunner
+
+from scout.commands.delete.delete_command import panel
+
+
+def test_delete_all_panel_versions(panel_database, monkeypatch):
+    adapter = panel_database
+    panel_obj = adapter.panel_collection.find_one()
+    panel_name = panel_obj['panel_name']
+    ## GIVEN a panel with three versions, the older stored as changes
+    panel_obj['pending'] = []
+    new_panel = adapter.apply_pending(panel_obj)
+    new_panel['pending'] = []
+    adapter.apply_pending(new_panel)
+    assert adapter.gene_panels(panel_id=panel_name).count() == 3
+    replaced = []
+    replace_one = adapter.panel_collection.replace_one
+
+    def record_replace(query, document, *args, **kwargs):
+        replaced.append(query['_id'])
+        return replace_one(query, document, *args, **kwargs)
+
+    monkeypatch.setattr(adapter.panel_collection, 'replace_one', record_replace)
+
+    ## WHEN deleting all versions of the panel
+    result = CliRunner().invoke(panel, ['--panel-id', panel_name], obj={'adapter': adapter})
+
+    ## THEN all versions should be deleted without rebuilding any of them
+    assert result.exit_code == 0
+    assert adapter.gene_panels(panel_id=panel_name).count() == 0
+    assert replaced == []
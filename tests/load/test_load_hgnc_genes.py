@@ -1,4 +1,5 @@
-from scout.load.hgnc_gene import load_hgnc_genes
+from scout.load.hgnc_gene import (load_hgnc_genes, update_hgnc_genes)
+
 
 def test_load_hgnc_genes(adapter, genes):
     # GIVEN a empty database
@@ -17,4 +18,28 @@ def test_load_hgnc_genes(adapter, genes):
     
     assert adapter.all_genes().count() == nr_genes
     
-    assert adapter.hgnc_gene(gene_info['hgnc_id'])
\ No newline at end of file
+    assert adapter.hgnc_gene(gene_info['hgnc_id'])
+
+
+def test_update_hgnc_genes(adapter, genes):
+    # GIVEN a database with genes
+    load_hgnc_genes(adapter, genes)
+    nr_genes = adapter.all_genes().count()
+    hgnc_ids = [gene_obj['hgnc_id'] for gene_obj in adapter.all_genes()]
+
+    # WHEN updating with the same genes
+    result = update_hgnc_genes(adapter, genes)
+    # THEN nothing should be written
+    assert result == {'inserted': 0, 'updated': 0, 'deleted': 0}
+
+    # WHEN a gene is removed and another one is changed
+    new_genes = dict(genes)
+    new_genes.pop(hgnc_ids[0])
+    new_genes[hgnc_ids[1]] = dict(genes[hgnc_ids[1]], description='changed')
+    result = update_hgnc_genes(adapter, new_genes)
+
+    # THEN only those genes should be written
+    assert result == {'inserted': 0, 'updated': 1, 'deleted': 1}
+    assert adapter.all_genes().count() == nr_genes - 1
+    assert adapter.hgnc_gene(hgnc_ids[0]) is None
+    assert adapter.hgnc_gene(hgnc_ids[1])['description'] == 'changed'
@@ -1,5 +1,6 @@
 from scout.parse.omim import (parse_omim_line, parse_genemap2, parse_mim_titles, 
-                              parse_mim2gene, get_mim_phenotypes)
+                              parse_mim2gene, get_mim_phenotypes, get_mim_info,
+                              parse_omim_phenotypes)
 
 GENEMAP_LINES = [
     "# Copyright (c) 1966-2016 Johns Hopkins University. Use of this"\
@@ -102,6 +103,37 @@ def test_get_mim_phenotypes():
     assert term['inheritance'] == set(['AR'])
     assert term['hgnc_symbols'] == set(['B3GALT6'])
 
+def test_parse_omim_phenotypes():
+    ## GIVEN a phenotype field with a provisional phenotype without mim number
+    ## and a nondisease
+    phenotypes_text = ("?Deafness, autosomal recessive (1), Autosomal recessive, "
+                       "X-linked recessive; [Blood group, Yt system], 112100 (3)")
+
+    ## WHEN parsing the phenotypes
+    phenotypes = parse_omim_phenotypes(phenotypes_text, 615291)
+
+    ## THEN assert that only the disease was parsed and got the entry mim number
+    assert len(phenotypes) == 1
+    phenotype = phenotypes[0]
+    assert phenotype['mim_number'] == 615291
+    assert phenotype['status'] == 'provisional'
+    assert phenotype['description'] == 'Deafness autosomal recessive'
+    assert phenotype['inheritance'] == set(['AR', 'XR'])
+
+def test_get_mim_info():
+    ## GIVEN some lines from a genemap2 and a mim2gene file
+
+    ## WHEN collecting the genes and phenotypes in one pass
+    genes, phenotypes = get_mim_info(GENEMAP_LINES, MIM2GENE_LINES)
+
+    ## THEN assert both views where collected
+    assert genes['B3GALT6']['inheritance'] == set(['AR'])
+    assert len(genes['B3GALT6']['phenotypes']) == 2
+    assert phenotypes == get_mim_phenotypes(genemap_lines=GENEMAP_LINES)
+    ## THEN assert that the gene phenotypes have no hgnc symbols added
+    for phenotype in genes['B3GALT6']['phenotypes']:
+        assert 'hgnc_symbols' not in phenotype
+
 def test_get_mim_phenotypes_file(genemap_handle):
     phenotypes = get_mim_phenotypes(genemap_lines=genemap_handle)
     
@@ -0,0 +1,91 @@
+import os
+import time
+
+from scout.utils.cache import (LRUCache, DiskCache, file_digest)
+
+
+def test_lru_cache_evicts_oldest():
+    ## GIVEN a cache with room for two entries
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    ## WHEN using the first entry and adding a third
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    ## THEN the least recently used entry should be removed
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_lru_cache_invalidate():
+    ## GIVEN a cache with entries for two builds
+    cache = LRUCache()
+    cache.set(('gene', '37', 1), 'a')
+    cache.set(('gene', '38', 1), 'b')
+    ## WHEN invalidating one build
+    nr_removed = cache.invalidate(lambda key: key[1] == '37')
+
+    ## THEN only the entries for that build should be removed
+    assert nr_removed == 1
+    assert cache.get(('gene', '37', 1)) is None
+    assert cache.get(('gene', '38', 1)) == 'b'
+
+
+def test_lru_cache_ttl():
+    ## GIVEN a cache where entries expire
+    cache = LRUCache(ttl=0.01)
+    cache.set('a', 1)
+    ## WHEN the entry is too old
+    time.sleep(0.02)
+
+    ## THEN it should not be returned
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_disk_cache(tmpdir):
+    ## GIVEN a disk cache and a key built from the content of a file
+    cache = DiskCache(str(tmpdir.join('cache')))
+    resource = tmpdir.join('resource.txt')
+    resource.write('a\tb\n')
+    key = DiskCache.key('resource', file_digest(str(resource)))
+    assert cache.get(key) is None
+
+    ## WHEN storing a value
+    cache.set(key, {'a': [1, 2]})
+
+    ## THEN it should be returned for the same content
+    assert cache.get(key) == {'a': [1, 2]}
+    ## THEN a changed file should give another key
+    resource.write('a\tc\n')
+    assert DiskCache.key('resource', file_digest(str(resource))) != key
+
+
+def test_disk_cache_prune(tmpdir):
+    ## GIVEN a disk cache with room for two entries
+    cache = DiskCache(str(tmpdir.join('cache')), max_entries=2, max_age=3600)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    ## GIVEN that the first entry was not used for two hours
+    old = time.time() - 7200
+    os.utime(cache._path('a'), (old, old))
+
+    ## WHEN writing a new entry
+    cache.set('c', 3)
+
+    ## THEN the unused entry should be removed
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache.get('c') == 3
+
+    ## WHEN writing more entries than there is room for
+    cache.get('b')
+    cache.set('d', 4)
+
+    ## THEN the least recently used entry should be removed
+    assert cache.get('c') is None
+    assert cache.get('b') == 2
+    assert cache.get('d') == 4
@@ -1,4 +1,6 @@
-from scout.utils.link import link_genes
+from scout.utils.link import (link_genes, link_genes_parallel)
+from scout.utils.handle import get_file_handle
+from scout.parse.omim import get_mim_phenotypes
 from pprint import pprint as pp
 
 def test_link_genes(transcripts_handle, hgnc_handle, exac_handle, 
@@ -14,3 +16,49 @@ def test_link_genes(transcripts_handle, hgnc_handle, exac_handle,
     )
     for hgnc_symbol in genes:
         assert genes[hgnc_symbol]['hgnc_symbol']
+
+def test_link_genes_parallel(genes, transcripts_file, hgnc_file, exac_file,
+                             mim2gene_file, genemap_file, hpo_genes_file):
+    ## GIVEN the paths to the gene resources for two builds
+    gene_resources = {
+        'hgnc': hgnc_file,
+        'ensembl': transcripts_file,
+        'exac': exac_file,
+        'mim2gene': mim2gene_file,
+        'genemap': genemap_file,
+        'hpo': hpo_genes_file,
+    }
+    ## WHEN linking the genes in parallel
+    res = link_genes_parallel({'37': gene_resources, '38': gene_resources}, processes=2)
+    ## THEN both builds should have the same genes as when linking in one process
+    assert res['37'] == genes
+    assert res['38'] == genes
+    ## THEN the builds should not share gene objects
+    hgnc_id = next(iter(genes))
+    assert res['37'][hgnc_id] is not res['38'][hgnc_id]
+
+def test_link_genes_parallel_cached(tmpdir, monkeypatch, genes, transcripts_file, hgnc_file,
+                                    exac_file, mim2gene_file, genemap_file, hpo_genes_file):
+    ## GIVEN genes that are linked with a cache directory
+    gene_resources = {'37': {
+        'hgnc': hgnc_file,
+        'ensembl': transcripts_file,
+        'exac': exac_file,
+        'mim2gene': mim2gene_file,
+        'genemap': genemap_file,
+        'hpo': hpo_genes_file,
+    }}
+    cache_dir = str(tmpdir)
+    link_genes_parallel(gene_resources, processes=1, cache_dir=cache_dir)
+
+    ## WHEN linking again without being able to parse the files
+    def parse_resource(resource, paths):
+        raise AssertionError("{0} was parsed".format(resource))
+    monkeypatch.setattr('scout.utils.link.parse_resource', parse_resource)
+    res, mim_phenotypes = link_genes_parallel(gene_resources, processes=1,
+                                              cache_dir=cache_dir, with_phenotypes=True)
+
+    ## THEN the cached genes should be returned
+    assert res['37'] == genes
+    ## THEN the omim phenotypes should be returned from the cached omim resource
+    assert mim_phenotypes == get_mim_phenotypes(get_file_handle(genemap_file))
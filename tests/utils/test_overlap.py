@@ -0,0 +1,19 @@
+from scout.utils.overlap import overlapping_pairs
+
+
+def test_overlapping_pairs():
+    ## GIVEN a long and a short query interval and some targets
+    queries = [(100, 1000, 'long'), (500, 500, 'short')]
+    targets = [(50, 100, 'a'), (500, 500, 'b'), (999, 2000, 'c'), (1001, 1100, 'd')]
+
+    ## WHEN finding the overlapping pairs
+    pairs = set(overlapping_pairs(queries, targets))
+
+    ## THEN all pairs that share a position should be found
+    assert pairs == set([('long', 'a'), ('long', 'b'), ('long', 'c'), ('short', 'b')])
+
+
+def test_overlapping_pairs_no_targets():
+    ## GIVEN queries without targets
+    ## THEN no pairs should be found
+    assert list(overlapping_pairs([(1, 10, 'a')], [])) == []
@@ -0,0 +1,49 @@
+from scout.utils.prefix import PrefixIndex
+
+
+def test_prefix_index_search():
+    ## GIVEN a prefix index with ranked keys
+    prefix_index = PrefixIndex([
+        ('ABCD', 1, 'a'),
+        ('ABC', 0, 'b'),
+        ('abcde', 0, 'c'),
+        ('BCD', 0, 'd'),
+    ])
+    ## WHEN searching for a prefix
+    res = prefix_index.search('abc')
+
+    ## THEN the best ranked and shortest keys should come first
+    assert res == ['b', 'c', 'a']
+    assert prefix_index.search('abc', limit=1) == ['b']
+    assert prefix_index.search('x') == []
+
+
+def test_prefix_index_exact():
+    ## GIVEN a prefix index where two keys point to the same item
+    prefix_index = PrefixIndex([
+        ('ABC', 1, 'a'),
+        ('abc', 0, 'a'),
+        ('ABCD', 0, 'b'),
+    ])
+    ## WHEN searching for an exact match
+    res = prefix_index.exact('Abc')
+
+    ## THEN each item should be returned once
+    assert res == ['a']
+
+
+def test_prefix_index_search_limit():
+    ## GIVEN a prefix index where the best keys point to the same item
+    prefix_index = PrefixIndex([
+        ('ab', 0, 'a'),
+        ('abc', 0, 'a'),
+        ('abcd', 0, 'a'),
+        ('abcde', 1, 'b'),
+        ('abcdef', 1, 'c'),
+    ])
+    ## WHEN searching with a limit
+    res = prefix_index.search('a', limit=2)
+
+    ## THEN the limit should count unique items in the same order as without it
+    assert res == ['a', 'b']
+    assert prefix_index.search('a', limit=5) == prefix_index.search('a')